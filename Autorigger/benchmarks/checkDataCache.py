@@ -0,0 +1,134 @@
+"""Checks that the memory of dataNodeManager finds out when the data node changed behind its back.
+
+The callbacks of dataNodeManager clear the values in memory whenever the data
+node changes. This script changes the node of the in-memory scene of
+memoryScene.py without calling those callbacks, like an edit Maya doesn't
+report, and checks that the fallback finds it:
+    * verifyCache() reports the attributes that are different and clears them
+    * Reading a node whose callbacks are missing compares it with the node
+    * Values saved after that go after the last element of the node, not the one in memory
+
+Usage:
+    python checkDataCache.py
+
+It exits with 1 if any case fails.
+"""
+
+from __future__ import print_function
+import os
+import sys
+
+# The stand-in maya package has to be found before the real one, then the rigging scripts
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_PATH = os.path.join(os.path.dirname(BENCHMARKS_PATH), "scripts")
+sys.path[0:0] = [BENCHMARKS_PATH, SCRIPTS_PATH]
+
+from maya import cmds
+from maya.api import OpenMaya
+import memoryScene
+import rigBenchmarks
+import dataNodeManager
+
+# The node and the attribute of every case
+NODE_NAME = "rigDataNode"
+ATTRIBUTE_NAME = "cacheCheck"
+
+def prepareNode(values):
+    """Starts a new scene and saves the values, so they are in memory"""
+
+    cmds.file(new=True, force=True)
+    dataNodeManager.clearCache()
+
+    for value in values:
+        dataNodeManager.saveData(nodeName=NODE_NAME, attributeName=ATTRIBUTE_NAME, value=value)
+
+    dataNodeManager.getData(nodeName=NODE_NAME, attributeName=ATTRIBUTE_NAME)
+
+def setBehind(index, value):
+    """Sets an element of the attribute without calling the callbacks of the node"""
+
+    node = memoryScene.scene.get(NODE_NAME)
+    element = "{}[{}]".format(ATTRIBUTE_NAME, index)
+
+    if value is None:
+        del node.values[element]
+    else:
+        node.values[element] = value
+
+def editedValue():
+    """A value is changed behind the memory, verifyCache() finds it and the next read gets it"""
+
+    prepareNode(["a", "b", "c"])
+    setBehind(1, "x")
+
+    mismatches = dataNodeManager.verifyCache(NODE_NAME)
+
+    return mismatches == [ATTRIBUTE_NAME] and dataNodeManager.getData(NODE_NAME, ATTRIBUTE_NAME) == ["a", "x", "c"]
+
+def movedElement():
+    """The values are the same but the last one moved to a higher index, new values go after it"""
+
+    prepareNode(["a", "b", "c"])
+    setBehind(2, None)
+    setBehind(5, "c")
+
+    mismatches = dataNodeManager.verifyCache(NODE_NAME)
+    dataNodeManager.saveData(nodeName=NODE_NAME, attributeName=ATTRIBUTE_NAME, value="d")
+
+    indices = cmds.getAttr("{}.{}".format(NODE_NAME, ATTRIBUTE_NAME), multiIndices=True)
+
+    return mismatches == [ATTRIBUTE_NAME] and indices == [0, 1, 5, 6]
+
+def missingCallbacks():
+    """The callbacks of the node were removed, reading it compares it with the node and watches it again"""
+
+    prepareNode(["a", "b"])
+    OpenMaya.MMessage.removeCallbacks(dataNodeManager.nodeCallbacks.pop(NODE_NAME))
+
+    # Nothing tells the memory about this change
+    cmds.setAttr("{}.{}[0]".format(NODE_NAME, ATTRIBUTE_NAME), "x", type="string")
+
+    values = dataNodeManager.getData(NODE_NAME, ATTRIBUTE_NAME)
+
+    return values == ["x", "b"] and dataNodeManager.isWatched(NODE_NAME)
+
+def unchangedNode():
+    """Nothing changed, verifyCache() keeps the values in memory and doesn't warn"""
+
+    prepareNode(["a", "b", "c"])
+    stored = dataNodeManager.getCachedAttribute(NODE_NAME, ATTRIBUTE_NAME)
+    warnings = len(memoryScene.scene.warnings)
+
+    mismatches = dataNodeManager.verifyCache(NODE_NAME)
+
+    return (not mismatches and len(memoryScene.scene.warnings) == warnings and
+            dataNodeManager.getCachedAttribute(NODE_NAME, ATTRIBUTE_NAME) is stored)
+
+# Every case: its name and the function that returns True if it passed
+CASES = [("edited value", editedValue),
+         ("moved element", movedElement),
+         ("missing callbacks", missingCallbacks),
+         ("unchanged node", unchangedNode)]
+
+def main():
+    """Runs every case, returns the exit code"""
+
+    rows = []
+    failures = 0
+
+    for name, case in CASES:
+        passed = case()
+        failures += not passed
+        rows.append({"case": name, "status": "ok" if passed else "FAILED"})
+
+    rigBenchmarks.printTable("Data node cache against edits behind its back", ["case", "status"], rows)
+
+    if failures:
+        print("{} cases didn't find the edit".format(failures))
+        return 1
+
+    print("The cache finds every edit made behind its back")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""Checks that the tread layout places the pieces where the motion path and snapshots did.
+
+treadLayout computes the position and orientation of every piece from the curve
+with NumPy, instead of animating the piece on a motion path and taking snapshots
+(ThreadMaker.snapshotTread). This script builds treads on the in-memory scene of
+memoryScene.py and compares the position and the axes of every piece
+(computeLayout) and every vertex of the merged tread mesh (buildTreadMesh)
+against a reference:
+    * circle: the exact positions on a circle. The length along a circle is
+      proportional to the angle, so the piece at a fraction f of the length is at
+      the angle 2*pi*f from the start, without measuring the curve at all.
+      The snapshot mesh is checked against it too.
+    * line: the exact positions on a straight curve with its CVs spaced unevenly.
+      The pieces are at even fractions of the line, even though the parameter
+      of the curve is not proportional to its length.
+    * snapshot: the motion path of the stand-in and snapshotTread, for curves
+      that are not circles. It is written from Maya's rules (fraction mode, front
+      axis on the tangent, up axis towards world up) without using treadLayout,
+      but it also measures the length of the curve by sampling it, so it only
+      checks that both ways agree.
+
+The circles have many sections, so the nurbs curve is within 1e-5 of a true circle.
+
+Usage:
+    python checkTreadLayout.py
+
+It exits with 1 if any tread is off by more than the tolerance.
+"""
+
+from __future__ import print_function
+import math
+import os
+import sys
+
+# The stand-in maya package has to be found before the real one, then the rigging scripts
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_PATH = os.path.join(os.path.dirname(BENCHMARKS_PATH), "scripts")
+sys.path[0:0] = [BENCHMARKS_PATH, SCRIPTS_PATH]
+
+from maya import cmds
+from maya.api import OpenMaya
+import memoryScene
+import rigBenchmarks
+import ThreadMaker
+import treadLayout
+
+# The largest distance allowed between the two layouts, in scene units
+TOLERANCE = 1e-3
+
+# The up axis of the pieces follows it, like the motion path of snapshotTread
+WORLD_UP = (0.0, 1.0, 0.0)
+
+# The curves checked: name, radius, scale and tilt (Z rotation) of the curve transform,
+# sections of the curve, number of pieces and the reference they are compared with.
+# The circles don't have a piece where the curve goes along world up, the up axis is not defined there
+CURVES = [("circle", 10, (1, 1, 1), 0, 64, 13, "circle"),
+          ("tilted circle", 6, (1.5, 1.5, 1.5), 30, 64, 37, "circle"),
+          ("circle", 10, (1, 1, 1), 0, 8, 12, "snapshot"),
+          ("oval", 10, (1, 0.5, 2), 0, 8, 24, "snapshot"),
+          ("tilted oval", 8, (1, 1.5, 0.75), 20, 8, 31, "snapshot")]
+
+# Straight open curves with CVs spaced unevenly, so the parameter of the curve is far from its length:
+# name, CVs and number of pieces. The exact position of a piece is at the same fraction of the line
+LINES = [("uneven line", [(0.0, 0.0, 0.0), (0.5, 0.25, 1.0), (1.0, 0.5, 2.0), (6.0, 3.0, 12.0), (7.0, 3.5, 14.0),
+                          (20.0, 10.0, 40.0)], 15)]
+
+def worldCurve(curve):
+    """Returns the geometry of a curve with its cvs in world space"""
+
+    transform = memoryScene.scene.get(curve)
+    shape = transform.shapes(intermediate=False)[0]
+    geometry = memoryScene.copyGeometry(shape.geometry)
+    matrix = memoryScene.scene.worldMatrix(transform)
+    geometry["cvs"] = [memoryScene.transformPoint(cv, matrix) for cv in geometry["cvs"]]
+
+    return geometry
+
+def meshPoints(mesh):
+    """Returns the world position of the vertices of a mesh"""
+
+    selectionList = OpenMaya.MSelectionList()
+    selectionList.add(mesh)
+    points = OpenMaya.MFnMesh(selectionList.getDagPath(0)).getPoints(OpenMaya.MSpace.kWorld)
+
+    return [(point.x, point.y, point.z) for point in points]
+
+def distance(first, second):
+    """Returns the distance between two points"""
+
+    return sum((a - b) ** 2 for a, b in zip(first, second)) ** 0.5
+
+def normalize(vector):
+    """Returns a vector with length 1"""
+
+    length = sum(value * value for value in vector) ** 0.5
+    return [value / length for value in vector]
+
+def circleMatrix(center, first, second, radius, fraction):
+    """Returns the frame of a piece at a fraction of the length of a circle, computed exactly
+
+    Parameters
+    ----------
+    center : tuple
+        The center of the circle
+    first, second : list
+        Perpendicular unit vectors in the plane of the circle, from the center to the start
+        of the curve and in the direction the curve goes
+    radius : float
+        The radius of the circle
+    fraction : float
+        The fraction of the length
+
+    Returns
+    -------
+    list
+        The rows of the matrix: the X, Y and Z axes of the piece and its position
+    """
+
+    angle = 2.0 * math.pi * fraction
+    position = [c + radius * (math.cos(angle) * a + math.sin(angle) * b) for c, a, b in zip(center, first, second)]
+
+    # The front axis is the tangent, the up axis is world up without the front component
+    front = [-math.sin(angle) * a + math.cos(angle) * b for a, b in zip(first, second)]
+    along = sum(a * b for a, b in zip(front, WORLD_UP))
+    up = normalize([value - along * direction for value, direction in zip(WORLD_UP, front)])
+    side = memoryScene.crossProduct(up, front)
+
+    return [list(side), up, front, position]
+
+def circleReference(curve, radius, amount):
+    """Returns the exact frame of every piece on a circle curve
+
+    Parameters
+    ----------
+    curve : str
+        The name of the circle, its transform can be rotated and scaled uniformly
+    radius : float
+        The radius of the circle in world space
+    amount : int
+        The number of pieces
+    """
+
+    # The start and the direction of the curve come from its transform, the circle goes around its X axis
+    matrix = memoryScene.scene.worldMatrix(memoryScene.scene.get(curve))
+    center = matrix[3][:3]
+    geometry = worldCurve(curve)
+    start = memoryScene.evaluateCurve(geometry, geometry["knots"][geometry["degree"] - 1])
+
+    first = normalize([a - b for a, b in zip(start, center)])
+    second = normalize(memoryScene.crossProduct(normalize(matrix[0][:3]), first))
+
+    return [circleMatrix(center, first, second, radius, index / float(amount)) for index in range(amount)]
+
+def snapshotReference(curve, amount):
+    """Returns the frame the motion path of the stand-in gives to every piece"""
+
+    geometry = worldCurve(curve)
+
+    return [[row[:3] for row in memoryScene.motionPathMatrix(geometry, index / float(amount), worldUp=WORLD_UP)]
+            for index in range(amount)]
+
+def placePiece(points, scale, matrix):
+    """Returns the world position of the points of a piece placed with a frame
+
+    Parameters
+    ----------
+    points : list
+        The object space points of the piece
+    scale : tuple
+        The scale of the piece, which is kept on the path
+    matrix : list
+        The axes and the position of the piece
+    """
+
+    placed = []
+    for point in points:
+        scaled = [value * factor for value, factor in zip(point, scale)]
+        placed.append([matrix[3][axis] + sum(scaled[row] * matrix[row][axis] for row in range(3)) for axis in range(3)])
+
+    return placed
+
+def lineReference(start, end, amount):
+    """Returns the exact frame of every piece on a straight open curve
+
+    The pieces of an open curve go from its start to its end, both included.
+
+    Parameters
+    ----------
+    start, end : tuple
+        The first and the last point of the line
+    amount : int
+        The number of pieces
+    """
+
+    front = normalize([b - a for a, b in zip(start, end)])
+    along = sum(a * b for a, b in zip(front, WORLD_UP))
+    up = normalize([value - along * direction for value, direction in zip(WORLD_UP, front)])
+    side = list(memoryScene.crossProduct(up, front))
+
+    fractions = [index / float(amount - 1) for index in range(amount)]
+
+    return [[side, up, front, [a + (b - a) * fraction for a, b in zip(start, end)]] for fraction in fractions]
+
+def makeCircle(radius, scale, tilt, sections):
+    """Makes the tread curve from a circle
+
+    Parameters
+    ----------
+    radius : float
+        The radius of the tread circle
+    scale : tuple
+        The scale of the curve transform, so the curve is not always a circle
+    tilt : float
+        The Z rotation of the curve transform in degrees, so the curve is not always in the YZ plane
+    sections : int
+        The number of sections of the curve
+    """
+
+    curve = cmds.circle(name="TreadCurve", radius=radius, nr=(1,0,0), sections=sections)[0]
+    cmds.scale(scale[0], scale[1], scale[2], curve)
+    cmds.setAttr("{}.rotateZ".format(curve), tilt)
+
+    return curve
+
+def checkTread(curve, frames, snapshot=False):
+    """Builds a tread on a curve with the layout and measures how far it is from the reference frames
+
+    Parameters
+    ----------
+    curve : str
+        The name of the tread curve
+    frames : list
+        The axes and the position every piece should have
+    snapshot : bool
+        True to check the mesh made with snapshotTread against the frames too
+
+    Returns
+    -------
+    dict
+        The largest difference of the positions, the axes and the vertices
+    """
+
+    amount = len(frames)
+    piece = ThreadMaker.makeProxyGeo()
+
+    # The frames of the pieces against the reference ones
+    positions, rotations = treadLayout.computeLayout(curve, amount)
+
+    positionError = axisError = 0.0
+    for index, matrix in enumerate(frames):
+        positionError = max(positionError, distance(positions[index], matrix[3]))
+        for axis in range(3):
+            axisError = max(axisError, distance(rotations[index][axis], matrix[axis]))
+
+    # The piece placed on every reference frame
+    piecePoints = meshPoints(piece)
+    pieceScale = cmds.getAttr("{}.scale".format(piece))[0]
+    expectedPoints = [point for matrix in frames for point in placePiece(piecePoints, pieceScale, matrix)]
+
+    # The merged meshes, built from the same piece
+    meshes = [treadLayout.buildTreadMesh(treadLayout.getMeshData(piece), curve, amount, name="LayoutTread")]
+    if snapshot:
+        meshes.append(ThreadMaker.snapshotTread(piece, curve, amount, name="SnapshotTread"))
+
+    vertexError = 0.0
+    for mesh in meshes:
+        points = meshPoints(mesh)
+        if len(points) != len(expectedPoints):
+            raise RuntimeError("{} has {} vertices instead of {}".format(mesh, len(points), len(expectedPoints)))
+
+        vertexError = max(vertexError, max(distance(first, second) for first, second in zip(points, expectedPoints)))
+
+    return {"position": positionError, "axis": axisError, "vertex": vertexError}
+
+def checkCases():
+    """Builds every curve of CURVES and LINES and checks its tread
+
+    Returns
+    -------
+    list
+        name, pieces, reference and the errors of every case
+    """
+
+    results = []
+
+    for name, radius, scale, tilt, sections, amount, reference in CURVES:
+        cmds.file(new=True, force=True)
+        curve = makeCircle(radius, scale, tilt, sections)
+
+        if reference == "circle":
+            errors = checkTread(curve, circleReference(curve, radius * scale[0], amount), snapshot=True)
+        else:
+            errors = checkTread(curve, snapshotReference(curve, amount))
+
+        results.append((name, amount, reference, errors))
+
+    for name, points, amount in LINES:
+        cmds.file(new=True, force=True)
+        curve = cmds.curve(name="TreadCurve", degree=3, point=points)
+        errors = checkTread(curve, lineReference(points[0], points[-1], amount))
+
+        results.append((name, amount, "line", errors))
+
+    return results
+
+def main():
+    """Checks every curve, returns the exit code"""
+
+    if not treadLayout.isAvailable():
+        print("NumPy is needed to check the tread layout")
+        return 1
+
+    rows = []
+    failures = 0
+
+    for name, amount, reference, errors in checkCases():
+        passed = max(errors.values()) <= TOLERANCE
+        failures += not passed
+
+        rows.append({"curve": name, "pieces": amount, "reference": reference,
+                     "position error": "{:.2e}".format(errors["position"]),
+                     "axis error": "{:.2e}".format(errors["axis"]), "vertex error": "{:.2e}".format(errors["vertex"]),
+                     "status": "ok" if passed else "FAILED"})
+
+    rigBenchmarks.printTable("Tread layout against the references",
+                             ["curve", "pieces", "reference", "position error", "axis error", "vertex error", "status"],
+                             rows)
+
+    if failures:
+        print("{} treads don't match their reference".format(failures))
+        return 1
+
+    print("The tread layout matches the references")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
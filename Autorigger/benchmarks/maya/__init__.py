@@ -0,0 +1,5 @@
+"""Stand-in for the maya package, backed by the in-memory scene of memoryScene.py.
+
+It is only found when the benchmarks folder is first in sys.path (runBenchmarks.py
+puts it there). Inside Maya the real package is used.
+"""
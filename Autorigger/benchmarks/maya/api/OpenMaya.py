@@ -0,0 +1,460 @@
+"""Stand-in for maya.api.OpenMaya, backed by the in-memory scene of memoryScene.py.
+
+Only the classes and methods the rigging scripts use are here: selection lists,
+DAG paths, the mesh and nurbs curve function sets, the modifiers the controllers
+are made with, the messages the data node cache listens to and the node added
+message the transactions record the new nodes with.
+
+Instancing is not supported, MFnDagNode.addChild raises RuntimeError.
+"""
+
+import memoryScene
+
+scene = memoryScene.scene
+
+class MFn(object):
+    kTransform = 110
+    kJoint = 121
+    kNurbsCurve = 267
+    kLocator = 281
+    kMesh = 296
+    kMeshVertComponent = 550
+
+# The function set type of every node type, the others are plain dependency nodes
+API_TYPES = {"mesh": MFn.kMesh, "nurbsCurve": MFn.kNurbsCurve, "locator": MFn.kLocator, "joint": MFn.kJoint}
+
+class MSpace(object):
+    kTransform = 1
+    kObject = 2
+    kWorld = 4
+
+class MObject(object):
+    """A handle to a node of the scene"""
+
+    def __init__(self, node=None):
+        self.node = node
+
+    def isNull(self):
+        return self.node is None
+
+    def __eq__(self, other):
+        return isinstance(other, MObject) and other.node is self.node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return id(self.node)
+
+MObject.kNullObj = MObject()
+
+class MPoint(object):
+    """A point, built from x, y, z, from a sequence or from another point"""
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        values = list(args) + [0.0] * (3 - len(args))
+        self.x, self.y, self.z = [float(value) for value in values[:3]]
+        self.w = 1.0
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z, self.w))
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z, self.w)[index]
+
+    def __sub__(self, other):
+        return MVector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __add__(self, other):
+        return MPoint(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __repr__(self):
+        return "MPoint({}, {}, {})".format(self.x, self.y, self.z)
+
+class MVector(MPoint):
+    """A vector, the difference between two points"""
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+class MPointArray(list):
+    def __init__(self, points=()):
+        list.__init__(self, [point if isinstance(point, MPoint) else MPoint(point) for point in points])
+
+class MDoubleArray(list):
+    pass
+
+class MFloatArray(list):
+    pass
+
+class MIntArray(list):
+    pass
+
+class MSelectionList(object):
+    def __init__(self):
+        self.nodes = []
+
+    def add(self, name):
+        node = scene.find(name)
+        if node is None:
+            raise RuntimeError("(kInvalidParameter): Object does not exist: {}".format(name))
+        self.nodes.append(node)
+        return self
+
+    def length(self):
+        return len(self.nodes)
+
+    def getDependNode(self, index):
+        return MObject(self.nodes[index])
+
+    def getDagPath(self, index):
+        if not self.nodes[index].isDag:
+            raise TypeError("(kInvalidParameter): Object is not a DAG node")
+        return MDagPath(self.nodes[index])
+
+class MDagPath(object):
+    def __init__(self, node=None):
+        self.dagNode = node
+
+    def apiType(self):
+        if self.dagNode.isTransform and self.dagNode.type != "joint":
+            return MFn.kTransform
+        return API_TYPES.get(self.dagNode.type, 0)
+
+    def extendToShape(self):
+        shapes = self.dagNode.shapes(intermediate=False) if not self.dagNode.isShape else [self.dagNode]
+        if len(shapes) != 1:
+            raise RuntimeError("(kInvalidParameter): {} doesn't have exactly one shape".format(self.dagNode.name))
+        self.dagNode = shapes[0]
+        return self
+
+    def node(self):
+        return MObject(self.dagNode)
+
+    def transform(self):
+        return MObject(self.dagNode if self.dagNode.isTransform else self.dagNode.parent)
+
+    def fullPathName(self):
+        return scene.longName(self.dagNode)
+
+    def partialPathName(self):
+        return self.dagNode.name
+
+def nodeOf(target):
+    """Returns the node of an MObject or an MDagPath"""
+
+    if isinstance(target, MDagPath):
+        return target.dagNode
+    if isinstance(target, MObject):
+        return target.node
+    return None
+
+def toWorld(points, shape):
+    """Returns the object space points of a shape in world space"""
+
+    if shape.parent is None:
+        return [tuple(point) for point in points]
+
+    matrix = scene.worldMatrix(shape.parent)
+    return [memoryScene.transformPoint(point, matrix) for point in points]
+
+def toObject(points, shape):
+    """Returns the world space points of a shape in object space"""
+
+    if shape.parent is None:
+        return [tuple(point) for point in points]
+
+    matrix = memoryScene.invertMatrix(scene.worldMatrix(shape.parent))
+    return [memoryScene.transformPoint(point, matrix) for point in points]
+
+def createShape(nodeType, defaultName, parent):
+    """Creates a shape under a parent, or under a new transform if the parent is null
+
+    Returns
+    -------
+    tuple
+        The new shape and the MObject the create methods return (the transform if it was made)
+    """
+
+    parentNode = nodeOf(parent) if parent is not None else None
+    if parentNode is None:
+        transform = scene.createNode("transform", defaultName)
+        shape = scene.createNode(nodeType, memoryScene.shapeName(transform.name), transform)
+        return shape, MObject(transform)
+
+    shape = scene.createNode(nodeType, memoryScene.shapeName(defaultName), parentNode)
+    return shape, MObject(shape)
+
+class MUuid(object):
+    def __init__(self, value):
+        self.value = value
+
+    def asString(self):
+        return self.value
+
+class MFnDependencyNode(object):
+    def __init__(self, target=None):
+        self.dependNode = nodeOf(target)
+
+    def name(self):
+        return self.dependNode.name
+
+    def uuid(self):
+        return MUuid(self.dependNode.uuid)
+
+    def setName(self, name):
+        return scene.rename(self.dependNode, name)
+
+    @property
+    def typeName(self):
+        return self.dependNode.type
+
+    def findPlug(self, attribute, wantNetworkedPlug):
+        if not scene.attributeExists(self.dependNode, attribute):
+            raise RuntimeError("(kInvalidParameter): {} has no attribute {}".format(self.dependNode.name, attribute))
+        return MPlug(self.dependNode, attribute)
+
+class MFnDagNode(MFnDependencyNode):
+    kNextPos = 255
+
+    def fullPathName(self):
+        return scene.longName(self.dependNode)
+
+    def partialPathName(self):
+        return self.dependNode.name
+
+    def addChild(self, child, index=kNextPos, keepExistingParents=False):
+        raise RuntimeError("The in-memory scene doesn't support instances")
+
+class MPlug(object):
+    def __init__(self, node=None, attribute=""):
+        self.plugNode = node
+        self.attribute = attribute
+
+    def node(self):
+        return MObject(self.plugNode)
+
+    def name(self):
+        return "{}.{}".format(self.plugNode.name, self.attribute)
+
+    def partialName(self, *args, **kwargs):
+        return self.attribute
+
+    def asDouble(self):
+        return float(scene.getValue(self.plugNode, self.attribute))
+
+    def setDouble(self, value):
+        scene.setValue(self.plugNode, self.attribute, float(value))
+
+class MFnMesh(MFnDagNode):
+    def __init__(self, target=None):
+        # Like Maya, a DAG path of a transform gives the function set of its shape
+        if isinstance(target, MDagPath) and target.dagNode.isTransform:
+            target = MDagPath(target.dagNode).extendToShape()
+        MFnDagNode.__init__(self, target)
+
+    @property
+    def numVertices(self):
+        return len(self.dependNode.geometry["points"])
+
+    @property
+    def numPolygons(self):
+        return len(self.dependNode.geometry["counts"])
+
+    def getPoints(self, space=MSpace.kObject):
+        points = self.dependNode.geometry["points"]
+        if space == MSpace.kWorld:
+            points = toWorld(points, self.dependNode)
+        return MPointArray(points)
+
+    def setPoints(self, points, space=MSpace.kObject):
+        points = [(point.x, point.y, point.z) for point in points]
+        if space == MSpace.kWorld:
+            points = toObject(points, self.dependNode)
+        self.dependNode.geometry["points"] = points
+
+    def getVertices(self):
+        geometry = self.dependNode.geometry
+        return MIntArray(geometry["counts"]), MIntArray(geometry["connects"])
+
+    def getUVs(self):
+        geometry = self.dependNode.geometry
+        return MFloatArray(geometry["u"]), MFloatArray(geometry["v"])
+
+    def getAssignedUVs(self):
+        geometry = self.dependNode.geometry
+        return MIntArray(geometry["uvCounts"]), MIntArray(geometry["uvIds"])
+
+    def setUVs(self, u, v):
+        self.dependNode.geometry["u"] = list(u)
+        self.dependNode.geometry["v"] = list(v)
+
+    def assignUVs(self, uvCounts, uvIds):
+        self.dependNode.geometry["uvCounts"] = list(uvCounts)
+        self.dependNode.geometry["uvIds"] = list(uvIds)
+
+    def create(self, points, counts, connects, u=None, v=None, parent=MObject.kNullObj):
+        shape, result = createShape("mesh", "polySurface1", parent)
+        counts = list(counts)
+        shape.geometry = {"points": [(point.x, point.y, point.z) for point in MPointArray(points)],
+                          "counts": counts, "connects": list(connects), "u": list(u or []), "v": list(v or []),
+                          "uvCounts": [0] * len(counts), "uvIds": []}
+        self.dependNode = shape
+        return result
+
+class MFnNurbsCurve(MFnDagNode):
+    kOpen = 1
+    kClosed = 2
+    kPeriodic = 3
+
+    # The forms of memoryScene by their value
+    FORMS = {"open": kOpen, "closed": kClosed, "periodic": kPeriodic}
+
+    def __init__(self, target=None):
+        # Like Maya, a DAG path of a transform gives the function set of its shape
+        if isinstance(target, MDagPath) and target.dagNode.isTransform:
+            target = MDagPath(target.dagNode).extendToShape()
+        MFnDagNode.__init__(self, target)
+
+    @property
+    def degree(self):
+        return self.dependNode.geometry["degree"]
+
+    @property
+    def form(self):
+        return MFnNurbsCurve.FORMS[self.dependNode.geometry["form"]]
+
+    @property
+    def numCVs(self):
+        return len(self.dependNode.geometry["cvs"])
+
+    @property
+    def knotDomain(self):
+        geometry = self.dependNode.geometry
+        return geometry["knots"][geometry["degree"] - 1], geometry["knots"][len(geometry["cvs"]) - 1]
+
+    def knots(self):
+        return MDoubleArray(self.dependNode.geometry["knots"])
+
+    def cvPositions(self, space=MSpace.kObject):
+        cvs = self.dependNode.geometry["cvs"]
+        if space == MSpace.kWorld:
+            cvs = toWorld(cvs, self.dependNode)
+        return MPointArray(cvs)
+
+    def setCVPositions(self, points, space=MSpace.kObject):
+        points = [(point.x, point.y, point.z) for point in MPointArray(points)]
+        if space == MSpace.kWorld:
+            points = toObject(points, self.dependNode)
+        self.dependNode.geometry["cvs"] = points
+
+    def updateCurve(self):
+        pass
+
+    def create(self, points, knots, degree, form, is2D, rational, parent=MObject.kNullObj):
+        shape, result = createShape("nurbsCurve", "curve1", parent)
+        forms = dict((value, key) for key, value in MFnNurbsCurve.FORMS.items())
+        shape.geometry = {"cvs": [(point.x, point.y, point.z) for point in MPointArray(points)],
+                          "knots": [float(knot) for knot in knots], "degree": degree, "form": forms[form]}
+        self.dependNode = shape
+        return result
+
+class MDGModifier(object):
+    """Queues changes and applies them in doIt()"""
+
+    def __init__(self):
+        self.operations = []
+
+    def newPlugValueDouble(self, plug, value):
+        self.operations.append(lambda: plug.setDouble(value))
+        return self
+
+    def deleteNode(self, target):
+        node = nodeOf(target)
+        self.operations.append(lambda: scene.delete(node))
+        return self
+
+    def doIt(self):
+        operations, self.operations = self.operations, []
+        for operation in operations:
+            operation()
+
+    def undoIt(self):
+        raise RuntimeError("The in-memory scene doesn't record undo")
+
+class MDagModifier(MDGModifier):
+    def createNode(self, nodeType, parent=MObject.kNullObj):
+        # The node exists outside of the scene until doIt() adds it
+        node = memoryScene.Node(nodeType, "{}1".format(nodeType))
+        parentNode = nodeOf(parent)
+
+        def addNode():
+            node.name = scene.uniqueName(node.name)
+            scene.addNode(node, parentNode)
+
+        self.operations.append(addNode)
+        return MObject(node)
+
+    def renameNode(self, target, name):
+        self.operations.append(lambda: scene.rename(target.node, name))
+        return self
+
+class MMessage(object):
+    @staticmethod
+    def removeCallback(callbackId):
+        scene.removeCallback(callbackId)
+
+    @staticmethod
+    def removeCallbacks(callbackIds):
+        for callbackId in callbackIds:
+            scene.removeCallback(callbackId)
+
+class MNodeMessage(MMessage):
+    kConnectionMade = memoryScene.CONNECTION_MADE
+    kConnectionBroken = memoryScene.CONNECTION_BROKEN
+    kAttributeSet = memoryScene.ATTRIBUTE_SET
+    kAttributeRemoved = memoryScene.ATTRIBUTE_REMOVED
+    kAttributeAdded = memoryScene.ATTRIBUTE_ADDED
+
+    @staticmethod
+    def addAttributeChangedCallback(target, function, clientData=None):
+        node = nodeOf(target)
+
+        def callback(message, plug, otherPlug, data):
+            function(message, MPlug(node, plug.split(".", 1)[1]), MPlug(), data)
+
+        return scene.addCallback(scene.attributeCallbacks, node, callback, clientData)
+
+    @staticmethod
+    def addNameChangedCallback(target, function, clientData=None):
+        return scene.addCallback(scene.nameCallbacks, nodeOf(target),
+                                 lambda node, previousName, data: function(MObject(node), previousName, data),
+                                 clientData)
+
+    @staticmethod
+    def addNodePreRemovalCallback(target, function, clientData=None):
+        return scene.addCallback(scene.removalCallbacks, nodeOf(target),
+                                 lambda node, data: function(MObject(node), data), clientData)
+
+class MSceneMessage(MMessage):
+    kAfterNew = memoryScene.AFTER_NEW
+    kAfterImport = memoryScene.AFTER_IMPORT
+    kAfterOpen = memoryScene.AFTER_OPEN
+    kAfterCreateReference = memoryScene.AFTER_CREATE_REFERENCE
+
+    @staticmethod
+    def addCallback(message, function, clientData=None):
+        return scene.addCallback(scene.sceneCallbacks, message, function, clientData)
+
+class MDGMessage(MMessage):
+    @staticmethod
+    def addNodeAddedCallback(function, nodeType="dependNode", clientData=None):
+        return scene.addCallback(scene.nodeAddedCallbacks, nodeType,
+                                 lambda node, data: function(MObject(node), data), clientData)
+
+class MEventMessage(MMessage):
+    @staticmethod
+    def addEventCallback(event, function, clientData=None):
+        return scene.addCallback(scene.eventCallbacks, event, function, clientData)
@@ -0,0 +1 @@
+"""Stand-in for maya.api, only OpenMaya is available"""
@@ -0,0 +1,1243 @@
+"""Stand-in for maya.cmds, backed by the in-memory scene of memoryScene.py.
+
+Only the commands and flags the rigging scripts use are here. They follow the
+behaviour of Maya that the scripts rely on:
+    * Commands that find nothing return None (listRelatives, listConnections)
+    * Missing objects raise ValueError, invalid operations raise RuntimeError
+    * Creating objects selects them, unless skipSelect is used
+    * Setting a connected attribute raises RuntimeError
+    * Connecting a plain number to a rotation adds a unitConversion node between them
+
+The UI commands keep the values of the controls, so the scripts can query
+them, but nothing is drawn.
+
+Commands that are not here raise AttributeError, so a benchmark that reaches
+them fails clearly instead of measuring something else.
+"""
+
+import itertools
+import re
+import memoryScene
+
+scene = memoryScene.scene
+
+# Names can be str or unicode (i.e. the ones read from JSON)
+STRING_TYPES = (str, type(u""))
+
+# Splits a component into its node, its type and its index (i.e. TreadCurve.ep[3])
+COMPONENT_PATTERN = re.compile(r"^([^.]+)\.(vtx|e|f|cv|ep|map)\[(\d+|\*)\]$")
+
+# Finds the node.attribute names in an expression, the first one of a statement is the one set
+EXPRESSION_PLUG = re.compile(r"([A-Za-z_][\w|:]*)\.([A-Za-z_]\w*)")
+
+# The rotations, they are saved in radians and shown in degrees
+ANGLE_ATTRIBUTES = ("rotate", "rotateX", "rotateY", "rotateZ")
+
+# ---------------------------------------- Helpers ----------------------------------------
+
+def flag(flags, longName, shortName=None, default=None):
+    """Returns the value of a flag given by its long or short name"""
+
+    if longName in flags:
+        return flags[longName]
+    if shortName is not None and shortName in flags:
+        return flags[shortName]
+    return default
+
+def flatten(items):
+    """Returns the names given as strings or nested lists as a flat list"""
+
+    names = []
+    for item in items:
+        if isinstance(item, (list, tuple)):
+            names.extend(flatten(item))
+        elif item is not None:
+            names.append(item)
+    return names
+
+def getNodes(names):
+    """Returns the nodes of some names, raises ValueError if one doesn't exist"""
+
+    return [scene.get(name) for name in flatten(names)]
+
+def nodesOrSelection(args):
+    """Returns the nodes given, or the selected ones if none are given"""
+
+    names = flatten(args)
+    return getNodes(names) if names else list(scene.selection)
+
+def nodeName(node, longName=False):
+    """Returns the short or the long name of a node"""
+
+    return scene.longName(node) if longName else node.name
+
+def splitPlug(plug):
+    """Returns the node and the attribute of a node.attribute name"""
+
+    name, attribute = plug.split(".", 1)
+    return scene.get(name), attribute
+
+def asAxes(value):
+    """Returns the axes given to skipTranslate or skipRotate as a list"""
+
+    if not value:
+        return []
+    return [value] if isinstance(value, STRING_TYPES) else list(value)
+
+def mainShape(node):
+    """Returns the shape of a transform that isn't an intermediate object, or the node if it is a shape"""
+
+    if node.isShape:
+        return node
+
+    shapes = node.shapes(intermediate=False)
+    if not shapes:
+        raise RuntimeError("{} doesn't have a shape".format(node.name))
+    return shapes[0]
+
+def componentCount(shape, component):
+    """Returns the number of components of a type in a shape"""
+
+    geometry = shape.geometry
+    if component == "vtx":
+        return len(geometry["points"])
+    if component == "f":
+        return len(geometry["counts"])
+    if component == "cv":
+        # Periodic curves repeat their first CVs at the end
+        return len(geometry["cvs"]) - (geometry["degree"] if geometry["form"] == "periodic" else 0)
+    if component == "ep":
+        return len(memoryScene.editPointParameters(geometry))
+
+    raise RuntimeError("The {} components are not supported".format(component))
+
+def isConnected(node, attribute):
+    """Returns True if the attribute, its parent vector or one of its components has an input"""
+
+    if attribute in node.inputs:
+        return True
+
+    vector, component = memoryScene.vectorComponent(attribute)
+    if vector is not None:
+        return vector in node.inputs
+
+    if attribute in memoryScene.VECTOR_ATTRIBUTES:
+        return any(attribute + axis in node.inputs for axis in "XYZ")
+
+    return False
+
+def createDagNode(nodeType, name, parent=None, select=True):
+    """Creates a transform and its shape, returns both nodes"""
+
+    transform = scene.createNode("transform", name, parent)
+    shape = scene.createNode(nodeType, memoryScene.shapeName(transform.name), transform)
+
+    if select:
+        scene.selection = [transform]
+
+    return transform, shape
+
+# ---------------------------------------- Scene ----------------------------------------
+
+def file(*args, **flags):
+    """Only new=True is supported, it empties the scene"""
+
+    if not flag(flags, "new", "n"):
+        raise RuntimeError("The in-memory scene can only make new scenes")
+
+    scene.reset()
+    scene.sceneMessage(memoryScene.AFTER_NEW)
+
+    return "untitled"
+
+def undoInfo(*args, **flags):
+    """Keeps the state of the undo queue and the chunks open, nothing is recorded"""
+
+    if flag(flags, "query", "q"):
+        if flag(flags, "undoName", "un"):
+            return ""
+        return scene.undoState
+
+    if flag(flags, "openChunk", "ock"):
+        scene.chunks.append(flag(flags, "chunkName", "cn", ""))
+    if flag(flags, "closeChunk", "cck") and scene.chunks:
+        scene.chunks.pop()
+
+    for longName, shortName in (("state", "st"), ("stateWithoutFlush", "swf")):
+        value = flag(flags, longName, shortName)
+        if value is not None:
+            scene.undoState = bool(value)
+
+def undo(*args, **flags):
+    raise RuntimeError("The in-memory scene doesn't record undo")
+
+def loadPlugin(*args, **flags):
+    raise RuntimeError("The in-memory scene can't load plugins")
+
+def warning(*args, **flags):
+    scene.warnings.append(" ".join(str(arg) for arg in args))
+
+def evalDeferred(*args, **flags):
+    """Queues a function, scene.runDeferred() runs them"""
+
+    scene.deferred.append(args[0])
+
+def scriptJob(*args, **flags):
+    """Keeps the jobs so they can be queried and killed, they are never run"""
+
+    job = flag(flags, "exists", "ex")
+    if job is not None:
+        return job in scene.jobs
+
+    job = flag(flags, "kill", "k")
+    if job is not None:
+        scene.jobs.pop(job, None)
+        return None
+
+    jobId = len(scene.jobs) + 1
+    while jobId in scene.jobs:
+        jobId += 1
+    scene.jobs[jobId] = flags
+    return jobId
+
+def currentTime(*args, **flags):
+    if flag(flags, "query", "q"):
+        return scene.time
+    scene.time = float(args[0])
+    return args[0]
+
+def dgeval(*args, **flags):
+    """The graph is not evaluated"""
+
+# ---------------------------------------- Nodes ----------------------------------------
+
+def ls(*args, **flags):
+    """Lists nodes by name, UUID, selection or type"""
+
+    longName = flag(flags, "long", "l", False)
+    nodeTypes = flag(flags, "type", "typ")
+    if isinstance(nodeTypes, STRING_TYPES):
+        nodeTypes = [nodeTypes]
+
+    # Like Maya, an empty list is the same as no list: it returns the whole scene (or the selection)
+    names = flatten(args)
+
+    if flag(flags, "selection", "sl"):
+        candidates = list(scene.selection)
+        if names:
+            selected = set(scene.selection)
+            candidates = [node for node in getNodesIfExist(names) if node in selected]
+    elif names:
+        candidates = []
+        for name in names:
+            components = listComponents(name, flag(flags, "flatten", "fl", False))
+            if components is not None:
+                candidates.extend(components)
+            else:
+                candidates.extend(getNodesIfExist([name]))
+    else:
+        candidates = list(scene.nodes.values())
+
+    result = []
+    seen = set()
+    for candidate in candidates:
+        if isinstance(candidate, STRING_TYPES):
+            result.append(candidate)
+            continue
+        if candidate in seen:
+            continue
+        seen.add(candidate)
+
+        if flag(flags, "transforms", "tr") and not candidate.isTransform:
+            continue
+        if nodeTypes and not matchesType(candidate, nodeTypes):
+            continue
+
+        result.append(candidate)
+
+    if flag(flags, "uuid", "uid"):
+        return [item.uuid for item in result if not isinstance(item, STRING_TYPES)]
+
+    return [item if isinstance(item, STRING_TYPES) else nodeName(item, longName) for item in result]
+
+def getNodesIfExist(names):
+    """Returns the nodes of the names that exist, wildcards are matched against every node"""
+
+    nodes = []
+    for name in names:
+        if "*" in name and "[" not in name:
+            # A pattern like *.attribute lists the nodes that have the attribute
+            name, _, attribute = name.partition(".")
+            pattern = re.compile("^" + re.escape(name).replace("\\*", ".*") + "$")
+            nodes.extend(node for node in scene.nodes.values() if pattern.match(node.name) and
+                         (not attribute or scene.attributeExists(node, attribute)))
+            continue
+
+        # A component or a plug lists its node
+        node = scene.find(name.split(".")[0])
+        if node is not None:
+            nodes.append(node)
+    return nodes
+
+def listComponents(name, flat):
+    """Returns the components of a name like node.ep[*], or None if it is not a component"""
+
+    match = COMPONENT_PATTERN.match(name)
+    if not match:
+        return None
+
+    node, component, index = match.groups()
+    node = scene.find(node)
+    if node is None:
+        return []
+
+    if index != "*":
+        return [name]
+
+    count = componentCount(mainShape(node), component)
+    if not count:
+        return []
+    if not flat:
+        return ["{}.{}[0:{}]".format(node.name, component, count - 1)]
+    return ["{}.{}[{}]".format(node.name, component, index) for index in range(count)]
+
+def matchesType(node, nodeTypes):
+    """Returns True if the node is of one of the types, every transform-like node is a transform"""
+
+    return node.type in nodeTypes or ("transform" in nodeTypes and node.isTransform)
+
+def objExists(name):
+    if not isinstance(name, STRING_TYPES):
+        return False
+
+    match = COMPONENT_PATTERN.match(name)
+    if match:
+        return scene.find(match.group(1)) is not None
+
+    if "." in name:
+        nodeName, attribute = name.split(".", 1)
+        node = scene.find(nodeName)
+        return node is not None and scene.attributeExists(node, attribute)
+
+    return scene.find(name) is not None
+
+def createNode(nodeType, **flags):
+    parent = flag(flags, "parent", "p")
+    parent = scene.get(parent) if parent else None
+
+    if nodeType in memoryScene.SHAPE_TYPES and parent is None:
+        parent = scene.createNode("transform")
+        node = scene.createNode(nodeType, memoryScene.shapeName(parent.name), parent)
+    else:
+        node = scene.createNode(nodeType, flag(flags, "name", "n"), parent)
+
+    if not flag(flags, "skipSelect", "ss", False):
+        scene.selection = [node]
+
+    return node.name
+
+def delete(*args, **flags):
+    nodes = nodesOrSelection([name for name in flatten(args) if not COMPONENT_PATTERN.match(name)])
+
+    if flag(flags, "constructionHistory", "ch"):
+        for node in nodes:
+            shapes = [node] if node.isShape else node.shapes()
+            for shape in shapes:
+                for history in scene.history(shape):
+                    if history.alive:
+                        scene.delete(history)
+        return
+
+    for node in nodes:
+        scene.delete(node)
+
+def rename(*args, **flags):
+    if len(args) == 1:
+        node, newName = scene.selection[0], args[0]
+    else:
+        node, newName = scene.get(args[0]), args[1]
+
+    newName = scene.rename(node, newName.split("|")[-1])
+
+    # Maya renames the shapes with the transform
+    if node.isTransform and not flag(flags, "ignoreShape", "is", False):
+        for shape in node.shapes(intermediate=False):
+            scene.rename(shape, memoryScene.shapeName(newName))
+
+    return newName
+
+def parent(*args, **flags):
+    """Parents nodes to the last one given, or to the world, keeping their world position"""
+
+    names = flatten(args)
+    world = flag(flags, "world", "w", False)
+
+    if world:
+        nodes, target = getNodes(names) or list(scene.selection), None
+    else:
+        nodes, target = getNodes(names[:-1]), scene.get(names[-1])
+
+    if flag(flags, "addObject", "add") or flag(flags, "shape", "s"):
+        raise RuntimeError("The in-memory scene doesn't support instances")
+
+    relative = flag(flags, "relative", "r", False)
+
+    for node in nodes:
+        if node.parent is not target:
+            scene.reparent(node, target, keepWorld=not relative)
+
+    return [node.name for node in nodes]
+
+def group(*args, **flags):
+    nodes = [] if flag(flags, "empty", "em") else nodesOrSelection(args)
+
+    parentNode = flag(flags, "parent", "p")
+    if parentNode:
+        parentNode = scene.get(parentNode)
+    elif nodes and not flag(flags, "world", "w"):
+        # The group goes under the parent of the objects if they all share it
+        parents = set(node.parent for node in nodes)
+        parentNode = nodes[0].parent if len(parents) == 1 else None
+
+    groupNode = scene.createNode("transform", flag(flags, "name", "n", "group1"), parentNode)
+
+    for node in nodes:
+        scene.reparent(node, groupNode)
+
+    scene.selection = [groupNode]
+
+    return groupNode.name
+
+def duplicate(*args, **flags):
+    nodes = nodesOrSelection(args)
+    name = flag(flags, "name", "n")
+
+    copies = []
+    for node in nodes:
+        copies.append(copyNode(node, node.parent, name or node.name).name)
+
+    scene.selection = [scene.get(copy) for copy in copies]
+
+    return copies
+
+def copyNode(node, parentNode, name):
+    """Copies a node, its attributes, its geometry and its children"""
+
+    copy = scene.createNode(node.type, name, parentNode)
+    copy.values = dict(node.values)
+    copy.dynamic = node.dynamic.copy()
+    if node.geometry is not None:
+        copy.geometry = memoryScene.copyGeometry(node.geometry)
+
+    for child in node.children:
+        childName = memoryScene.shapeName(copy.name) if child.isShape and not child.isIntermediate else child.name
+        copyNode(child, copy, childName)
+
+    return copy
+
+def listRelatives(*args, **flags):
+    nodes = nodesOrSelection(args)
+    nodeTypes = flag(flags, "type", "typ")
+    if isinstance(nodeTypes, STRING_TYPES):
+        nodeTypes = [nodeTypes]
+
+    related = []
+    for node in nodes:
+        if flag(flags, "parent", "p") or flag(flags, "allParents", "ap"):
+            related.extend([node.parent] if node.parent else [])
+        elif flag(flags, "allDescendents", "ad"):
+            related.extend(reversed(node.descendants()))
+        else:
+            related.extend(node.children)
+
+    if flag(flags, "shapes", "s"):
+        related = [node for node in related if node.isShape]
+    if flag(flags, "noIntermediate", "ni"):
+        related = [node for node in related if not node.isIntermediate]
+    if nodeTypes:
+        related = [node for node in related if matchesType(node, nodeTypes)]
+
+    # A parent is listed once, even if many children share it
+    unique = []
+    for node in related:
+        if node not in unique:
+            unique.append(node)
+
+    longName = flag(flags, "fullPath", "f", False)
+    return [nodeName(node, longName) for node in unique] or None
+
+def listConnections(*args, **flags):
+    """Lists the nodes (or plugs) connected to nodes or plugs"""
+
+    source = flag(flags, "source", "s", True)
+    destination = flag(flags, "destination", "d", True)
+    plugs = flag(flags, "plugs", "p", False)
+    shapes = flag(flags, "shapes", "sh", False)
+    longName = flag(flags, "fullNodeName", "fnn", False)
+    skipConversions = flag(flags, "skipConversionNodes", "scn", False)
+    nodeTypes = flag(flags, "type", "t")
+    if isinstance(nodeTypes, STRING_TYPES):
+        nodeTypes = [nodeTypes]
+
+    found = []
+    for name in flatten(args):
+        if "." in name:
+            node, attribute = splitPlug(name)
+        else:
+            node, attribute = scene.get(name), None
+
+        def matches(plugAttribute):
+            return attribute is None or plugAttribute == attribute or \
+                plugAttribute.startswith(attribute + "[") or plugAttribute.startswith(attribute + ".")
+
+        if source:
+            for targetAttribute, (sourceNode, sourceAttribute) in sorted(node.inputs.items()):
+                if matches(targetAttribute):
+                    # Go through the conversion to the node that feeds it
+                    if skipConversions and sourceNode.type == "unitConversion" and "input" in sourceNode.inputs:
+                        sourceNode, sourceAttribute = sourceNode.inputs["input"]
+                    found.append((sourceNode, sourceAttribute))
+        if destination:
+            for sourceAttribute, targetNode, targetAttribute in node.outputs:
+                if matches(sourceAttribute):
+                    if skipConversions and targetNode.type == "unitConversion":
+                        found.extend((outputNode, outputAttribute)
+                                     for attribute, outputNode, outputAttribute in targetNode.outputs)
+                        continue
+                    found.append((targetNode, targetAttribute))
+
+    result = []
+    for node, attribute in found:
+        if nodeTypes and not matchesType(node, nodeTypes):
+            continue
+
+        if plugs:
+            result.append("{}.{}".format(nodeName(node, longName), attribute))
+            continue
+
+        # Shapes are listed as their transform
+        if node.isShape and not shapes and node.parent is not None:
+            node = node.parent
+        result.append(nodeName(node, longName))
+
+    return result or None
+
+# ---------------------------------------- Attributes ----------------------------------------
+
+def connectAttr(sourcePlug, targetPlug, **flags):
+    sourceNode, sourceAttribute = splitPlug(sourcePlug)
+    targetNode, targetAttribute = splitPlug(targetPlug)
+
+    if flag(flags, "nextAvailable", "na"):
+        targetAttribute = "{}[{}]".format(targetAttribute, scene.nextFreeIndex(targetNode, targetAttribute))
+
+    # Like Maya, a number that is not an angle goes through a conversion from degrees to radians
+    if targetAttribute in ANGLE_ATTRIBUTES and not sourceAttribute.startswith("rotate") and \
+            sourceNode.type != "unitConversion":
+        conversion = scene.createNode("unitConversion")
+        conversion.values["conversionFactor"] = 0.017453292519943295
+        scene.connect(sourceNode, sourceAttribute, conversion, "input")
+        sourceNode, sourceAttribute = conversion, "output"
+
+    scene.connect(sourceNode, sourceAttribute, targetNode, targetAttribute, force=flag(flags, "force", "f", False))
+
+def disconnectAttr(sourcePlug, targetPlug, **flags):
+    sourceNode, sourceAttribute = splitPlug(sourcePlug)
+    targetNode, targetAttribute = splitPlug(targetPlug)
+
+    scene.disconnect(sourceNode, sourceAttribute, targetNode, targetAttribute)
+
+def getAttr(plug, **flags):
+    node, attribute = splitPlug(plug)
+    name, index, rest = memoryScene.splitIndex(attribute)
+
+    if flag(flags, "multiIndices", "mi"):
+        return scene.multiIndices(node, name) or None
+
+    if flag(flags, "size", "s"):
+        indices = scene.multiIndices(node, name)
+        settings = node.dynamic.get(name, {})
+        return len(indices) if indices or settings.get("multi") else 1
+
+    if index == "*":
+        values = [scene.getValue(node, "{}[{}]{}".format(name, element, rest))
+                  for element in scene.multiIndices(node, name)]
+        return values[0] if len(values) == 1 else (values or None)
+
+    if attribute in ("boundingBoxMin", "boundingBoxMax"):
+        box = scene.boundingBox([node], worldSpace=False)
+        return [tuple(box[:3]) if attribute == "boundingBoxMin" else tuple(box[3:])]
+
+    value = scene.getValue(node, attribute)
+
+    # Compound attributes come in a list, like [(1.0, 1.0, 1.0)]
+    if isinstance(value, tuple):
+        return [value]
+
+    return value
+
+def setAttr(plug, *values, **flags):
+    node, attribute = splitPlug(plug)
+
+    # Only changing how the attribute is shown (i.e. channelBox=True)
+    if not values:
+        return
+
+    if isConnected(node, attribute):
+        raise RuntimeError("The attribute '{}' is locked or connected and cannot be modified.".format(plug))
+
+    valueType = flag(flags, "type", "typ")
+    if valueType == "string":
+        value = values[0]
+    elif len(values) == 1:
+        value = values[0]
+    else:
+        value = tuple(float(item) for item in values)
+
+    scene.setValue(node, attribute, value)
+
+def addAttr(*args, **flags):
+    node = nodesOrSelection(args)[0]
+    name = flag(flags, "longName", "ln") or flag(flags, "shortName", "sn")
+
+    if scene.attributeExists(node, name):
+        raise RuntimeError("Found an attribute named {} on {}".format(name, node.name))
+
+    node.dynamic[name] = {"dataType": flag(flags, "dataType", "dt"), "attributeType": flag(flags, "attributeType", "at"),
+                          "multi": bool(flag(flags, "multi", "m", False)), "defaultValue": flag(flags, "defaultValue", "dv")}
+
+    scene.notify(node, memoryScene.ATTRIBUTE_ADDED, name)
+
+def deleteAttr(*args, **flags):
+    attribute = flag(flags, "attribute", "at")
+    if attribute:
+        node = scene.get(args[0])
+    else:
+        node, attribute = splitPlug(args[0])
+
+    if attribute not in node.dynamic:
+        raise RuntimeError("{}.{} is not a dynamic attribute".format(node.name, attribute))
+
+    scene.removeAttribute(node, attribute)
+
+def attributeQuery(attribute, **flags):
+    node = scene.get(flag(flags, "node", "n"))
+
+    if not flag(flags, "exists", "ex"):
+        raise RuntimeError("The in-memory scene only answers attributeQuery exists")
+
+    return scene.attributeExists(node, attribute)
+
+def removeMultiInstance(plug, **flags):
+    node, attribute = splitPlug(plug)
+    name, index, rest = memoryScene.splitIndex(attribute)
+
+    scene.removeElement(node, name, index)
+
+# ---------------------------------------- Transforms ----------------------------------------
+
+def xform(*args, **flags):
+    names = flatten(args)
+    worldSpace = flag(flags, "worldSpace", "ws", False)
+
+    if flag(flags, "query", "q"):
+        values = []
+
+        if flag(flags, "boundingBox", "bb"):
+            return scene.boundingBox(getNodes(names))
+
+        for name in names:
+            match = COMPONENT_PATTERN.match(name)
+            if match:
+                # Only the vertices of meshes are supported
+                shape = mainShape(scene.get(match.group(1)))
+                for point in scene.shapePoints(shape, worldSpace):
+                    values.extend(point)
+                continue
+
+            node = scene.get(name)
+            if flag(flags, "rotatePivot", "rp"):
+                values.extend(scene.worldPivot(node) if worldSpace else node.vector("rotatePivot"))
+            elif flag(flags, "translation", "t"):
+                values.extend(scene.worldMatrix(node)[3][:3] if worldSpace else node.vector("translate"))
+            else:
+                raise RuntimeError("The in-memory scene can't query that with xform")
+
+        return values
+
+    for node in getNodes(names):
+        if flag(flags, "centerPivots", "cp"):
+            centerPivot(node)
+
+        translation = flag(flags, "translation", "t")
+        if translation is not None:
+            if worldSpace:
+                current = scene.worldMatrix(node)[3][:3]
+                scene.moveWorld(node, [target - value for target, value in zip(translation, current)])
+            else:
+                node.values["translate"] = tuple(float(value) for value in translation)
+
+def centerPivot(node):
+    """Moves the pivots of a transform to the center of its bounding box, without moving it"""
+
+    box = scene.boundingBox([node])
+    center = [(box[axis] + box[axis + 3]) / 2.0 for axis in range(3)]
+    pivot = memoryScene.transformPoint(center, memoryScene.invertMatrix(scene.worldMatrix(node)))
+
+    # Maya compensates the pivots with their own translate, here the translate is changed
+    before = scene.localMatrix(node)
+    node.values["rotatePivot"] = pivot
+    node.values["scalePivot"] = pivot
+    after = scene.localMatrix(node)
+
+    translate = node.vector("translate")
+    node.values["translate"] = tuple(translate[axis] + before[3][axis] - after[3][axis] for axis in range(3))
+
+def move(*args, **flags):
+    values = [float(arg) for arg in args[:3]]
+    nodes = nodesOrSelection(args[3:])
+
+    for node in nodes:
+        if flag(flags, "relative", "r", False):
+            scene.moveWorld(node, values)
+            continue
+
+        if flag(flags, "rotatePivotRelative", "rpr", False):
+            current = scene.worldPivot(node)
+        else:
+            current = scene.worldMatrix(node)[3][:3]
+        scene.moveWorld(node, [target - value for target, value in zip(values, current)])
+
+def scale(*args, **flags):
+    values = [float(arg) for arg in args[:3]]
+
+    for node in nodesOrSelection(args[3:]):
+        if flag(flags, "relative", "r", False):
+            node.values["scale"] = tuple(current * value for current, value in zip(node.vector("scale"), values))
+        else:
+            node.values["scale"] = tuple(values)
+
+def makeIdentity(*args, **flags):
+    if not flag(flags, "apply", "a", False):
+        raise RuntimeError("The in-memory scene only supports makeIdentity with apply")
+
+    for node in nodesOrSelection(args):
+        scene.freeze(node)
+
+def exactWorldBoundingBox(*args, **flags):
+    return scene.boundingBox(nodesOrSelection(args))
+
+def align(*args, **flags):
+    """Aligns the bounding boxes of the objects, the last one stays put with alignToLead"""
+
+    nodes = nodesOrSelection(args)
+    if flag(flags, "alignToLead", "atl", False):
+        target = scene.boundingBox(nodes[-1:])
+        nodes = nodes[:-1]
+    else:
+        target = scene.boundingBox(nodes)
+
+    modes = [flag(flags, "xAxis", "x"), flag(flags, "yAxis", "y"), flag(flags, "zAxis", "z")]
+
+    def value(box, axis, mode):
+        if mode == "min":
+            return box[axis]
+        if mode == "max":
+            return box[axis + 3]
+        return (box[axis] + box[axis + 3]) / 2.0
+
+    for node in nodes:
+        box = scene.boundingBox([node])
+        delta = [value(target, axis, mode) - value(box, axis, mode) if mode else 0.0
+                 for axis, mode in enumerate(modes)]
+        scene.moveWorld(node, delta)
+
+def select(*args, **flags):
+    if flag(flags, "clear", "cl"):
+        scene.selection = []
+        return
+
+    nodes = getNodes(args)
+
+    if flag(flags, "add", "af"):
+        scene.selection.extend(node for node in nodes if node not in scene.selection)
+    elif flag(flags, "deselect", "d"):
+        scene.selection = [node for node in scene.selection if node not in nodes]
+    else:
+        scene.selection = nodes
+
+# ---------------------------------------- Geometry ----------------------------------------
+
+def spaceLocator(*args, **flags):
+    transform, shape = createDagNode("locator", flag(flags, "name", "n", "locator1"))
+
+    position = flag(flags, "position", "p")
+    if position:
+        shape.values["localPosition"] = tuple(float(value) for value in position)
+
+    return [transform.name]
+
+def circle(*args, **flags):
+    transform, shape = createDagNode("nurbsCurve", flag(flags, "name", "n", "nurbsCircle1"))
+
+    geometry = memoryScene.circleGeometry(flag(flags, "radius", "r", 1.0), flag(flags, "normal", "nr", (0, 0, 1)),
+                                          flag(flags, "sections", "s", 8), flag(flags, "degree", "d", 3))
+    center = flag(flags, "center", "c", (0, 0, 0))
+    geometry["cvs"] = [tuple(value + offset for value, offset in zip(cv, center)) for cv in geometry["cvs"]]
+    shape.geometry = geometry
+
+    return [transform.name] + makeHistory("makeNurbsCircle", "outputCurve", shape, "create", flags)
+
+def curve(*args, **flags):
+    points = [tuple(float(value) for value in point) for point in flag(flags, "point", "p")]
+    degree = flag(flags, "degree", "d", 3)
+    knots = flag(flags, "knot", "k")
+
+    if knots is None:
+        if flag(flags, "periodic", "per"):
+            knots = range(1 - degree, len(points))
+        else:
+            spans = len(points) - degree
+            knots = [0] * (degree - 1) + list(range(spans + 1)) + [spans] * (degree - 1)
+
+    transform, shape = createDagNode("nurbsCurve", flag(flags, "name", "n", "curve1"))
+    shape.geometry = {"cvs": points, "knots": [float(knot) for knot in knots], "degree": degree,
+                      "form": "periodic" if flag(flags, "periodic", "per") else "open"}
+
+    return transform.name
+
+def arclen(*args, **flags):
+    return memoryScene.curveLength(mainShape(scene.get(flatten(args)[0])).geometry)
+
+def polyCube(*args, **flags):
+    transform, shape = createDagNode("mesh", flag(flags, "name", "n", "pCube1"))
+
+    divisions = (flag(flags, "subdivisionsX", "sx", 1), flag(flags, "subdivisionsY", "sy", 1),
+                 flag(flags, "subdivisionsZ", "sz", 1))
+    shape.geometry = memoryScene.boxGeometry(flag(flags, "width", "w", 1.0), flag(flags, "height", "h", 1.0),
+                                             flag(flags, "depth", "d", 1.0), divisions)
+
+    return [transform.name] + makeHistory("polyCube", "output", shape, "inMesh", flags)
+
+def makeHistory(nodeType, outputAttribute, shape, inputAttribute, flags):
+    """Creates the construction history node of a shape, returns its name in a list"""
+
+    if not flag(flags, "constructionHistory", "ch", True):
+        return []
+
+    history = scene.createNode(nodeType)
+    previous = shape.inputs.get(inputAttribute)
+    if previous:
+        scene.connect(previous[0], previous[1], history, "inputPolymesh")
+
+    scene.connect(history, outputAttribute, shape, inputAttribute, force=True)
+
+    return [history.name]
+
+def polyExtrudeFacet(*args, **flags):
+    """Extrudes every face on its own along its normal"""
+
+    faces = {}
+    for name in flatten(args):
+        match = COMPONENT_PATTERN.match(name)
+        if not match or match.group(2) != "f":
+            raise RuntimeError("polyExtrudeFacet needs faces, not {}".format(name))
+        shape = mainShape(scene.get(match.group(1)))
+        faces.setdefault(shape, []).append(int(match.group(3)))
+
+    history = []
+    for shape, faceIndices in faces.items():
+        memoryScene.extrudeFaces(shape.geometry, faceIndices, flag(flags, "thickness", "thk", 0.0),
+                                 flag(flags, "offset", "off", 0.0))
+        history.extend(makeHistory("polyExtrudeFace", "output", shape, "inMesh", flags))
+
+    return history
+
+def polyUnite(*args, **flags):
+    """Combines meshes into a new one, the old transforms are left empty"""
+
+    nodes = nodesOrSelection(args)
+    points, counts, connects = [], [], []
+
+    for node in nodes:
+        shape = mainShape(node)
+        offset = len(points)
+        points.extend(scene.shapePoints(shape))
+        counts.extend(shape.geometry["counts"])
+        connects.extend(vertex + offset for vertex in shape.geometry["connects"])
+
+    transform, newShape = createDagNode("mesh", flag(flags, "name", "n", "polySurface1"))
+    newShape.geometry = {"points": points, "counts": counts, "connects": connects, "u": [], "v": [],
+                         "uvCounts": [0] * len(counts), "uvIds": []}
+
+    for node in nodes:
+        for shape in (node.shapes() if node.alive else []):
+            scene.delete(shape)
+
+    return [transform.name] + makeHistory("polyUnite", "output", newShape, "inMesh", flags)
+
+def sets(*args, **flags):
+    """Shading groups are not modeled, the objects only have to exist"""
+
+    getNodes(args)
+
+def joint(*args, **flags):
+    """Joint orientation is not modeled, edit only checks the joint exists"""
+
+    if flag(flags, "edit", "e"):
+        getNodes(args)
+        return None
+
+    parentNode = scene.selection[0] if scene.selection and scene.selection[0].type == "joint" else None
+    node = scene.createNode("joint", flag(flags, "name", "n", "joint1"), parentNode)
+    node.values["translate"] = tuple(float(value) for value in flag(flags, "position", "p", (0, 0, 0)))
+    scene.selection = [node]
+
+    return node.name
+
+def ikHandle(*args, **flags):
+    startJoint = scene.get(flag(flags, "startJoint", "sj"))
+    endJoint = scene.get(flag(flags, "endEffector", "ee"))
+
+    # The effector sits on the end joint, under the joint before it
+    effector = scene.createNode("ikEffector", "effector1", endJoint.parent)
+    effector.values["translate"] = endJoint.vector("translate")
+
+    handle = scene.createNode("ikHandle", flag(flags, "name", "n", "ikHandle1"))
+    handle.values["translate"] = tuple(scene.worldMatrix(endJoint)[3][:3])
+
+    scene.connect(startJoint, "message", handle, "startJoint")
+    scene.connect(effector, "handlePath[0]", handle, "endEffector")
+    scene.connect(endJoint, "translate", effector, "translate")
+
+    scene.selection = [handle]
+
+    return [handle.name, effector.name]
+
+def constraint(constraintType, channels, args, flags):
+    """Creates a constraint under the last object, connected to the channels that are not skipped"""
+
+    nodes = nodesOrSelection(args)
+    targets, constrained = nodes[:-1], nodes[-1]
+
+    node = scene.createNode(constraintType, flag(flags, "name", "n", "{}_{}1".format(constrained.name, constraintType)),
+                            constrained)
+
+    for index, target in enumerate(targets):
+        scene.connect(target, "parentMatrix[0]", node, "target[{}].targetParentMatrix".format(index))
+        scene.connect(target, "translate", node, "target[{}].targetTranslate".format(index))
+        scene.connect(target, "rotate", node, "target[{}].targetRotate".format(index))
+
+    for channel, skipFlags in channels:
+        skipped = asAxes(flag(flags, *skipFlags))
+        for axis in "XYZ":
+            if axis.lower() not in skipped:
+                outputName = "constraint{}{}".format(channel[0].upper() + channel[1:], axis)
+                scene.connect(node, outputName, constrained, channel + axis)
+
+    return [node.name]
+
+def parentConstraint(*args, **flags):
+    return constraint("parentConstraint", [("translate", ("skipTranslate", "st")), ("rotate", ("skipRotate", "sr"))],
+                      args, flags)
+
+def orientConstraint(*args, **flags):
+    return constraint("orientConstraint", [("rotate", ("skip", "sk"))], args, flags)
+
+def expression(*args, **flags):
+    """Creates an expression node connected to the attributes it reads and sets"""
+
+    node = scene.createNode("expression", flag(flags, "name", "n", "expression1"))
+    text = flag(flags, "string", "s", "")
+    node.values["expression"] = text
+
+    inputs = itertools.count()
+    outputs = itertools.count()
+
+    for statement in text.split(";"):
+        if "=" not in statement:
+            continue
+        target, source = statement.split("=", 1)
+
+        for plug in EXPRESSION_PLUG.findall(target):
+            targetNode = scene.find(plug[0])
+            if targetNode is not None:
+                scene.connect(node, "output[{}]".format(next(outputs)), targetNode, plug[1])
+
+        for plug in EXPRESSION_PLUG.findall(source):
+            sourceNode = scene.find(plug[0])
+            if sourceNode is not None:
+                scene.connect(sourceNode, plug[1], node, "input[{}]".format(next(inputs)))
+
+    return node.name
+
+def wire(*args, **flags):
+    """Creates a wire deformer, its base wire and the original shapes, the geometry is not deformed"""
+
+    curveNode = scene.get(flag(flags, "wire", "w"))
+    curveShape = mainShape(curveNode)
+    wireNode = scene.createNode("wire", flag(flags, "name", "n", "wire1"))
+
+    # The base wire is a copy of the curve that stays at its rest position
+    baseWire = scene.createNode("transform", "{}BaseWire".format(curveNode.name))
+    scene.setWorldMatrix(baseWire, scene.worldMatrix(curveNode))
+    baseShape = scene.createNode("nurbsCurve", "{}BaseWireShape".format(curveNode.name), baseWire)
+    baseShape.geometry = memoryScene.copyGeometry(curveShape.geometry)
+
+    scene.connect(curveShape, "worldSpace[0]", wireNode, "deformedWire[0]")
+    scene.connect(baseShape, "worldSpace[0]", wireNode, "baseWire[0]")
+
+    for index, geometry in enumerate(getNodes(args)):
+        shape = mainShape(geometry)
+
+        # The deformer reads an intermediate copy of the shape
+        original = scene.createNode(shape.type, "{}Orig".format(shape.name), shape.parent)
+        original.geometry = memoryScene.copyGeometry(shape.geometry)
+        original.values["intermediateObject"] = True
+
+        scene.connect(original, "worldMesh[0]", wireNode, "input[{}].inputGeometry".format(index))
+        scene.connect(wireNode, "outputGeometry[{}]".format(index), shape, "inMesh", force=True)
+
+    return [wireNode.name]
+
+def pointCurveConstraint(*args, **flags):
+    """Adds a locator on an edit point that drives it through a pointCurveConstraint node"""
+
+    match = COMPONENT_PATTERN.match(flatten(args)[0])
+    if not match or match.group(2) != "ep":
+        raise RuntimeError("pointCurveConstraint needs an edit point")
+
+    curveNode = scene.get(match.group(1))
+    shape = mainShape(curveNode)
+
+    parameter = memoryScene.editPointParameters(shape.geometry)[int(match.group(3))]
+    position = memoryScene.transformPoint(memoryScene.evaluateCurve(shape.geometry, parameter),
+                                          scene.worldMatrix(curveNode))
+
+    locator, locatorShape = createDagNode("locator", "locator1", select=False)
+    locator.values["translate"] = position
+
+    node = scene.createNode("pointCurveConstraint")
+    scene.connect(locatorShape, "worldPosition[0]", node, "pointConstraint[0].pointConstraintPosition")
+
+    # The constraint goes after the history the curve already has
+    previous = shape.inputs.get("create")
+    if previous:
+        scene.connect(previous[0], previous[1], node, "inputCurve")
+    scene.connect(node, "outputCurve", shape, "create", force=True)
+
+    scene.selection = [locator]
+
+    return [locator.name, node.name]
+
+# ---------------------------------------- Animation ----------------------------------------
+
+def pathAnimation(*args, **flags):
+    """Attaches an object to a curve with a motionPath node, snapshot places it on each frame
+
+    The uValue goes linearly from 0 on the start time to 1 on the end time, in fraction mode.
+    """
+
+    node = getNodes(args)[0]
+    curveShape = mainShape(scene.get(flag(flags, "curve", "c")))
+
+    motionPath = scene.createNode("motionPath")
+    motionPath.values.update({"fractionMode": flag(flags, "fractionMode", "fm", False),
+                              "follow": flag(flags, "follow", "f", False),
+                              "frontAxis": "xyz".index(flag(flags, "followAxis", "fa", "x")),
+                              "upAxis": "xyz".index(flag(flags, "upAxis", "ua", "y")),
+                              "worldUpVector": tuple(flag(flags, "worldUpVector", "wu", (0.0, 1.0, 0.0))),
+                              "inverseUp": flag(flags, "inverseUp", "iu", False),
+                              "inverseFront": flag(flags, "inverseFront", "if", False),
+                              "startTime": flag(flags, "startTimeU", "stu", 1.0),
+                              "endTime": flag(flags, "endTimeU", "etu", 2.0)})
+
+    uValue = scene.createNode("animCurveTL", "{}_uValue".format(motionPath.name))
+    scene.connect(uValue, "output", motionPath, "uValue")
+    scene.connect(curveShape, "worldSpace[0]", motionPath, "geometryPath")
+    scene.connect(motionPath, "allCoordinates", node, "translate")
+    scene.connect(motionPath, "rotate", node, "rotate")
+
+    return motionPath.name
+
+def keyTangent(*args, **flags):
+    """The animation curves of the stand-in are always linear"""
+
+    getNodes(args)
+
+def evaluateMotionPath(motionPath, time):
+    """Places the object of a motion path where it is on a frame"""
+
+    values = motionPath.values
+    if not values["fractionMode"] or not values["follow"]:
+        raise RuntimeError("The stand-in motion path only follows the curve in fraction mode")
+
+    curveShape = motionPath.inputs["geometryPath"][0]
+    geometry = memoryScene.copyGeometry(curveShape.geometry)
+    if curveShape.parent is not None:
+        matrix = scene.worldMatrix(curveShape.parent)
+        geometry["cvs"] = [memoryScene.transformPoint(cv, matrix) for cv in curveShape.geometry["cvs"]]
+
+    fraction = (time - values["startTime"]) / float(values["endTime"] - values["startTime"])
+    matrix = memoryScene.motionPathMatrix(geometry, fraction, values["frontAxis"], values["upAxis"],
+                                          values["worldUpVector"], values["inverseFront"], values["inverseUp"])
+
+    for attribute, target, targetAttribute in motionPath.outputs:
+        if attribute == "allCoordinates":
+            target.values["translate"] = tuple(matrix[3][:3])
+            target.values["rotate"] = memoryScene.decomposeMatrix(matrix)[1]
+
+def snapshot(*args, **flags):
+    """Copies an object on every frame of its motion path, the copies have their geometry in world space
+
+    The copies are made in a group called <name>Group. Only ch=False is supported.
+    """
+
+    node = getNodes(args)[0]
+    name = flag(flags, "name", "n", "snapshot")
+    if flag(flags, "constructionHistory", "ch", True):
+        raise RuntimeError("The stand-in snapshot doesn't make construction history")
+
+    motionPath = node.inputs.get("translate", (None,))[0]
+    shape = mainShape(node)
+
+    group = scene.createNode("transform", "{}Group".format(name))
+    start, end = flag(flags, "startTime", "st", 1), flag(flags, "endTime", "et", 1)
+    increment = flag(flags, "increment", "i", 1)
+
+    time = start
+    while time <= end:
+        if motionPath is not None:
+            evaluateMotionPath(motionPath, time)
+
+        copy = scene.createNode("transform", "{}1".format(name), group)
+        copyShape = scene.createNode("mesh", memoryScene.shapeName(copy.name), copy)
+        copyShape.geometry = memoryScene.copyGeometry(shape.geometry)
+        copyShape.geometry["points"] = scene.shapePoints(shape)
+
+        time += increment
+
+    return [group.name]
+
+# ---------------------------------------- UI ----------------------------------------
+
+# The short names of the UI flags the scripts use
+UI_FLAGS = {"q": "query", "e": "edit", "ex": "exists", "v": "value", "l": "label", "en": "enable", "tx": "text",
+            "sl": "select", "ann": "annotation", "c": "command", "cc": "changeCommand", "dc": "dragCommand",
+            "f": "field", "w": "width", "h": "height", "ai": "allItems", "a": "append", "ri": "removeItem",
+            "ra": "removeAll", "si": "selectItem", "pr": "progress", "t": "title", "m": "message"}
+
+# The values the controls have before they are set
+UI_DEFAULTS = {"value": 0, "text": "", "select": False, "enable": True, "allItems": None, "selectItem": None,
+               "progress": 0}
+
+def uiCommand(controlType, defaults=None):
+    """Returns a command that creates, edits and queries a type of control
+
+    Parameters
+    ----------
+    controlType : str
+        The name of the command (i.e. intSliderGrp)
+    defaults : dict
+        The values of this type of control that are different from UI_DEFAULTS
+    """
+
+    controlDefaults = dict(UI_DEFAULTS)
+    controlDefaults.update(defaults or {})
+
+    def command(*args, **flags):
+        flags = dict((UI_FLAGS.get(key, key), value) for key, value in flags.items())
+        name = args[0] if args else None
+
+        if flags.pop("exists", False):
+            return name in scene.ui
+
+        if flags.pop("query", False):
+            if name not in scene.ui:
+                raise RuntimeError("{}: Object '{}' not found.".format(controlType, name))
+            key = list(flags)[0]
+            return scene.ui[name].get(key, controlDefaults.get(key))
+
+        if flags.pop("edit", False):
+            if name not in scene.ui:
+                raise RuntimeError("{}: Object '{}' not found.".format(controlType, name))
+            editControl(scene.ui[name], flags)
+            return None
+
+        if name is None:
+            name = "{}{}".format(controlType, next(uiCommand.counter))
+
+        scene.ui[name] = {"type": controlType}
+        editControl(scene.ui[name], flags)
+        return name
+
+    command.__name__ = controlType
+    return command
+
+# Numbers the controls created without a name
+uiCommand.counter = itertools.count(1)
+
+def editControl(control, flags):
+    """Changes the values of a control, the lists of items are edited in place"""
+
+    items = control.get("allItems") or []
+
+    for value in flatten([flags.pop("append", [])]):
+        items.append(value)
+    for value in flatten([flags.pop("removeItem", [])]):
+        items.remove(value)
+    if flags.pop("removeAll", False):
+        items = []
+
+    control["allItems"] = items or None
+    control.update(flags)
+
+def deleteUI(*args, **flags):
+    for name in flatten(args):
+        scene.ui.pop(name, None)
+
+def windowPref(*args, **flags):
+    if flag(flags, "exists", "ex"):
+        return False
+
+def setParent(*args, **flags):
+    return ".."
+
+def showWindow(*args, **flags):
+    pass
+
+def confirmDialog(*args, **flags):
+    """Keeps the message with the warnings and answers with the default button"""
+
+    scene.warnings.append(flag(flags, "message", "m", ""))
+    return flag(flags, "defaultButton", "db", "Confirm")
+
+def fileDialog2(*args, **flags):
+    return None
+
+window = uiCommand("window")
+columnLayout = uiCommand("columnLayout")
+rowLayout = uiCommand("rowLayout")
+gridLayout = uiCommand("gridLayout")
+frameLayout = uiCommand("frameLayout")
+tabLayout = uiCommand("tabLayout")
+formLayout = uiCommand("formLayout")
+rowColumnLayout = uiCommand("rowColumnLayout")
+scrollLayout = uiCommand("scrollLayout")
+layout = uiCommand("layout")
+text = uiCommand("text")
+separator = uiCommand("separator")
+button = uiCommand("button")
+iconTextButton = uiCommand("iconTextButton")
+intSliderGrp = uiCommand("intSliderGrp")
+floatSliderGrp = uiCommand("floatSliderGrp")
+checkBox = uiCommand("checkBox", {"value": False})
+radioCollection = uiCommand("radioCollection")
+radioButton = uiCommand("radioButton")
+optionMenuGrp = uiCommand("optionMenuGrp", {"select": 1})
+menu = uiCommand("menu")
+menuItem = uiCommand("menuItem")
+textFieldButtonGrp = uiCommand("textFieldButtonGrp")
+textScrollList = uiCommand("textScrollList")
+progressBar = uiCommand("progressBar")
+scrollField = uiCommand("scrollField")
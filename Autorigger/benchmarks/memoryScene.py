@@ -0,0 +1,1115 @@
+"""In-memory Maya scene.
+
+This script keeps a small model of a Maya scene in Python, so the rigging
+scripts can run outside of Maya through the stand-in maya.cmds and
+maya.api.OpenMaya of this folder. It tracks:
+    * Nodes, their type, name and UUID
+    * The DAG hierarchy and the transform of every DAG node
+    * Attributes, multi attributes (attr[3]) and dynamic attributes (addAttr)
+    * Connections between attributes
+    * The geometry of meshes and nurbs curves
+    * The callbacks registered with OpenMaya
+
+It is a stand-in to measure the rigging scripts, not a Maya replacement:
+    * Node names are unique in the whole scene, not only among siblings
+    * The dependency graph is not evaluated, connected attributes keep their
+      last value and deformers don't move the geometry
+    * Undo is not recorded
+
+Example:
+    import memoryScene
+    scene = memoryScene.scene
+    scene.reset()
+    transform = scene.createNode("transform", "myGroup")
+"""
+
+import bisect
+import collections
+import math
+import re
+import uuid
+
+# DAG nodes without geometry that have a transform
+TRANSFORM_TYPES = set(["transform", "joint", "ikHandle", "ikEffector", "parentConstraint", "orientConstraint",
+                       "pointConstraint", "clusterHandle"])
+
+# DAG nodes with geometry, they live under a transform
+SHAPE_TYPES = set(["mesh", "nurbsCurve", "locator"])
+
+# Attributes that hold 3 values, their components end in X, Y and Z
+VECTOR_ATTRIBUTES = {"translate": (0.0, 0.0, 0.0), "rotate": (0.0, 0.0, 0.0), "scale": (1.0, 1.0, 1.0),
+                     "rotatePivot": (0.0, 0.0, 0.0), "scalePivot": (0.0, 0.0, 0.0),
+                     "localPosition": (0.0, 0.0, 0.0), "localScale": (1.0, 1.0, 1.0)}
+
+# The values of the attributes that are not 0 by default
+DEFAULT_VALUES = {"visibility": True, "inheritsTransform": True}
+
+# Attributes every node has, used by attributeQuery
+NODE_ATTRIBUTES = set(["message", "nodeState", "caching", "frozen"])
+
+# Attributes every DAG node has, besides the vectors
+DAG_ATTRIBUTES = set(["visibility", "inheritsTransform", "rotateOrder", "intermediateObject", "overrideEnabled",
+                      "overrideRGBColors", "overrideColorR", "overrideColorG", "overrideColorB", "worldMatrix",
+                      "worldSpace", "boundingBoxMin", "boundingBoxMax"])
+
+# The component names that can follow a node name (i.e. pCube1.f[0])
+COMPONENTS = set(["vtx", "e", "f", "cv", "ep", "map"])
+
+# Splits a plug into the attribute and its index (i.e. rigManifest[3] -> rigManifest, 3)
+INDEX_PATTERN = re.compile(r"^(\w+)\[(\d+|\*)\](.*)$")
+
+# Splits a name into its prefix and its last digits
+SUFFIX_PATTERN = re.compile(r"^(.*?)(\d*)$")
+
+# ---------------------------------------- Matrices ----------------------------------------
+# 4x4 matrices as lists of rows. Like Maya, points are row vectors, so a point
+# is transformed as point * matrix and the translation is in the last row.
+
+def identityMatrix():
+    """Returns a new identity matrix"""
+
+    return [[1.0 if row == column else 0.0 for column in range(4)] for row in range(4)]
+
+def multiplyMatrices(first, second):
+    """Returns first * second"""
+
+    return [[sum(first[row][index] * second[index][column] for index in range(4)) for column in range(4)]
+            for row in range(4)]
+
+def translationMatrix(vector):
+    """Returns the matrix that moves a point by a vector"""
+
+    matrix = identityMatrix()
+    matrix[3][:3] = [float(value) for value in vector]
+    return matrix
+
+def scaleMatrix(vector):
+    """Returns the matrix that scales a point on each axis"""
+
+    matrix = identityMatrix()
+    for axis in range(3):
+        matrix[axis][axis] = float(vector[axis])
+    return matrix
+
+def rotationMatrix(degrees):
+    """Returns the matrix of an XYZ euler rotation, X is applied first"""
+
+    cx, cy, cz = [math.cos(math.radians(value)) for value in degrees]
+    sx, sy, sz = [math.sin(math.radians(value)) for value in degrees]
+
+    rotateX = [[1, 0, 0, 0], [0, cx, sx, 0], [0, -sx, cx, 0], [0, 0, 0, 1]]
+    rotateY = [[cy, 0, -sy, 0], [0, 1, 0, 0], [sy, 0, cy, 0], [0, 0, 0, 1]]
+    rotateZ = [[cz, sz, 0, 0], [-sz, cz, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
+
+    return multiplyMatrices(multiplyMatrices(rotateX, rotateY), rotateZ)
+
+def invertMatrix(matrix):
+    """Returns the inverse of a matrix, using Gauss-Jordan elimination"""
+
+    rows = [list(row) + [1.0 if row_ == column else 0.0 for column in range(4)] for row_, row in enumerate(matrix)]
+
+    for column in range(4):
+        pivot = max(range(column, 4), key=lambda row: abs(rows[row][column]))
+        if abs(rows[pivot][column]) < 1e-12:
+            raise RuntimeError("The matrix can't be inverted")
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+
+        factor = rows[column][column]
+        rows[column] = [value / factor for value in rows[column]]
+
+        for row in range(4):
+            if row != column and rows[row][column]:
+                factor = rows[row][column]
+                rows[row] = [value - factor * pivotValue for value, pivotValue in zip(rows[row], rows[column])]
+
+    return [row[4:] for row in rows]
+
+def transformPoint(point, matrix):
+    """Returns a point transformed by a matrix"""
+
+    return tuple(sum(point[index] * matrix[index][column] for index in range(3)) + matrix[3][column]
+                 for column in range(3))
+
+def decomposeMatrix(matrix):
+    """Splits a matrix into scale and XYZ euler rotation, shear is ignored
+
+    Returns
+    -------
+    tuple
+        The (x, y, z) scale and the (x, y, z) rotation in degrees
+    """
+
+    scale = [math.sqrt(sum(value * value for value in matrix[axis][:3])) or 1.0 for axis in range(3)]
+    rows = [[value / scale[axis] for value in matrix[axis][:3]] for axis in range(3)]
+
+    sinY = max(-1.0, min(1.0, -rows[0][2]))
+    rotateY = math.asin(sinY)
+
+    if abs(math.cos(rotateY)) > 1e-9:
+        rotateX = math.atan2(rows[1][2], rows[2][2])
+        rotateZ = math.atan2(rows[0][1], rows[0][0])
+    else:
+        # Gimbal lock, the Z rotation is given to X
+        rotateX = math.atan2(-rows[2][1], rows[1][1])
+        rotateZ = 0.0
+
+    return tuple(scale), tuple(math.degrees(value) for value in (rotateX, rotateY, rotateZ))
+
+# ---------------------------------------- Curves ----------------------------------------
+
+def evaluateCurve(geometry, parameter):
+    """Returns the point of a nurbs curve at a parameter, with de Boor's algorithm
+
+    Parameters
+    ----------
+    geometry : dict
+        The cvs, knots (as Maya stores them) and degree of the curve
+    parameter : float
+        The parameter to evaluate
+    """
+
+    cvs, degree = geometry["cvs"], geometry["degree"]
+
+    # Maya leaves out the first and last knots
+    knots = [geometry["knots"][0]] + list(geometry["knots"]) + [geometry["knots"][-1]]
+
+    span = degree
+    while span < len(cvs) - 1 and knots[span + 1] <= parameter:
+        span += 1
+
+    points = [list(cvs[span - degree + index]) for index in range(degree + 1)]
+
+    for level in range(1, degree + 1):
+        for index in range(degree, level - 1, -1):
+            knot = span - degree + index
+            left, right = knots[knot], knots[knot + degree - level + 1]
+            alpha = (parameter - left) / (right - left) if right != left else 0.0
+            points[index] = [(1.0 - alpha) * previous + alpha * current
+                             for previous, current in zip(points[index - 1], points[index])]
+
+    return tuple(points[degree])
+
+def editPointParameters(geometry):
+    """Returns the parameter of every edit point of a nurbs curve"""
+
+    degree = geometry["degree"]
+    spans = len(geometry["cvs"]) - degree
+    knots = geometry["knots"]
+
+    # The spans go between the knots degree-1 and degree-1+spans of Maya's knot vector
+    parameters = [knots[degree - 1 + index] for index in range(spans + 1)]
+
+    # The last edit point of a periodic curve is the first one
+    if geometry["form"] == "periodic":
+        parameters = parameters[:-1]
+
+    return parameters
+
+def curveLength(geometry, samplesPerSpan=16):
+    """Returns the length of a nurbs curve measured with a polyline"""
+
+    degree = geometry["degree"]
+    knots = geometry["knots"]
+    start, end = knots[degree - 1], knots[len(geometry["cvs"]) - 1]
+    samples = samplesPerSpan * (len(geometry["cvs"]) - degree)
+
+    points = [evaluateCurve(geometry, start + (end - start) * index / float(samples)) for index in range(samples + 1)]
+
+    return sum(math.sqrt(sum((a - b) ** 2 for a, b in zip(first, second)))
+               for first, second in zip(points[:-1], points[1:]))
+
+def parameterAtFraction(geometry, fraction, samplesPerSpan=64):
+    """Returns the parameter at a fraction of the length of a nurbs curve, like a motion path in fraction mode"""
+
+    degree = geometry["degree"]
+    knots = geometry["knots"]
+    start, end = knots[degree - 1], knots[len(geometry["cvs"]) - 1]
+    samples = samplesPerSpan * (len(geometry["cvs"]) - degree)
+
+    parameters = [start + (end - start) * index / float(samples) for index in range(samples + 1)]
+    points = [evaluateCurve(geometry, parameter) for parameter in parameters]
+
+    lengths = [0.0]
+    for first, second in zip(points[:-1], points[1:]):
+        lengths.append(lengths[-1] + math.sqrt(sum((a - b) ** 2 for a, b in zip(first, second))))
+
+    # Find the segment where the length is and interpolate the parameter in it
+    target = max(0.0, min(1.0, fraction)) * lengths[-1]
+    segment = max(1, min(bisect.bisect_left(lengths, target), samples))
+    segmentLength = lengths[segment] - lengths[segment - 1]
+    blend = (target - lengths[segment - 1]) / segmentLength if segmentLength else 0.0
+
+    return parameters[segment - 1] + (parameters[segment] - parameters[segment - 1]) * blend
+
+def curveTangent(geometry, parameter, step=1e-4):
+    """Returns the unit tangent of a nurbs curve at a parameter, measured with a central difference"""
+
+    degree = geometry["degree"]
+    start, end = geometry["knots"][degree - 1], geometry["knots"][len(geometry["cvs"]) - 1]
+
+    before = evaluateCurve(geometry, max(start, parameter - step))
+    after = evaluateCurve(geometry, min(end, parameter + step))
+    direction = [b - a for a, b in zip(before, after)]
+    length = math.sqrt(sum(value * value for value in direction)) or 1.0
+
+    return tuple(value / length for value in direction)
+
+def motionPathMatrix(geometry, fraction, frontAxis=2, upAxis=1, worldUp=(0.0, 1.0, 0.0), inverseFront=False,
+                     inverseUp=False):
+    """Returns the matrix a following motion path in fraction mode gives to its object
+
+    The front axis follows the tangent of the curve and the up axis points as close
+    as possible to the world up vector, the third axis completes them.
+
+    Parameters
+    ----------
+    geometry : dict
+        The curve, with its cvs in world space
+    fraction : float
+        The fraction of the curve length
+    frontAxis, upAxis : int
+        The index of the axes of the object (0 for X, 1 for Y, 2 for Z)
+    """
+
+    parameter = parameterAtFraction(geometry, fraction)
+    front = list(curveTangent(geometry, parameter))
+    if inverseFront:
+        front = [-value for value in front]
+
+    along = sum(a * b for a, b in zip(front, worldUp))
+    up = [value - along * direction for value, direction in zip(worldUp, front)]
+    length = math.sqrt(sum(value * value for value in up)) or 1.0
+    up = [value / length for value in up]
+    if inverseUp:
+        up = [-value for value in up]
+
+    # The rows of the matrix are the axes of the object, X = Y x Z, Y = Z x X and Z = X x Y
+    rows = [None, None, None]
+    rows[frontAxis], rows[upAxis] = front, up
+    otherAxis = 3 - frontAxis - upAxis
+    rows[otherAxis] = list(crossProduct(rows[(otherAxis + 1) % 3], rows[(otherAxis + 2) % 3]))
+
+    return [row + [0.0] for row in rows] + [list(evaluateCurve(geometry, parameter)) + [1.0]]
+
+def circleGeometry(radius, normal, sections, degree=3):
+    """Returns a periodic nurbs circle, its curve passes through the radius at every edit point
+
+    Parameters
+    ----------
+    radius : float
+        The radius of the circle
+    normal : tuple
+        The axis the circle goes around
+    sections : int
+        The number of spans
+    degree : int
+        The degree of the curve, 1 or 3
+    """
+
+    length = math.sqrt(sum(value * value for value in normal)) or 1.0
+    normal = [value / length for value in normal]
+
+    # Two axes perpendicular to the normal
+    helper = (0.0, 0.0, 1.0) if abs(normal[2]) < 0.9 else (1.0, 0.0, 0.0)
+    first = crossProduct(normal, helper)
+    firstLength = math.sqrt(sum(value * value for value in first))
+    first = [value / firstLength for value in first]
+    second = crossProduct(normal, first)
+
+    # A cubic curve passes through (P[i-1] + 4P[i] + P[i+1]) / 6, so the CVs are pushed out
+    angle = 2.0 * math.pi / sections
+    cvRadius = radius if degree == 1 else radius * 6.0 / (4.0 + 2.0 * math.cos(angle))
+
+    cvs = [tuple(cvRadius * (math.cos(angle * index) * a + math.sin(angle * index) * b) for a, b in zip(first, second))
+           for index in range(sections)]
+
+    # Periodic curves repeat their first degree CVs
+    return {"cvs": cvs + cvs[:degree], "knots": [float(knot) for knot in range(1 - degree, sections + degree)],
+            "degree": degree, "form": "periodic"}
+
+def crossProduct(first, second):
+    """Returns the cross product of two vectors"""
+
+    return (first[1] * second[2] - first[2] * second[1],
+            first[2] * second[0] - first[0] * second[2],
+            first[0] * second[1] - first[1] * second[0])
+
+# ---------------------------------------- Meshes ----------------------------------------
+
+def boxGeometry(width, height, depth, divisions=(1, 1, 1)):
+    """Returns a box mesh centered at the origin, with subdivided faces
+
+    Parameters
+    ----------
+    width, height, depth : float
+        The size of the box on X, Y and Z
+    divisions : tuple
+        The number of faces along X, Y and Z
+    """
+
+    size = (float(width), float(height), float(depth))
+    points = []
+    pointIndices = {}
+    counts = []
+    connects = []
+
+    def pointIndex(point):
+        # Every side makes its own grid, the shared edges use the same vertices
+        key = tuple(round(value, 9) for value in point)
+        if key not in pointIndices:
+            pointIndices[key] = len(points)
+            points.append(point)
+        return pointIndices[key]
+
+    # Each side is (normal axis, direction, first axis, second axis), ordered so the faces look outwards
+    sides = [(2, 1, 0, 1), (1, 1, 0, 2), (2, -1, 0, 1), (1, -1, 0, 2), (0, 1, 2, 1), (0, -1, 2, 1)]
+
+    for normalAxis, direction, firstAxis, secondAxis in sides:
+        firstCount, secondCount = divisions[firstAxis], divisions[secondAxis]
+
+        for second in range(secondCount):
+            for first in range(firstCount):
+                corners = []
+                for firstStep, secondStep in ((0, 0), (1, 0), (1, 1), (0, 1)):
+                    point = [0.0, 0.0, 0.0]
+                    point[normalAxis] = direction * size[normalAxis] / 2.0
+                    point[firstAxis] = size[firstAxis] * ((first + firstStep) / float(firstCount) - 0.5)
+                    point[secondAxis] = size[secondAxis] * ((second + secondStep) / float(secondCount) - 0.5)
+                    corners.append(pointIndex(tuple(point)))
+
+                # Flip the faces that would look inwards
+                if (direction > 0) != ((normalAxis, firstAxis, secondAxis) in ((2, 0, 1), (0, 2, 1), (1, 2, 0))):
+                    corners.reverse()
+
+                counts.append(4)
+                connects.extend(corners)
+
+    return {"points": points, "counts": counts, "connects": connects, "u": [], "v": [], "uvCounts": [0] * len(counts),
+            "uvIds": []}
+
+def faceVertices(geometry):
+    """Returns the vertices of every face of a mesh"""
+
+    faces = []
+    offset = 0
+    for count in geometry["counts"]:
+        faces.append(list(geometry["connects"][offset:offset + count]))
+        offset += count
+    return faces
+
+def extrudeFaces(geometry, faceIndices, thickness, offset=0.0):
+    """Extrudes some faces of a mesh along their normal, each face on its own
+
+    Parameters
+    ----------
+    geometry : dict
+        The mesh, it is changed in place
+    faceIndices : list
+        The faces to extrude
+    thickness : float
+        The distance the faces move
+    offset : float
+        The distance the new faces shrink towards their center
+    """
+
+    points = list(geometry["points"])
+    faces = faceVertices(geometry)
+
+    for faceIndex in faceIndices:
+        face = faces[faceIndex]
+        corners = [points[vertex] for vertex in face]
+
+        # Newell's normal works for any polygon
+        normal = [0.0, 0.0, 0.0]
+        for current, following in zip(corners, corners[1:] + corners[:1]):
+            normal[0] += (current[1] - following[1]) * (current[2] + following[2])
+            normal[1] += (current[2] - following[2]) * (current[0] + following[0])
+            normal[2] += (current[0] - following[0]) * (current[1] + following[1])
+        length = math.sqrt(sum(value * value for value in normal)) or 1.0
+        normal = [value / length for value in normal]
+        center = [sum(corner[axis] for corner in corners) / len(corners) for axis in range(3)]
+
+        newFace = []
+        for corner in corners:
+            toCenter = [c - p for c, p in zip(center, corner)]
+            distance = math.sqrt(sum(value * value for value in toCenter)) or 1.0
+            shrink = min(offset / distance, 1.0)
+            newFace.append(len(points))
+            points.append(tuple(p + n * thickness + t * shrink for p, n, t in zip(corner, normal, toCenter)))
+
+        # The sides join the old border to the new one
+        for index in range(len(face)):
+            following = (index + 1) % len(face)
+            faces.append([face[index], face[following], newFace[following], newFace[index]])
+
+        faces[faceIndex] = newFace
+
+    geometry["points"] = points
+    geometry["counts"] = [len(face) for face in faces]
+    geometry["connects"] = [vertex for face in faces for vertex in face]
+    geometry["uvCounts"] = [0] * len(faces)
+    geometry["uvIds"] = []
+
+def copyGeometry(geometry):
+    """Returns a copy of the geometry of a mesh or a curve"""
+
+    return dict((key, list(value) if isinstance(value, list) else value) for key, value in geometry.items())
+
+# ---------------------------------------- Scene ----------------------------------------
+
+class Node(object):
+    """A node of the scene
+
+    Attributes
+    ----------
+    type : str
+        The node type (i.e. transform, mesh, network)
+    name : str
+        The short name of the node, unique in the scene
+    uuid : str
+        The UUID of the node, it doesn't change when it is renamed
+    parent : Node
+        The parent of a DAG node, None on the world
+    children : list
+        The DAG children, in order
+    values : dict
+        The value of every attribute that was set, elements of multi attributes are saved as attr[index]
+    dynamic : dict
+        The attributes added with addAttr and their settings
+    inputs : dict
+        The (node, attribute) connected to each attribute of this node
+    outputs : list
+        (attribute, node, attribute) for every connection that goes out of this node
+    geometry : dict
+        The points and faces of a mesh or the CVs and knots of a curve
+    alive : bool
+        False once the node is deleted
+    """
+
+    def __init__(self, nodeType, name):
+        self.type = nodeType
+        self.name = name
+        self.uuid = str(uuid.uuid4()).upper()
+        self.parent = None
+        self.children = []
+        self.values = {}
+        self.dynamic = collections.OrderedDict()
+        self.inputs = {}
+        self.outputs = []
+        self.geometry = None
+        self.alive = True
+
+    def __repr__(self):
+        return "Node({}, {})".format(self.type, self.name)
+
+    @property
+    def isDag(self):
+        return self.type in TRANSFORM_TYPES or self.type in SHAPE_TYPES
+
+    @property
+    def isShape(self):
+        return self.type in SHAPE_TYPES
+
+    @property
+    def isTransform(self):
+        return self.type in TRANSFORM_TYPES
+
+    @property
+    def isIntermediate(self):
+        return bool(self.values.get("intermediateObject", False))
+
+    def shapes(self, intermediate=True):
+        """Returns the shapes under this node"""
+
+        return [child for child in self.children if child.isShape and (intermediate or not child.isIntermediate)]
+
+    def descendants(self):
+        """Returns every DAG node under this node, depth first"""
+
+        nodes = []
+        for child in self.children:
+            nodes.append(child)
+            nodes.extend(child.descendants())
+        return nodes
+
+    def vector(self, attribute):
+        """Returns the value of a vector attribute as a tuple"""
+
+        return tuple(self.values.get(attribute, VECTOR_ATTRIBUTES[attribute]))
+
+class Scene(object):
+    """The nodes of the scene and the callbacks registered on them
+
+    Attributes
+    ----------
+    nodes : OrderedDict
+        The nodes by name, in the order they were created
+    selection : list
+        The selected nodes, in order
+    undoState : bool
+        True if commands would be recorded in the undo queue
+    chunks : list
+        The names of the undo chunks open
+    deferred : list
+        The functions queued with evalDeferred
+    warnings : list
+        The messages given to cmds.warning
+    """
+
+    def __init__(self):
+        self.callbackIds = 0
+        self.sceneCallbacks = {}
+        self.eventCallbacks = {}
+        self.nodeAddedCallbacks = {}
+        self.reset()
+
+    def reset(self):
+        """Empties the scene, the scene and event callbacks are kept"""
+
+        self.nodes = collections.OrderedDict()
+        self.uuids = {}
+        self.selection = []
+        self.undoState = True
+        self.chunks = []
+        self.deferred = []
+        self.warnings = []
+        self.time = 1.0
+        self.jobs = {}
+        self.ui = {}
+        self.uiParents = []
+        self.attributeCallbacks = {}
+        self.nameCallbacks = {}
+        self.removalCallbacks = {}
+
+    # ---------------------------------------- Names ----------------------------------------
+
+    def uniqueName(self, name):
+        """Returns the name, or the name with the next free number if it is used"""
+
+        if name not in self.nodes:
+            return name
+
+        prefix, digits = SUFFIX_PATTERN.match(name).groups()
+        number = int(digits) + 1 if digits else 1
+        while "{}{}".format(prefix, number) in self.nodes:
+            number += 1
+
+        return "{}{}".format(prefix, number)
+
+    def find(self, name):
+        """Returns the node with a name, a long name or a UUID, or None"""
+
+        if not isinstance(name, str) and not isinstance(name, type(u"")):
+            return None
+
+        name = str(name)
+        node = self.nodes.get(name.split("|")[-1]) or self.uuids.get(name)
+
+        # A long name must match the hierarchy too
+        if node and name.startswith("|") and self.longName(node) != name:
+            return None
+
+        return node
+
+    def get(self, name):
+        """Returns the node with a name, raises ValueError like cmds if it doesn't exist"""
+
+        node = self.find(name)
+        if node is None:
+            raise ValueError("No object matches name: {}".format(name))
+        return node
+
+    def longName(self, node):
+        """Returns the full DAG path of a node, or its name if it is not a DAG node"""
+
+        if not node.isDag:
+            return node.name
+
+        names = []
+        while node:
+            names.append(node.name)
+            node = node.parent
+        return "|" + "|".join(reversed(names))
+
+    def createNode(self, nodeType, name=None, parent=None):
+        """Creates a node
+
+        Parameters
+        ----------
+        nodeType : str
+            The type of the node
+        name : str
+            The desired name, a number is added if it is used
+        parent : Node
+            The parent of a DAG node
+        """
+
+        node = Node(nodeType, self.uniqueName(name or "{}1".format(nodeType)))
+        self.addNode(node, parent)
+
+        return node
+
+    def addNode(self, node, parent=None):
+        """Puts a node made outside of the scene in it (i.e. by a modifier) and calls the node added callbacks"""
+
+        self.nodes[node.name] = node
+        self.uuids[node.uuid] = node
+
+        if parent is not None:
+            self.reparent(node, parent, keepWorld=False)
+
+        for callbackId, function, clientData in list(self.nodeAddedCallbacks.get("dependNode", [])):
+            function(node, clientData)
+
+    def rename(self, node, name):
+        """Renames a node, returns its new name"""
+
+        previousName = node.name
+        if name == previousName:
+            return name
+
+        del self.nodes[previousName]
+        node.name = self.uniqueName(name)
+        self.nodes[node.name] = node
+
+        for callbackId, function, clientData in list(self.nameCallbacks.get(node, [])):
+            function(node, previousName, clientData)
+
+        return node.name
+
+    # ---------------------------------------- Hierarchy ----------------------------------------
+
+    def reparent(self, node, parent, keepWorld=True):
+        """Moves a DAG node under another one, or to the world if parent is None
+
+        Parameters
+        ----------
+        node : Node
+            The node to move
+        parent : Node
+            The new parent
+        keepWorld : bool
+            True to change the transform of the node so it doesn't move
+        """
+
+        if parent is not None and (parent is node or parent in node.descendants()):
+            raise RuntimeError("Can't parent {} under itself".format(node.name))
+
+        world = self.worldMatrix(node) if keepWorld and node.isTransform else None
+
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+
+        if world is not None:
+            self.setWorldMatrix(node, world)
+
+    def delete(self, node, history=False):
+        """Deletes a node, its DAG children and the history that only fed it
+
+        Parameters
+        ----------
+        node : Node
+            The node to delete
+        history : bool
+            True if the node is the construction history of a deleted shape
+        """
+
+        if not node.alive:
+            return
+
+        for callbackId, function, clientData in list(self.removalCallbacks.get(node, [])):
+            function(node, clientData)
+
+        for child in list(node.children):
+            self.delete(child)
+
+        # The history that only fed a shape (i.e. the polyCube of a mesh) and the unit conversions go with it
+        feeding = [source for source, attribute in node.inputs.values()
+                   if not source.isDag and (node.isShape or history or source.type == "unitConversion")
+                   and all(target is node for _, target, _ in source.outputs)]
+
+        for attribute in list(node.inputs):
+            self.disconnect(node.inputs[attribute][0], node.inputs[attribute][1], node, attribute)
+        for attribute, target, targetAttribute in list(node.outputs):
+            self.disconnect(node, attribute, target, targetAttribute)
+
+        if node.parent is not None:
+            node.parent.children.remove(node)
+            node.parent = None
+
+        node.alive = False
+        del self.nodes[node.name]
+        del self.uuids[node.uuid]
+        if node in self.selection:
+            self.selection.remove(node)
+
+        for callbacks in (self.attributeCallbacks, self.nameCallbacks, self.removalCallbacks):
+            callbacks.pop(node, None)
+
+        for source in feeding:
+            self.delete(source, history=True)
+
+    def history(self, node):
+        """Returns the non DAG nodes upstream of a node"""
+
+        found = []
+        pending = [source for source, attribute in node.inputs.values()]
+        while pending:
+            source = pending.pop()
+            if source.isDag or source in found:
+                continue
+            found.append(source)
+            pending.extend(upstream for upstream, attribute in source.inputs.values())
+        return found
+
+    # ---------------------------------------- Attributes ----------------------------------------
+
+    def attributeExists(self, node, attribute):
+        """Returns True if the node has the attribute (without the index)"""
+
+        attribute = splitIndex(attribute)[0]
+        if attribute in node.dynamic or attribute in NODE_ATTRIBUTES:
+            return True
+
+        if node.isDag:
+            vector, component = vectorComponent(attribute)
+            return attribute in DAG_ATTRIBUTES or attribute in VECTOR_ATTRIBUTES or vector is not None
+
+        return attribute in node.values or any(key.startswith(attribute + "[") for key in node.values)
+
+    def getValue(self, node, attribute):
+        """Returns the value of an attribute"""
+
+        vector, component = vectorComponent(attribute)
+        if vector:
+            return node.vector(vector)[component]
+        if attribute in VECTOR_ATTRIBUTES:
+            return node.vector(attribute)
+
+        if attribute in node.values:
+            return node.values[attribute]
+
+        settings = node.dynamic.get(splitIndex(attribute)[0])
+        if settings and settings.get("defaultValue") is not None:
+            return settings["defaultValue"]
+
+        return DEFAULT_VALUES.get(attribute, 0.0)
+
+    def setValue(self, node, attribute, value):
+        """Sets the value of an attribute and calls the callbacks of the node"""
+
+        vector, component = vectorComponent(attribute)
+        if vector:
+            values = list(node.vector(vector))
+            values[component] = float(value)
+            node.values[vector] = tuple(values)
+        elif attribute in VECTOR_ATTRIBUTES:
+            node.values[attribute] = tuple(float(item) for item in value)
+        else:
+            node.values[attribute] = value
+
+        self.notify(node, ATTRIBUTE_SET, attribute)
+
+    def multiIndices(self, node, attribute):
+        """Returns the indices of the elements of a multi attribute that have a value or a connection"""
+
+        indices = set()
+        for key in list(node.values) + list(node.inputs) + [output[0] for output in node.outputs]:
+            name, index, rest = splitIndex(key)
+            if name == attribute and index is not None:
+                indices.add(index)
+        return sorted(indices)
+
+    def removeElement(self, node, attribute, index):
+        """Removes an element of a multi attribute, with its connections"""
+
+        element = "{}[{}]".format(attribute, index)
+        for key in [key for key in node.values if key == element or key.startswith(element + ".")]:
+            del node.values[key]
+
+        for key in [key for key in node.inputs if key == element or key.startswith(element + ".")]:
+            source, sourceAttribute = node.inputs[key]
+            self.disconnect(source, sourceAttribute, node, key)
+
+        self.notify(node, ATTRIBUTE_REMOVED, element)
+
+    def removeAttribute(self, node, attribute):
+        """Removes a dynamic attribute, its values and its connections"""
+
+        for key in [key for key in node.values if splitIndex(key)[0] == attribute]:
+            del node.values[key]
+        for key in [key for key in node.inputs if splitIndex(key)[0] == attribute]:
+            self.disconnect(node.inputs[key][0], node.inputs[key][1], node, key)
+        for sourceAttribute, target, targetAttribute in list(node.outputs):
+            if splitIndex(sourceAttribute)[0] == attribute:
+                self.disconnect(node, sourceAttribute, target, targetAttribute)
+
+        node.dynamic.pop(attribute, None)
+        self.notify(node, ATTRIBUTE_REMOVED, attribute)
+
+    # ---------------------------------------- Connections ----------------------------------------
+
+    def connect(self, source, sourceAttribute, target, targetAttribute, force=False):
+        """Connects two attributes, raises RuntimeError if the target is already connected"""
+
+        existing = target.inputs.get(targetAttribute)
+        if existing is not None:
+            if existing == (source, sourceAttribute) and not force:
+                raise RuntimeError("{}.{} is already connected to {}.{}".format(source.name, sourceAttribute,
+                                                                               target.name, targetAttribute))
+            if not force:
+                raise RuntimeError("{}.{} already has an incoming connection".format(target.name, targetAttribute))
+            self.disconnect(existing[0], existing[1], target, targetAttribute)
+
+        target.inputs[targetAttribute] = (source, sourceAttribute)
+        source.outputs.append((sourceAttribute, target, targetAttribute))
+
+        self.notify(target, CONNECTION_MADE, targetAttribute)
+        self.notify(source, CONNECTION_MADE, sourceAttribute)
+
+    def disconnect(self, source, sourceAttribute, target, targetAttribute):
+        """Removes a connection"""
+
+        if target.inputs.get(targetAttribute) != (source, sourceAttribute):
+            raise RuntimeError("{}.{} is not connected to {}.{}".format(source.name, sourceAttribute,
+                                                                       target.name, targetAttribute))
+
+        del target.inputs[targetAttribute]
+        source.outputs.remove((sourceAttribute, target, targetAttribute))
+
+        self.notify(target, CONNECTION_BROKEN, targetAttribute)
+        self.notify(source, CONNECTION_BROKEN, sourceAttribute)
+
+    def nextFreeIndex(self, node, attribute):
+        """Returns the first index of a multi attribute without an incoming connection"""
+
+        used = set(splitIndex(key)[1] for key in node.inputs if splitIndex(key)[0] == attribute)
+        index = 0
+        while index in used:
+            index += 1
+        return index
+
+    # ---------------------------------------- Callbacks ----------------------------------------
+
+    def addCallback(self, registry, key, function, clientData):
+        """Saves a callback and returns its id"""
+
+        self.callbackIds += 1
+        registry.setdefault(key, []).append((self.callbackIds, function, clientData))
+        return self.callbackIds
+
+    def removeCallback(self, callbackId):
+        """Forgets a callback given its id"""
+
+        for registry in (self.attributeCallbacks, self.nameCallbacks, self.removalCallbacks, self.sceneCallbacks,
+                         self.eventCallbacks, self.nodeAddedCallbacks):
+            for key, callbacks in registry.items():
+                registry[key] = [callback for callback in callbacks if callback[0] != callbackId]
+
+    def notify(self, node, message, attribute):
+        """Calls the attribute changed callbacks of a node"""
+
+        callbacks = self.attributeCallbacks.get(node)
+        if not callbacks:
+            return
+
+        plug = "{}.{}".format(node.name, attribute)
+        for callbackId, function, clientData in list(callbacks):
+            function(message, plug, None, clientData)
+
+    def sceneMessage(self, message):
+        """Calls the callbacks of a scene message (i.e. after a new scene)"""
+
+        for callbackId, function, clientData in list(self.sceneCallbacks.get(message, [])):
+            function(clientData)
+
+    def event(self, name):
+        """Calls the callbacks of an event (i.e. Undo)"""
+
+        for callbackId, function, clientData in list(self.eventCallbacks.get(name, [])):
+            function(clientData)
+
+    def runDeferred(self):
+        """Runs the functions queued with evalDeferred, and the ones they queue"""
+
+        while self.deferred:
+            self.deferred.pop(0)()
+
+    # ---------------------------------------- Transforms ----------------------------------------
+
+    def localMatrix(self, node):
+        """Returns the matrix of a transform relative to its parent, pivots included"""
+
+        if not node.isTransform:
+            return identityMatrix()
+
+        scalePivot = node.vector("scalePivot")
+        rotatePivot = node.vector("rotatePivot")
+
+        scale = node.vector("scale")
+        rotate = node.vector("rotate")
+        translate = node.vector("translate")
+
+        # Most transforms only move, the steps that do nothing are skipped so deep hierarchies stay cheap
+        steps = []
+        if any(scalePivot) and scale != (1.0, 1.0, 1.0):
+            steps += [translationMatrix([-value for value in scalePivot]), scaleMatrix(scale), translationMatrix(scalePivot)]
+        elif scale != (1.0, 1.0, 1.0):
+            steps.append(scaleMatrix(scale))
+        if any(rotate):
+            steps += [translationMatrix([-value for value in rotatePivot]), rotationMatrix(rotate),
+                      translationMatrix(rotatePivot)]
+        steps.append(translationMatrix(translate))
+
+        matrix = steps[0]
+        for step in steps[1:]:
+            matrix = multiplyMatrices(matrix, step)
+
+        return matrix
+
+    def worldMatrix(self, node):
+        """Returns the matrix that takes a point of the node to world space"""
+
+        matrix = self.localMatrix(node)
+        if node.parent is not None and node.values.get("inheritsTransform", True):
+            matrix = multiplyMatrices(matrix, self.worldMatrix(node.parent))
+        return matrix
+
+    def setWorldMatrix(self, node, world):
+        """Changes the translate, rotate and scale of a transform so it gets a world matrix"""
+
+        local = world
+        if node.parent is not None and node.values.get("inheritsTransform", True):
+            local = multiplyMatrices(world, invertMatrix(self.worldMatrix(node.parent)))
+
+        scale, rotate = decomposeMatrix(local)
+        node.values["scale"] = scale
+        node.values["rotate"] = rotate
+
+        # The pivots stay, the translate is what is left of the matrix
+        node.values["translate"] = (0.0, 0.0, 0.0)
+        withoutTranslate = self.localMatrix(node)
+        node.values["translate"] = tuple(local[3][axis] - withoutTranslate[3][axis] for axis in range(3))
+
+    def moveWorld(self, node, delta):
+        """Moves a transform by a world vector"""
+
+        world = self.worldMatrix(node)
+        for axis in range(3):
+            world[3][axis] += delta[axis]
+        self.setWorldMatrix(node, world)
+
+    def worldPivot(self, node):
+        """Returns the world position of the rotate pivot of a node"""
+
+        if node.isShape:
+            node = node.parent
+        return transformPoint(node.vector("rotatePivot"), self.worldMatrix(node))
+
+    def shapePoints(self, shape, worldSpace=True):
+        """Returns the points that define the bounding box of a shape"""
+
+        if shape.type == "locator":
+            position = shape.vector("localPosition")
+            size = shape.vector("localScale")
+            points = [tuple(position[axis] + (size[axis] * sign if axis == changed else 0.0) for axis in range(3))
+                      for changed in range(3) for sign in (-1.0, 1.0)]
+        elif shape.type == "mesh":
+            points = shape.geometry["points"]
+        elif shape.type == "nurbsCurve":
+            points = shape.geometry["cvs"]
+        else:
+            points = []
+
+        if not worldSpace or shape.parent is None:
+            return list(points)
+
+        matrix = self.worldMatrix(shape.parent)
+        return [transformPoint(point, matrix) for point in points]
+
+    def boundingBox(self, nodes, worldSpace=True):
+        """Returns [xmin, ymin, zmin, xmax, ymax, zmax] around the shapes under some nodes"""
+
+        points = []
+        for node in nodes:
+            shapes = [node] if node.isShape else [child for child in [node] + node.descendants() if child.isShape]
+            for shape in shapes:
+                if not shape.isIntermediate:
+                    points.extend(self.shapePoints(shape, worldSpace))
+
+            # A transform without shapes (i.e. a joint) is a point
+            if not shapes and node.isTransform:
+                points.append(transformPoint((0.0, 0.0, 0.0), self.worldMatrix(node)))
+
+        if not points:
+            return [0.0] * 6
+
+        return [min(point[axis] for point in points) for axis in range(3)] + \
+               [max(point[axis] for point in points) for axis in range(3)]
+
+    def freeze(self, node):
+        """Bakes the transform of a node into its shapes and children, like makeIdentity"""
+
+        matrix = self.localMatrix(node)
+        pivot = transformPoint(node.vector("rotatePivot"), matrix)
+
+        for shape in node.shapes():
+            if shape.type == "mesh":
+                shape.geometry["points"] = [transformPoint(point, matrix) for point in shape.geometry["points"]]
+            elif shape.type == "nurbsCurve":
+                shape.geometry["cvs"] = [transformPoint(point, matrix) for point in shape.geometry["cvs"]]
+            elif shape.type == "locator":
+                shape.values["localPosition"] = transformPoint(shape.vector("localPosition"), matrix)
+
+        # Children keep their place, only their position is baked (the rig doesn't freeze rotated parents)
+        for child in node.children:
+            if child.isTransform:
+                child.values["translate"] = transformPoint(child.vector("translate"), matrix)
+
+        for attribute in ("translate", "rotate", "scale"):
+            node.values[attribute] = VECTOR_ATTRIBUTES[attribute]
+
+        node.values["rotatePivot"] = pivot
+        node.values["scalePivot"] = pivot
+
+# The messages given to the attribute changed callbacks, like OpenMaya.MNodeMessage
+CONNECTION_MADE = 0x01
+CONNECTION_BROKEN = 0x02
+ATTRIBUTE_SET = 0x800
+ATTRIBUTE_REMOVED = 0x1000
+ATTRIBUTE_ADDED = 0x4000
+
+# The scene messages, like OpenMaya.MSceneMessage
+AFTER_NEW = 3
+AFTER_IMPORT = 5
+AFTER_OPEN = 7
+AFTER_CREATE_REFERENCE = 44
+
+def splitIndex(attribute):
+    """Splits attr[3].child into (attr, 3, .child), the index is None if there is none"""
+
+    match = INDEX_PATTERN.match(attribute)
+    if not match:
+        return attribute, None, ""
+
+    index = match.group(2)
+    return match.group(1), "*" if index == "*" else int(index), match.group(3)
+
+def shapeName(name):
+    """Returns the name Maya gives the shape of a transform (i.e. locator1 -> locatorShape1)"""
+
+    prefix, digits = SUFFIX_PATTERN.match(name).groups()
+    return "{}Shape{}".format(prefix, digits)
+
+def vectorComponent(attribute):
+    """Returns (vector attribute, component index) for attributes like translateX, or (None, None)"""
+
+    if attribute[-1:] in "XYZ" and attribute[:-1] in VECTOR_ATTRIBUTES:
+        return attribute[:-1], "XYZ".index(attribute[-1])
+    return None, None
+
+# The scene used by the stand-in commands
+scene = Scene()
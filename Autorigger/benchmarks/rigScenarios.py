@@ -0,0 +1,206 @@
+"""Rigging scenarios for the benchmark suite.
+
+Every scenario builds a new in-memory scene with what a rigging step needs
+(the window, the locators, the pieces, the saved controllers) and returns the
+step to measure, so only the step itself is timed and profiled.
+
+The scenarios grow with the size of the rig:
+    * makeJnt: the number of arm pieces
+    * wheelSelection: the number of wheels
+    * makeTreadObj: the number of tread pieces
+    * finalizeTread: the number of sections of the tread curve, which sets the controllers
+    * saveData: the number of values saved one by one
+    * finalizeRig: the number of stored controllers
+
+Example:
+    makeJnt = rigScenarios.armScenario(16)
+    makeJnt()
+"""
+
+from maya import cmds
+import ArmMaker
+import ThreadMaker
+import dataNodeManager
+import finalizeRig
+import wheelRigger
+
+def newScene():
+    """Starts a new scene with an empty window for the UI of the scripts"""
+
+    cmds.file(new=True, force=True)
+    cmds.window("BenchmarkWindow")
+    cmds.columnLayout()
+
+def armScenario(pieces):
+    """Places the locators of a bent arm
+
+    Parameters
+    ----------
+    pieces : int
+        The number of arm pieces, there is one more locator for the bucket
+
+    Returns
+    -------
+    function
+        ArmMaker.makeJnt
+    """
+
+    newScene()
+    ArmMaker.populateWindow()
+
+    # The slider of the window stops at 6, but the script takes any number
+    cmds.intSliderGrp(ArmMaker.start.numArms, edit=True, value=pieces)
+    ArmMaker.makeLoc()
+
+    # Bend the chain so the IK handles have a direction to solve in
+    for index, locator in enumerate(ArmMaker.start.locList):
+        cmds.move(0, (index % 2) * 2, index * 5, locator)
+
+    return ArmMaker.makeJnt
+
+def wheelScenario(wheels):
+    """Creates a row of wheels and selects them
+
+    Parameters
+    ----------
+    wheels : int
+        The number of wheels
+
+    Returns
+    -------
+    function
+        wheelRigger.wheelSelection
+    """
+
+    newScene()
+    wheelRigger.populateWindow()
+
+    wheelSet = []
+    for index in range(wheels):
+        wheel = cmds.polyCube(name="BenchmarkWheel1", width=1, height=2, depth=2)[0]
+        cmds.move(0, 1, index * 3, wheel)
+        wheelSet.append(wheel)
+
+    cmds.select(wheelSet)
+
+    return wheelRigger.wheelSelection
+
+def treadScenario(pieces, sections=8):
+    """Places the tread locators and makes the tread curve, the pieces are made from the proxy geo
+
+    Parameters
+    ----------
+    pieces : int
+        The number of tread pieces
+    sections : int
+        The number of sections of the tread curve
+
+    Returns
+    -------
+    function
+        ThreadMaker.makeTreadObj
+    """
+
+    newScene()
+
+    # The data of the last tread is kept in the module
+    ThreadMaker.data.__init__()
+    ThreadMaker.populateWindow()
+
+    cmds.intSliderGrp("curveQuality", edit=True, value=sections)
+    cmds.checkBox("adaptiveSections", edit=True, value=False)
+    cmds.checkBox("useProxy", edit=True, value=True)
+    cmds.checkBox("bboxCheck", edit=True, value=False)
+    cmds.intSliderGrp("treadAmount", edit=True, value=pieces)
+
+    # The circle grows with the tread so the pieces keep their spacing
+    ThreadMaker.initFunc()
+    cmds.move(0, 0, -pieces / 2.0, ThreadMaker.data.firstLocator)
+    cmds.move(0, 0, pieces / 2.0, ThreadMaker.data.secondLocator)
+    ThreadMaker.makeTread()
+
+    return ThreadMaker.makeTreadObj
+
+def finalizeTreadScenario(sections, pieces=50):
+    """Builds a tread, ready to be finalized
+
+    Parameters
+    ----------
+    sections : int
+        The number of sections of the tread curve, there is a controller for each one
+    pieces : int
+        The number of tread pieces
+
+    Returns
+    -------
+    function
+        ThreadMaker.finalizeTread
+    """
+
+    treadScenario(pieces, sections)()
+
+    return ThreadMaker.finalizeTread
+
+def saveDataScenario(values, nodeName="rigDataNode", attributeName="benchmarkControllers"):
+    """Prepares values to save one by one in the same attribute
+
+    Parameters
+    ----------
+    values : int
+        The number of values
+    nodeName : str
+        The name of the data node
+    attributeName : str
+        The name of the attribute
+
+    Returns
+    -------
+    function
+        Saves every value with dataNodeManager.saveData
+    """
+
+    newScene()
+    dataNodeManager.clearCache()
+
+    names = ["Controller{}".format(index) for index in range(values)]
+
+    def saveValues():
+        for name in names:
+            dataNodeManager.saveData(nodeName=nodeName, attributeName=attributeName, value=name)
+
+    return saveValues
+
+def finalizeRigScenario(components):
+    """Saves the controllers of rig components on the data node
+
+    Parameters
+    ----------
+    components : int
+        The number of rig components, each one has a controller in a group
+
+    Returns
+    -------
+    function
+        finalizeRig.finalizeRig
+    """
+
+    newScene()
+    dataNodeManager.clearCache()
+
+    for index in range(components):
+        component = wheelRigger.WheelData()
+        component.mainController = cmds.circle(name="BenchmarkController1", normal=(0,1,0))[0]
+        component.mainControllerGroup = cmds.group(component.mainController, name="BenchmarkControllerGroup1")
+        component.wheelGroup = component.mainControllerGroup
+        cmds.move(index * 5, 0, 0, component.mainControllerGroup)
+        component.writeToNode()
+
+    return finalizeRig.finalizeRig
+
+# Every benchmark: its name, what grows, the sizes of its tiers and the scenario that prepares it
+BENCHMARKS = [("makeJnt", "arm pieces", (4, 16, 64), armScenario),
+              ("wheelSelection", "wheels", (8, 32, 128), wheelScenario),
+              ("makeTreadObj", "tread pieces", (50, 200, 800), treadScenario),
+              ("finalizeTread", "curve sections", (8, 32, 128), finalizeTreadScenario),
+              ("saveData", "values", (25, 100, 400), saveDataScenario),
+              ("finalizeRig", "controllers", (10, 40, 160), finalizeRigScenario)]
@@ -0,0 +1,223 @@
+"""Runs the rigging benchmarks outside of Maya and checks them against the saved thresholds.
+
+The rigging scripts run on the in-memory scene of memoryScene.py, which stands in
+for maya.cmds and maya.api.OpenMaya. Every tier of every benchmark is measured
+with rigProfiler, and reports:
+    * The seconds it took (the fastest of the repeats)
+    * The number of Maya commands it called
+
+A tier fails when its time goes past the saved time times the tolerance (plus a
+small slack so the smallest tiers don't fail by noise), or when it calls more
+commands than the saved count. The command count doesn't depend on the machine,
+so it catches most regressions even when the times are noisy.
+
+The times of the stand-in are not the times inside Maya, they measure the work the
+scripts do around the commands and how the number of commands grows with the rig.
+
+Usage:
+    python runBenchmarks.py                 Run every benchmark and compare it with thresholds.json
+    python runBenchmarks.py --update        Run them and save the results as the new thresholds
+    python runBenchmarks.py --only saveData --only makeJnt
+    python runBenchmarks.py --json results.json
+
+It exits with 1 if any tier regressed.
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import sys
+
+# The stand-in maya package has to be found before the real one, then the rigging scripts
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_PATH = os.path.join(os.path.dirname(BENCHMARKS_PATH), "scripts")
+sys.path[0:0] = [BENCHMARKS_PATH, SCRIPTS_PATH]
+
+import memoryScene
+import rigProfiler
+import rigBenchmarks
+import rigScenarios
+
+# The results every tier is compared with
+THRESHOLDS_PATH = os.path.join(BENCHMARKS_PATH, "thresholds.json")
+
+# A tier fails if it takes longer than its saved time times this
+TOLERANCE = 2.0
+
+# Seconds added to every threshold, so the smallest tiers don't fail by noise
+SLACK = 0.05
+
+def measure(scenario, size, repeats=3):
+    """Runs a benchmark tier and profiles it
+
+    Parameters
+    ----------
+    scenario : function
+        Prepares a new scene for the size and returns the step to measure
+    size : int
+        The size of the tier
+    repeats : int
+        The number of times it is measured, the fastest time is kept
+
+    Returns
+    -------
+    dict
+        seconds, commands (the number of cmds calls) and nodes (the nodes in the scene after it)
+    """
+
+    result = {"seconds": None}
+
+    for repeat in range(repeats):
+        step = scenario(size)
+
+        rigProfiler.clear()
+        rigProfiler.enable()
+        try:
+            seconds = rigBenchmarks.timeCall(step)[0]
+        finally:
+            rigProfiler.disable()
+
+        # Run what the step left for idle time, like Maya would when the step ends
+        memoryScene.scene.runDeferred()
+
+        if result["seconds"] is None or seconds < result["seconds"]:
+            result["seconds"] = seconds
+
+        result["commands"] = sum(row["calls"] for row in rigProfiler.getReport())
+        result["nodes"] = len(memoryScene.scene.nodes)
+
+    return result
+
+def compare(result, threshold, tolerance=TOLERANCE, slack=SLACK):
+    """Compares a tier with its saved result
+
+    Parameters
+    ----------
+    result : dict
+        The seconds and commands of the tier
+    threshold : dict
+        The saved seconds and commands, None if the tier was never saved
+
+    Returns
+    -------
+    str
+        ok, new or the reasons it regressed
+    """
+
+    if threshold is None:
+        return "new"
+
+    problems = []
+
+    if result["seconds"] > threshold["seconds"] * tolerance + slack:
+        problems.append("{:.1f}x time".format(result["seconds"] / max(threshold["seconds"], 1e-9)))
+
+    if result["commands"] > threshold["commands"]:
+        problems.append("+{} cmds".format(result["commands"] - threshold["commands"]))
+
+    return ", ".join(problems) or "ok"
+
+def readThresholds(path=THRESHOLDS_PATH):
+    """Returns the saved results, {benchmark: {size: {seconds, commands}}}"""
+
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as thresholdFile:
+        return json.load(thresholdFile)
+
+def writeJson(path, results):
+    """Saves results as {benchmark: {size: {seconds, commands, nodes}}}"""
+
+    with open(path, "w") as jsonFile:
+        json.dump(results, jsonFile, indent=4, sort_keys=True, separators=(",", ": "))
+        jsonFile.write("\n")
+
+def runBenchmarks(names=None, repeats=3, tolerance=TOLERANCE, slack=SLACK, thresholds=None):
+    """Runs the benchmarks and compares every tier with the thresholds
+
+    Parameters
+    ----------
+    names : list
+        The benchmarks to run, all of them if not given
+    repeats : int
+        The number of times every tier is measured
+    thresholds : dict
+        The saved results, {benchmark: {size: {seconds, commands}}}
+
+    Returns
+    -------
+    tuple
+        The results, {benchmark: {size: {seconds, commands, nodes}}}, and the number of tiers that regressed
+    """
+
+    thresholds = thresholds or {}
+    results = {}
+    failures = 0
+
+    for name, sizeLabel, sizes, scenario in rigScenarios.BENCHMARKS:
+        if names and name not in names:
+            continue
+
+        results[name] = {}
+        rows = []
+
+        for size in sizes:
+            result = measure(scenario, size, repeats)
+            results[name][str(size)] = result
+
+            status = compare(result, thresholds.get(name, {}).get(str(size)), tolerance, slack)
+            if status not in ("ok", "new"):
+                failures += 1
+
+            rows.append({sizeLabel: size, "seconds": "{:.4f}".format(result["seconds"]),
+                         "commands": result["commands"], "nodes": result["nodes"], "vs threshold": status})
+
+        rigBenchmarks.printTable(name, [sizeLabel, "seconds", "commands", "nodes", "vs threshold"], rows)
+
+    return results, failures
+
+def main(arguments=None):
+    """Runs the benchmarks from the command line, returns the exit code"""
+
+    parser = argparse.ArgumentParser(description="Benchmarks the rigging scripts on an in-memory scene")
+    parser.add_argument("--only", action="append", help="Run only this benchmark, can be repeated")
+    parser.add_argument("--repeats", type=int, default=3, help="Times every tier is measured, the fastest is kept")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="A tier fails if it is this many times slower than its threshold")
+    parser.add_argument("--slack", type=float, default=SLACK, help="Seconds added to every time threshold")
+    parser.add_argument("--update", action="store_true", help="Save the results as the new thresholds")
+    parser.add_argument("--json", help="Also save the results to this file")
+    options = parser.parse_args(arguments)
+
+    names = [benchmark[0] for benchmark in rigScenarios.BENCHMARKS]
+    for name in options.only or []:
+        if name not in names:
+            parser.error("Unknown benchmark '{}', choose from {}".format(name, ", ".join(names)))
+
+    thresholds = readThresholds()
+    results, failures = runBenchmarks(options.only, options.repeats, options.tolerance, options.slack,
+                                      {} if options.update else thresholds)
+
+    if options.json:
+        writeJson(options.json, results)
+
+    if options.update:
+        # Keep the thresholds of the benchmarks that didn't run
+        for name, tiers in results.items():
+            thresholds[name] = dict((size, {"seconds": round(result["seconds"], 4), "commands": result["commands"]})
+                                    for size, result in tiers.items())
+        writeJson(THRESHOLDS_PATH, thresholds)
+        print("Saved the thresholds to {}".format(THRESHOLDS_PATH))
+        return 0
+
+    if failures:
+        print("{} benchmark tiers regressed".format(failures))
+        return 1
+
+    print("Every benchmark tier is within its threshold")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,8 @@ a mechanical arm.
 from maya import cmds
 import dataNodeManager
 reload(dataNodeManager)
+import rigUtils
+reload(rigUtils)
 
 class ArmData(dataNodeManager.NodeData):
     """A class to save information for this rigging process.
@@ -25,10 +27,10 @@ class ArmData(dataNodeManager.NodeData):
         The name of the main nurbs curve that controls the rig
     mainControllerGroup : str
         The name of the group where the mainController is
-    controllerAttributeName : str
-        The name of the type of rig that is saved (i.e. wheelControllers, treadControllers, armControllers)
-    controllerGroupAttributeName : str
-        The name of the type of rig GROUP that is saved (i.e. wheelControllerGroups, treadControllerGroups, armControllerGroups)
+    componentType : str
+        The type of rig that is saved (i.e. wheel, tread, arm)
+    componentAttributes : list
+        The names of the attributes specific to this type of rig that are saved with it
 
     Methods
     -------
@@ -42,8 +44,8 @@ class ArmData(dataNodeManager.NodeData):
         self.rootController = ""
         self.mainController = ""
         self.mainControllerGroup =""
-        self.controllerAttributeName = "armControllers"
-        self.controllerGroupAttributeName = "armControllerGroups"
+        self.componentType = "arm"
+        self.componentAttributes = ["rootJoint", "rootController"]
 
 # Create object of class to access attributes
 data = ArmData()
@@ -131,6 +133,8 @@ def namingFor(*args):
         # Save the index into the name list
         start.nameList.append(i)
 
+@rigUtils.transaction
+@rigUtils.preserveSelection
 def makeLoc(*args):
     """This function creates locators based on the number specified by the user"""
 
@@ -139,11 +143,12 @@ def makeLoc(*args):
     # We iterate over this number
     for i in range(1, start.armsValue+2):
         # We create a locator AND add it to the locator list
-        start.locList.append(cmds.spaceLocator(n="ArmLocator%i"%i if i<=(start.armsValue) else "BucketLocator", p=(0,0,0), a=True))
+        locator = cmds.spaceLocator(n="ArmLocator%i"%i if i<=(start.armsValue) else "BucketLocator", p=(0,0,0), a=True)
+        start.locList.append(locator)
         # Center locator's pivot
-        cmds.CenterPivot()
+        rigUtils.centerPivot(locator)
         # Move locator in world space so the user does not have to deal with local space
-        cmds.move(0,0,(i-1)*5)
+        cmds.move(0,0,(i-1)*5, locator)
     
     # Modifies the UI so the buttons get enabled or disabled
     updateUI(True)
@@ -195,6 +200,8 @@ def saveLoc():
         # Add them to the list
         start.locPosList.append((xPos, yPos, zPos))
 
+@rigUtils.transaction
+@rigUtils.preserveSelection
 def makeJnt(*args):
     """This function creates a joint for each locator that was created"""
 
@@ -203,57 +210,73 @@ def makeJnt(*args):
 
     # Get every position of the locators
     saveLoc()
-    cmds.select(cl=True)
+
+    # The names of the whole step come from one index of the scene
+    names = rigUtils.sharedNames()
+
+    # Reserve a numbered name for every arm joint and one for the bucket
+    jointNames = names.reserveBatch("ArmJnt", len(start.locPosList)-1)
+    jointNames.append(names.reserve("BucketJnt"))
+
     # Create a joint on each locator position
-    for count, i in enumerate(start.locPosList, start=1):
-        jointName = "ArmJnt%i"%count if count<=len(start.locPosList)-1 else "BucketJnt"
-        jointName = checkDuplicatedName(jointName)
-        start.jointList.append(cmds.joint(n=jointName, p=i))
+    # Each joint is created as a child of the previous one, the first one has no parent
+    parentJoint = None
+    for jointName, i in zip(jointNames, start.locPosList):
+        if parentJoint:
+            joint = cmds.createNode("joint", name=jointName, parent=parentJoint, skipSelect=True)
+        else:
+            joint = cmds.createNode("joint", name=jointName, skipSelect=True)
+
+        # Place the joint on the locator's world position
+        cmds.xform(joint, worldSpace=True, translation=i)
+        start.jointList.append(joint)
+        parentJoint = joint
     
-    # Select first joint on the chain
-    cmds.select(start.jointList[0])
+    # The first joint on the chain is the root
     data.rootJoint = start.jointList[0]
 
     # Change joint's orient
-    cmds.joint(edit=True, oj="xyz", sao="yup", ch=True, zso=True)
+    cmds.joint(data.rootJoint, edit=True, oj="xyz", sao="yup", ch=True, zso=True)
 
     # Create IK handles on joints
-    makeIK()
+    makeIK(names)
 
     # Delete list references
     delLoc()
 
     # Create a main controller
-    makeMainController()
+    makeMainController(names)
 
     # Save info to node
     data.writeToNode()
 
-def makeIK(*args):
-    """This function creates IK handles on the joints that were created"""
+def makeIK(names=None):
+    """This function creates IK handles on the joints that were created
+    
+    Parameters
+    ----------
+    names : NameAllocator
+        The index of names in the scene, the one of the rigging step if not given
+    """
+
+    if names is None:
+        names = rigUtils.sharedNames()
 
     # Create the IK handle that controls the bucket of the arm and save it to variable
     # We use SingleChaing solveer as we are creating IK on two joints only
     bucketIK = cmds.ikHandle(startJoint=start.jointList[-2], endEffector=start.jointList[-1], solver="ikSCsolver", sticky="sticky")[0]
 
-    # Check if there is a controller with the same name, 
-    # if there is, this function with generate a new one
-    bucketName = checkDuplicatedName("bucketCtrl")
+    # Get a name that is not used in the scene
+    bucketName = names.reserve("bucketCtrl")
 
     # Create controller
     bucketCtrl = cmds.circle(name=bucketName, radius=2)[0]
 
-    # Select both controller and IK
-    cmds.select(bucketCtrl, bucketIK)
-
     # Move controller to IK
-    cmds.MatchTranslation()
-
-    # Select them reversed
-    cmds.select(bucketIK, bucketCtrl)
+    rigUtils.matchTranslation(bucketCtrl, bucketIK)
 
-    # Parent IK to bucker
-    cmds.parent()
+    # Parent IK to bucket
+    cmds.parent(bucketIK, bucketCtrl)
 
     # Save the name of the controller on data object
     data.rootController = bucketCtrl
@@ -266,46 +289,48 @@ def makeIK(*args):
         # We use Rotate plane solver as we have a chain of three joints
         armIK = cmds.ikHandle(startJoint=start.jointList[-4], endEffector=start.jointList[-2], solver="ikRPsolver")[0]
 
-        # Check if there is a controller with the same name, 
-        # if there is, this function with generate a new one
-        armName = checkDuplicatedName("armCtrl")
+        # Get a name that is not used in the scene
+        armName = names.reserve("armCtrl")
 
         # Create controller for this IK
         armCtrl = cmds.circle(name=armName, radius=2)[0]
 
         # Move controller to IK and parent them correctly
-        cmds.select(armCtrl, armIK)
-        cmds.MatchTranslation()
-        cmds.select(armIK, armCtrl)
-        cmds.parent()
+        rigUtils.matchTranslation(armCtrl, armIK)
+        cmds.parent(armIK, armCtrl)
 
         # Parent previous IK to this one
-        cmds.select(bucketCtrl, armCtrl)
-        cmds.parent()
+        cmds.parent(bucketCtrl, armCtrl)
 
         # Add reference to data object
         data.rootController = armCtrl
 
-def makeMainController():
-    """This function creates a MainController to drive the entire arm"""
+def makeMainController(names=None):
+    """This function creates a MainController to drive the entire arm
+    
+    Parameters
+    ----------
+    names : NameAllocator
+        The index of names in the scene, the one of the rigging step if not given
+    """
+
+    if names is None:
+        names = rigUtils.sharedNames()
 
-    # Check if there is a controller with the same name, 
-    # if there is, this function with generate a new one
-    mainName = checkDuplicatedName("ArmMainController")
+    # Get a name that is not used in the scene
+    mainName = names.reserve("ArmMainController")
 
     # Create controller
     data.mainController = cmds.circle(name=mainName, radius=3, normal=(0,1,0))[0]
 
     # Create offset group
-    data.mainControllerGroup = cmds.group(name="ArmMainControllerGroup")
+    data.mainControllerGroup = cmds.group(data.mainController, name="ArmMainControllerGroup")
 
     # Move group to root joint
-    cmds.select(data.mainControllerGroup, data.rootJoint)
-    cmds.MatchTranslation()
+    rigUtils.matchTranslation(data.mainControllerGroup, data.rootJoint)
 
     # Parent joint and controller to this new MainController
-    cmds.select(data.rootController, data.rootJoint, data.mainController)
-    cmds.parent()
+    cmds.parent(data.rootController, data.rootJoint, data.mainController)
     
 
 def assignGeometry(*args):
@@ -320,74 +345,9 @@ def assignGeometry(*args):
     # one to save the index and other for the meshes
     for index, mesh in enumerate(pieces):
 
-        # Select the joint that shares the same index as the mesh piece
-        cmds.select(start.jointList[index], mesh)
-        # Apply parent contraing between them
-        cmds.parentConstraint(maintainOffset=True)
+        # Apply parent contraint between the joint that shares the same index as the mesh piece and the mesh
+        cmds.parentConstraint(start.jointList[index], mesh, maintainOffset=True)
 
-def checkDuplicatedName(name):
-    """This function checks if a name is duplicated in the scene, if it does, it generates a new one
-    
-    Parameters
-    ----------
-    name : str
-        The name to verify in the scene
-    """
-
-    # The amount of times that we have found the name
-    tries = 0
-
-    # While there is an object with the same name
-    while(cmds.objExists(name)):
-        # Increment the number of tries
-        tries +=1
-        # Generate new name
-        name = renameDuplicatedObject(name, tries)
-    
-    # Return the name
-    return name
-
-def renameDuplicatedObject(name, index=0):
-    """This function takes a name and adds an index to it
-    
-    Parameters
-    ----------
-    name : str
-        The name to append an index
-    index : int
-        The desired number to append to the name
-    """
-
-    # If the object exists on the scene
-    if cmds.objExists(name):
-
-        # Create a new name based on previous
-        newName = name
-
-        # Variable to save the number of digits the number should have
-        lastDigits = 0
-
-        # If we are not on index 0
-        if index > 1:
-            # The number of digits is based on the number of digits that the index has
-            lastDigits = len(str(index))
-
-            # Delete that number of digits from the name
-            # Using [fromIndex:toIndex] allows us to create a substring out of the string
-            # the parameters specify from where to where we want to sample that substring
-            # as we are using negative index, we are leaving the last characters on the string
-            # behind, as [-1] is the last index on a string
-            newName = newName[:-lastDigits]
-        
-        # Append index to name
-        newName += str(index)
-        # Return the new name
-        return newName
-
-    # If the object does not exist on the scene, simply return the original name
-    else:
-        return name
-    
 # __name__ is a variable that all python modules have when executed
 # When a python module is executed directly (pasting it on script editor,
 # charcoal or through vsCode), the name is "__main__"
@@ -3,8 +3,25 @@
 """
 
 from maya import cmds
+import math
 import dataNodeManager
 reload(dataNodeManager)
+import treadLayout
+reload(treadLayout)
+import rigUtils
+reload(rigUtils)
+import controllerShapes
+reload(controllerShapes)
+import treadCache
+reload(treadCache)
+import arcLength
+reload(arcLength)
+import beltPath
+reload(beltPath)
+import rollerDetection
+reload(rollerDetection)
+import chunkedTask
+reload(chunkedTask)
 
 class TreadData(dataNodeManager.NodeData):
     """A class to save information for this rigging process.
@@ -19,20 +36,46 @@ class TreadData(dataNodeManager.NodeData):
         The name of the second locator
     curveRadius : float
         The radius of the curve in the middle of the rotators
+    rollers : list
+        The names of the roller locators or meshes the tread wraps around, empty for a circle
     treadCircle : str
         The name of the nurbs circle that is used to create the tread
     treadBaseWire : str
         The name of the BaseWire object that is created when applying a wire deformation
     treadMesh : str
-        The name of the mesh that is built on the curve
+        The name of the mesh that is built on the curve, or the group of the pieces
+    buildMode : str
+        The way the tread was built, one of BUILD_MODES
+    treadPieces : list
+        The names of the pieces that ride on the curve when they are not merged
+    pieceOffsets : list
+        The names of the nodes that set the position of each piece on the curve
+    proxyMesh : str
+        The name of the low resolution tread mesh, or of the hidden proxy piece when the pieces are not merged
+    proxyData : dict
+        The geometry of the proxy piece, kept to resize the proxy mesh without rebuilding it
+    treadWire : str
+        The name of the wire deformer of the tread mesh
+    pieceSpacing : float
+        The degrees the base wire rotates to scroll the tread one piece
+    curveControllers : list
+        The names of the controllers that reshape the curve
+    cacheNodes : list
+        The names of the nodes of the periodic cache
+    proxyWire : str
+        The name of the wire deformer of the proxy mesh
+    pieceData : dict
+        The geometry of the piece used to build the mesh, kept to resize the tread without rebuilding it
+    arcLengthTable : arcLength.ArcLengthTable
+        The measured length of the tread curve, updated instead of measured again when the curve changes
     mainController : str
         The name of the main nurbs curve that controls the rig
     mainControllerGroup : str
         The name of the group where the mainController is
-    controllerAttributeName : str
-        The name of the type of rig that is saved (i.e. wheelControllers, treadControllers, armControllers)
-    controllerGroupAttributeName : str
-        The name of the type of rig GROUP that is saved (i.e. wheelControllerGroups, treadControllerGroups, armControllerGroups)
+    componentType : str
+        The type of rig that is saved (i.e. wheel, tread, arm)
+    componentAttributes : list
+        The names of the attributes specific to this type of rig that are saved with it
 
     Methods
     -------
@@ -44,16 +87,46 @@ class TreadData(dataNodeManager.NodeData):
         self.firstLocator = ""
         self.secondLocator = ""
         self.curveRadius = 0.0
+        self.rollers = []
         self.treadCircle = ""
         self.treadBaseWire = ""
         self.treadMesh = ""
+        self.buildMode = "merged"
+        self.treadPieces = []
+        self.pieceOffsets = []
+        self.pieceData = None
+        self.arcLengthTable = None
+        self.proxyMesh = ""
+        self.proxyData = None
+        self.treadWire = ""
+        self.pieceSpacing = 0.0
+        self.curveControllers = []
+        self.cacheNodes = []
+        self.proxyWire = ""
         self.mainController = ""
         self.mainControllerGroup =""
-        self.controllerAttributeName = "treadControllers"
-        self.controllerGroupAttributeName = "treadControllerGroups"
+        self.componentType = "tread"
+        self.componentAttributes = ["curveRadius", "rollers", "treadCircle", "treadBaseWire", "treadMesh", "buildMode", "treadPieces",
+                                    "proxyMesh"]
     
 data = TreadData()
 
+# The ways to make the tread rotate, in the same order as the Tread drive menu
+# nodes: utility nodes, supported by parallel evaluation and cached playback
+# expression: a TreadRotation expression node
+DRIVERS = ["nodes", "expression"]
+
+# The ways to build the tread, in the same order as the Build mode menu
+# merged: one mesh deformed by a wire deformer
+# rigid: one rigid piece per link, riding on the curve with a motion path
+# instanced: like rigid, but every piece is an instance of the same hidden source piece
+BUILD_MODES = ["merged", "rigid", "instanced"]
+
+# Finalizing adds these nodes for every section of the curve: the locator of the point on curve
+# constraint (transform and shape), the constraint, the cube controller (transform and shape)
+# and its parent constraint
+NODES_PER_SECTION = 6
+
 # Function to create the main window UI
 def makeWindow():
     """This function creates and displays a window"""
@@ -68,8 +141,11 @@ def makeWindow():
         cmds.windowPref(winName, remove=True)
     
     # If it doesn't exist, make it    
-    cmds.window(winName, title="Tread Maker and Rigger", sizeable=False)
+    cmds.window(winName, title="Tread Maker and Rigger", sizeable=False, menuBar=True)
     cmds.window(winName, edit=True, width=500)
+
+    # Menu to build without recording the undo queue
+    rigUtils.fastModeMenu()
     
     # Add UI elements
     populateWindow()
@@ -114,7 +190,18 @@ def populateWindow():
     cmds.text(align="left", font="boldLabelFont", label="Create circle using locators.")
     cmds.intSliderGrp("curveQuality", label="Curve quality", field=True, value=6, minValue=6, maxValue=20,
                       annotation="This is the number of points the curve will have to modify its shape.",
-                      statusBarMessage="This is the number of points the curve will have to modify its shape.")
+                      statusBarMessage="This is the number of points the curve will have to modify its shape.",
+                      cc=reportSections)
+
+    # Let the tool choose the fewest sections that follow the circle or the rollers closely enough
+    cmds.checkBox("adaptiveSections", label="Adaptive sections", cc=toggleAdaptiveSections, enable=beltPath.isAvailable(),
+                  annotation="Use the fewest sections that keep the curve within the tolerance of the tread path",
+                  statusBarMessage="Use the fewest sections that keep the curve within the tolerance of the tread path")
+    cmds.floatSliderGrp("sectionTolerance", label="Tolerance", field=True, value=0.05, minValue=0.001, maxValue=1.0,
+                        fieldMaxValue=100.0, precision=3, enable=False, cc=reportSections,
+                        annotation="The biggest distance allowed between the curve and the circle or the rollers",
+                        statusBarMessage="The biggest distance allowed between the curve and the circle or the rollers")
+    cmds.text("sectionReport", align="left", label="")
 
     # Setting the columns to 3 so the buttons can be centered
     # - separator - button - separator
@@ -126,6 +213,38 @@ def populateWindow():
     cmds.separator(width=150, style="none")
     # Get out of rowLayout
     cmds.setParent("..")
+
+    # Or wrap the tread around a sprocket, an idler and the road wheels
+    cmds.text(align="left", font="boldLabelFont", label="Or wrap the curve around rollers.")
+    cmds.text(align="left", label="Use locators with a rollerRadius attribute or the wheel meshes.")
+    cmds.textScrollList("rollerList", allowMultiSelection=True, height=80, width=500,
+                        annotation="The rollers the tread wraps around",
+                        statusBarMessage="The rollers the tread wraps around")
+
+    cmds.rowLayout(numberOfColumns=4, columnWidth4=(125,125,125,125))
+    cmds.button(label="Detect Rollers", c=detectRollers, width=125,
+                annotation="Find the wheels in the selected undercarriage meshes and add a roller locator on each one",
+                statusBarMessage="Find the wheels in the selected undercarriage meshes and add a roller locator on each one")
+    cmds.button(label="Add Roller Locator", c=addRollerLocator, width=125,
+                annotation="Create a locator with a rollerRadius attribute and add it to the list",
+                statusBarMessage="Create a locator with a rollerRadius attribute and add it to the list")
+    cmds.button(label="Add Selected", c=addSelectedRollers, width=125,
+                annotation="Add the selected locators or wheel meshes to the list",
+                statusBarMessage="Add the selected locators or wheel meshes to the list")
+    cmds.button(label="Remove", c=removeRollers, width=125,
+                annotation="Remove the highlighted rollers from the list",
+                statusBarMessage="Remove the highlighted rollers from the list")
+    cmds.setParent("..")
+
+    # Setting the columns to 3 so the buttons can be centered
+    # - separator - button - separator
+    cmds.rowLayout(numberOfColumns=3, columnWidth3=(150,200,150))
+    cmds.separator(width=150, style="none")
+    cmds.button(label="Make Belt Curve", c=makeBeltTread, width=200,
+                annotation="Create a curve that wraps around the rollers. It follows them until the tread is finalized.",
+                statusBarMessage="Create a curve that wraps around the rollers. It follows them until the tread is finalized.")
+    cmds.separator(width=150, style="none")
+    cmds.setParent("..")
     
     # Add separator at the end of frame layout
     cmds.separator(h=5)
@@ -181,16 +300,39 @@ def populateWindow():
     cmds.checkBox("bboxCheck", label="Use piece's bounding box", cc= lambda value: cmds.intSliderGrp("treadAmount",e=True, en=not value),
                     annotation="Use piece's measures to calculate the amount of pieces around the circle",
                     statusBarMessage="Use piece's measures to calculate the amount of pieces around the circle")
+    # Menu to choose how the pieces are put together
+    cmds.optionMenuGrp("treadMode", label="Build mode",
+                       annotation="Rigid pieces ride on the curve, their cost depends on the amount of pieces instead of vertices",
+                       statusBarMessage="Rigid pieces ride on the curve, their cost depends on the amount of pieces instead of vertices")
+    cmds.menuItem(label="Merged mesh")
+    cmds.menuItem(label="Rigid pieces")
+    cmds.menuItem(label="Instanced pieces")
+    # A second piece that replaces every Nth piece (i.e. links with guide horns), only for rigid and instanced pieces
+    cmds.textFieldButtonGrp("variantName", label="Variant piece", buttonLabel="Pick Selected", bc=pickingVariant,
+                            placeholderText="Selected Mesh",
+                            annotation="Optional piece used every Nth link. Only for rigid and instanced pieces.",
+                            statusBarMessage="Optional piece used every Nth link. Only for rigid and instanced pieces.")
+    cmds.intSliderGrp("variantEvery", l="Variant every", f=True, v=0, minValue=0, maxValue=20,
+                    annotation="Use the variant piece every this many links. 0 to not use it.",
+                    statusBarMessage="Use the variant piece every this many links. 0 to not use it.")
     # Amount of pieces around the circle
-    cmds.intSliderGrp("treadAmount", l="Amount of treads", f=True, v=20, minValue=1, maxValue=500, cc=RemakeTread,
+    cmds.intSliderGrp("treadAmount", l="Amount of treads", f=True, v=20, minValue=1, maxValue=500, fieldMaxValue=10000,
+                    cc=RemakeTread, dc=RemakeTread,
                     annotation="Define how many pieces to create around the circle",
                     statusBarMessage="Define how many pieces to create around the circle")
+    # Build a merged mesh in batches to keep the memory low on huge treads
+    cmds.checkBox("streamMerge", label="Merge in batches", cc=lambda value: cmds.intSliderGrp("streamBatch", e=True, en=value),
+                    annotation="Merge the pieces into the mesh a batch at a time, the memory used doesn't grow with the amount of pieces",
+                    statusBarMessage="Merge the pieces into the mesh a batch at a time, the memory used doesn't grow with the amount of pieces")
+    cmds.intSliderGrp("streamBatch", l="Batch size", f=True, v=100, minValue=10, maxValue=500, enable=False,
+                    annotation="The number of pieces merged into the mesh at a time",
+                    statusBarMessage="The number of pieces merged into the mesh at a time")
 
     # Setting the columns to 3 so the buttons can be centered
     # - separator - button - separator
     cmds.rowLayout(numberOfColumns=3, columnWidth3=(150,200,150))
     cmds.separator(width=150, style="none")
-    cmds.button(label="Make Tread Mesh", c=makeTreadObj, width=200,
+    cmds.button(label="Make Tread Mesh", c=lambda *args: startTreadBuild(makeTreadSteps(), "makeTreadObj"), width=200,
                 annotation="Create tread's mesh aroung circle using chose parameters.",
                 statusBarMessage="Create tread's mesh aroung circle using chose parameters.")
     cmds.separator(width=150, style="none")
@@ -201,21 +343,64 @@ def populateWindow():
     cmds.text(align="left", font="boldLabelFont", label="Finalize before modifying the curve points")
     cmds.text(align="left", label="Create main controller and curvePoints controllers")
 
+    # Menu to choose how the tread rotation is computed
+    cmds.optionMenuGrp("treadDrive", label="Tread drive",
+                       annotation="Utility nodes are faster and support parallel evaluation and cached playback",
+                       statusBarMessage="Utility nodes are faster and support parallel evaluation and cached playback")
+    cmds.menuItem(label="Utility nodes")
+    cmds.menuItem(label="Expression")
+
     # Setting the columns to 3 so the buttons can be centered
     # - separator - button - separator
     cmds.rowLayout(numberOfColumns=3, columnWidth3=(150,200,150))
     cmds.separator(width=150, style="none")
-    cmds.button(l="Finalize", c=finalizeTread, width=200,
+    cmds.button(l="Finalize", c=lambda *args: startTreadBuild(finalizeSteps(), "finalizeTread"), width=200,
                 annotation="Finalize by creating controllers on the curve.",
                 statusBarMessage="Finalize by creating controllers on the curve.")
     cmds.separator(width=150, style="none")
     cmds.setParent('..')
+
+    # Progress of the tread being built, it is built in chunks so the user can cancel it
+    cmds.rowLayout(numberOfColumns=3, columnWidth3=(150,250,100))
+    cmds.text("treadProgressStage", align="left", label="", width=150)
+    cmds.progressBar("treadProgress", width=250, maxValue=100)
+    cmds.button("treadCancel", label="Cancel", c=cancelTreadBuild, width=100, enable=False,
+                annotation="Stop the build and delete everything it made",
+                statusBarMessage="Stop the build and delete everything it made")
+    cmds.setParent('..')
+
+    # Setting the columns to 3 so the buttons can be centered
+    # - separator - button - separator
+    cmds.rowLayout(numberOfColumns=3, columnWidth3=(150,200,150))
+    cmds.separator(width=150, style="none")
+    cmds.button(l="Merge Pieces for Export", c=mergeTreadPieces, width=200,
+                annotation="Create a single mesh from the rigid or instanced pieces in their current position.",
+                statusBarMessage="Create a single mesh from the rigid or instanced pieces in their current position.")
+    cmds.separator(width=150, style="none")
+    cmds.setParent('..')
+
+    # Samples taken along one piece length for the periodic cache
+    cmds.intSliderGrp("cacheResolution", l="Cache resolution", f=True, v=16, minValue=2, maxValue=64,
+                    annotation="The number of deformed meshes saved for one piece length",
+                    statusBarMessage="The number of deformed meshes saved for one piece length")
+
+    # Setting the columns to 3 so the buttons can be centered
+    # - separator - button - separator
+    cmds.rowLayout(numberOfColumns=3, columnWidth3=(150,200,150))
+    cmds.separator(width=150, style="none")
+    cmds.button(l="Bake Periodic Cache", c=bakePeriodicCache, width=200,
+                annotation="Save the deformation of one piece length and use it instead of the wire. Moving the curve controllers turns it off.",
+                statusBarMessage="Save the deformation of one piece length and use it instead of the wire. Moving the curve controllers turns it off.")
+    cmds.separator(width=150, style="none")
+    cmds.setParent('..')
     
     cmds.setParent('..')
     cmds.setParent('..')
 
     return mainLayout
 
+@rigUtils.transaction
+@rigUtils.preserveSelection
 def initFunc(*args):
     """This function creates the locators"""
 
@@ -224,9 +409,8 @@ def initFunc(*args):
 
     # Create and scale locators
     data.firstLocator = cmds.spaceLocator(name="CircleLocator001")[0]
-    cmds.scale(4,4,4)
     data.secondLocator = cmds.spaceLocator(name="CircleLocator002")[0]
-    cmds.scale(4,4,4)
+    cmds.scale(4,4,4, data.firstLocator, data.secondLocator)
     
     # If there was a selection, use it as bounding box for locators
     if selection:
@@ -241,13 +425,11 @@ def initFunc(*args):
         # Using both y's to calculate the middle point
         midY = (selectionBbox[4]+selectionBbox[1])/2.0
 
-        # Select and move first locator to minimum Z on bounding box
-        cmds.select(data.firstLocator)
-        cmds.move(midX,midY,selectionBbox[2])
+        # Move first locator to minimum Z on bounding box
+        cmds.move(midX,midY,selectionBbox[2], data.firstLocator)
 
-        # Select and move first locator to maximum Z on bounding box
-        cmds.select(data.secondLocator)
-        cmds.move(midX,midY,selectionBbox[5])
+        # Move second locator to maximum Z on bounding box
+        cmds.move(midX,midY,selectionBbox[5], data.secondLocator)
 
 def makeProxyGeo():
     """This function creates a default proxy geo if the user does not provides one """
@@ -255,20 +437,12 @@ def makeProxyGeo():
     # Create a cube
     geo = cmds.polyCube(name="TreadProxyGeo", width=5, height=.5, depth=1, sx=5)[0]
     faces = [0,2,4,11,13]
-    cmds.select(clear=True)
-    
-    # Select specific faces to make desired shape
-    for f in faces:
-        cmds.select("%s.f[%s]"%(geo,f), add=True)
-
-    # Extrude those faces 
-    cmds.polyExtrudeFacet(thickness=.5, offset=.1)
 
-    # Select the geo itself
-    cmds.select(geo, r=True)
+    # Extrude specific faces to make desired shape
+    cmds.polyExtrudeFacet(["%s.f[%s]"%(geo,f) for f in faces], thickness=.5, offset=.1)
 
     # Delete its history
-    cmds.DeleteHistory()
+    rigUtils.deleteHistory(geo)
 
     # Return reference to the geo
     return geo
@@ -282,9 +456,10 @@ def renamePreMade():
         cmds.confirmDialog(t="Select a piece", m="Please choose a tread geometry")
         return
     
-    cmds.select(userObj)    
-    userObj = cmds.rename("TreadMesh")
+    userObj = cmds.rename(userObj, "TreadMesh")
 
+@rigUtils.transaction
+@rigUtils.preserveSelection
 def makeTread(*args):
     """This function creates the circle that represent the tread"""
 
@@ -295,37 +470,303 @@ def makeTread(*args):
     data.curveRadius = locDistance/2.0
     locCenter = (loc1Pos+loc2Pos)/2.0
     
-    # Create the curve
-    curveQuality = cmds.intSliderGrp("curveQuality", q=True, v=True)
-    data.treadCircle = cmds.circle(name="TreadCurve", radius=data.curveRadius, nr=(1,0,0), sections=curveQuality)[0]
-    data.treadCircle = checkDuplicatedName(data.treadCircle)
+    # Create the curve, with the fewest sections that follow the circle if the tool chooses them
+    tolerance = sectionTolerance()
+
+    if tolerance:
+        curveQuality = len(beltPath.adaptiveCvs(circlePath(data.curveRadius), tolerance)[0])
+    else:
+        curveQuality = cmds.intSliderGrp("curveQuality", q=True, v=True)
+
+    curveName = rigUtils.sharedNames().reserve("TreadCurve")
+    data.treadCircle = cmds.circle(name=curveName, radius=data.curveRadius, nr=(1,0,0), sections=curveQuality)[0]
     
     # ****************************************** Here we align the circle to the locators ********************************************
     
     # Create a group containing the locators
     locatorGroup = cmds.group(data.firstLocator, data.secondLocator, n="LocGroup")
 
-    # Select the circle
-    cmds.select(data.treadCircle)
-
-    # Select the group
-    cmds.select(locatorGroup, add=True)
-
-    # Align the circle to the group
-    cmds.align(x="mid", y="mid", z="mid", alignToLead=True)
+    # Align the circle to the group, the last object is the one that doesn't move
+    cmds.align(data.treadCircle, locatorGroup, x="mid", y="mid", z="mid", alignToLead=True)
 
     # Unparent the locators
     cmds.parent(data.firstLocator, data.secondLocator, world=True)
     # Delete the locator group
     cmds.delete(locatorGroup)
     
-    # Finish selecting the curve
-    cmds.select(data.treadCircle)
-    cmds.FreezeTransformations()
-    cmds.DeleteHistory()
+    # Finish cleaning the curve
+    rigUtils.freezeTransformations(data.treadCircle)
+    rigUtils.deleteHistory(data.treadCircle)
+
+    # The tread is a circle now
+    data.rollers = []
+    watchRollers([])
+
+    reportSections()
+
+def sectionTolerance():
+    """This function returns the tolerance of the adaptive sections, or None to use the Curve quality slider"""
+
+    if not beltPath.isAvailable() or not cmds.checkBox("adaptiveSections", exists=True):
+        return None
+
+    if not cmds.checkBox("adaptiveSections", query=True, value=True):
+        return None
+
+    return cmds.floatSliderGrp("sectionTolerance", query=True, value=True)
+
+def toggleAdaptiveSections(value):
+    """This function switches between the Curve quality slider and the tolerance"""
+
+    cmds.intSliderGrp("curveQuality", edit=True, enable=not value)
+    cmds.floatSliderGrp("sectionTolerance", edit=True, enable=value)
+    reportSections()
+
+def circlePath(radius):
+    """This function returns the path of the tread circle, as a belt around a single roller
+
+    Parameters
+    ----------
+    radius : float
+        The radius of the circle
+    """
+
+    return beltPath.computePath([(0.0, 0.0, 0.0)], [radius])
+
+def reportSections(*args):
+    """This function shows how many sections, controllers and nodes the curve will have, before building it"""
+
+    if not cmds.text("sectionReport", exists=True):
+        return
+
+    if not beltPath.isAvailable():
+        cmds.text("sectionReport", edit=True, label="NumPy is needed to measure the curve sections.")
+        return
+
+    tolerance = sectionTolerance()
+    rollers = rigUtils.existingNodes(cmds.textScrollList("rollerList", query=True, allItems=True) or [])
+
+    # The rollers are used if there are any, otherwise the circle between the locators
+    if rollers:
+        path = beltPath.computePath(*beltPath.getRollers(rollers))
+        sectionStep = beltPath.MAX_ARC_STEP
+    elif cmds.objExists(data.firstLocator) and cmds.objExists(data.secondLocator):
+        radius = abs(cmds.getAttr("{}.translateZ".format(data.firstLocator)) -
+                     cmds.getAttr("{}.translateZ".format(data.secondLocator)))/2.0
+        path = circlePath(radius)
+        sectionStep = 360.0/cmds.intSliderGrp("curveQuality", query=True, value=True)
+    else:
+        cmds.text("sectionReport", edit=True, label="Initialize the locators or add rollers to measure the curve.")
+        return
+
+    if tolerance:
+        cvs, deviation = beltPath.adaptiveCvs(path, tolerance)
+    else:
+        cvs = beltPath.pathCvs(path, sectionStep)
+        deviation = beltPath.pathDeviation(path, cvs)
+
+    # Every section of a periodic curve gets an edit point, and every edit point a controller
+    sections = len(cvs)
+    cmds.text("sectionReport", edit=True,
+              label="{0} sections: {0} curve controllers and about {1} nodes when finalized. Deviation {2:.4f}".format(
+                  sections, sections*NODES_PER_SECTION, deviation))
+
+def addRollerLocator(*args):
+    """This function creates a roller locator and adds it to the list of rollers"""
+
+    name = rigUtils.sharedNames().reserve("RollerLocator")
+    locator = beltPath.addRollerLocator(name, radius=data.curveRadius or 1.0)
+    cmds.textScrollList("rollerList", edit=True, append=locator)
+    reportSections()
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
+def detectRollers(*args):
+    """This function adds a roller locator on every wheel found in the selected meshes"""
+
+    if not rollerDetection.isAvailable():
+        cmds.confirmDialog(t="Detect rollers", m="NumPy is needed to detect the rollers")
+        return
+
+    selection = cmds.ls(selection=True, transforms=True)
+    if not selection:
+        cmds.confirmDialog(t="Detect rollers", m="Please select the meshes of the undercarriage")
+        return
+
+    centers, radii = rollerDetection.detectRollers(selection)
+
+    if not len(radii):
+        cmds.confirmDialog(t="Detect rollers", m="No round pieces were found in the selected meshes")
+        return
+
+    names = rigUtils.sharedNames().reserveBatch("RollerLocator", len(radii))
+
+    for name, center, radius in zip(names, centers.tolist(), radii.tolist()):
+        locator = beltPath.addRollerLocator(name, radius=radius)
+        rigUtils.moveTo(locator, center)
+        cmds.textScrollList("rollerList", edit=True, append=locator)
+
+    reportSections()
+
+def addSelectedRollers(*args):
+    """This function adds the selected objects to the list of rollers"""
+
+    current = cmds.textScrollList("rollerList", query=True, allItems=True) or []
+
+    for node in cmds.ls(selection=True, transforms=True):
+        if node not in current:
+            cmds.textScrollList("rollerList", edit=True, append=node)
+
+    reportSections()
+
+def removeRollers(*args):
+    """This function removes the highlighted rollers from the list"""
+
+    for node in cmds.textScrollList("rollerList", query=True, selectItem=True) or []:
+        cmds.textScrollList("rollerList", edit=True, removeItem=node)
+
+    reportSections()
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
+def makeBeltTread(*args):
+    """This function creates the tread curve around the rollers, or updates it if it was made before"""
+
+    # The rollers in the list that still exist, none if the list is empty
+    rollers = rigUtils.existingNodes(cmds.textScrollList("rollerList", query=True, allItems=True) or [])
+
+    if not beltPath.isAvailable():
+        cmds.confirmDialog(t="Belt curve", m="NumPy is needed to wrap the curve around rollers")
+        return
+
+    if not rollers:
+        cmds.confirmDialog(t="Belt curve", m="Please add the rollers the tread wraps around")
+        return
+
+    # The curve is only updated if it is still the belt curve and it has not been finalized
+    curve = data.treadCircle if beltCurveEditable() else None
+    curveName = rigUtils.sharedNames().reserve("TreadCurve")
+    data.treadCircle, path = beltPath.makeBeltCurve(rollers, name=curveName, curve=curve, tolerance=sectionTolerance())
+    data.rollers = rollers
+
+    # The main controller is made with this radius, so it has to cover the whole belt
+    bbox = cmds.exactWorldBoundingBox(data.treadCircle)
+    data.curveRadius = max(bbox[4]-bbox[1], bbox[5]-bbox[2])/2.0
+
+    watchRollers(rollers)
+    reportSections()
+
+def beltCurveEditable():
+    """This function returns True if the tread curve is a belt curve that is not driven by controllers yet"""
+
+    if not data.rollers or not cmds.objExists(data.treadCircle):
+        return False
+
+    # Finalizing adds point on curve constraints to the curve
+    curveShape = cmds.listRelatives(data.treadCircle, shapes=True, path=True)[0]
+    return not cmds.listConnections("{}.create".format(curveShape), source=True, destination=False)
+
+def watchRollers(rollers):
+    """This function updates the belt curve whenever a roller moves or changes its radius
+
+    The jobs are parented to the window, so they are deleted with it.
+
+    Parameters
+    ----------
+    rollers : list
+        The names of the rollers to watch, the previous ones are not watched anymore
+    """
+
+    for job in watchRollers.jobs:
+        if cmds.scriptJob(exists=job):
+            cmds.scriptJob(kill=job, force=True)
+    watchRollers.jobs = []
+
+    if not cmds.window("TreadMaker", exists=True):
+        return
+
+    for roller in rollers:
+        attributes = ["translate"]
+        if cmds.attributeQuery(beltPath.RADIUS_ATTRIBUTE, node=roller, exists=True):
+            attributes.append(beltPath.RADIUS_ATTRIBUTE)
+
+        for attribute in attributes:
+            watchRollers.jobs.append(cmds.scriptJob(attributeChange=["{}.{}".format(roller, attribute), updateBeltTread],
+                                                    parent="TreadMaker"))
+
+# Function attribute, it keeps the ids of the jobs between calls
+watchRollers.jobs = []
+
+def updateBeltTread():
+    """This function moves the CVs of the belt curve to follow the rollers"""
+
+    if not beltCurveEditable():
+        return
+
+    rollers = rigUtils.existingNodes(data.rollers)
+    if not rollers:
+        return
+
+    # The curve is made again only if it needs a different amount of CVs
+    data.treadCircle = beltPath.makeBeltCurve(rollers, name=data.treadCircle, curve=data.treadCircle,
+                                              tolerance=sectionTolerance())[0]
     
+def startTreadBuild(steps, name):
+    """This function runs a build step from the idle queue, showing its progress in the window
+
+    If it is cancelled or fails, the nodes it made are deleted and the tread data is restored.
+
+    Parameters
+    ----------
+    steps : generator
+        The steps to run, i.e. makeTreadSteps() or finalizeSteps()
+    name : str
+        The name of the step that runs them at once (i.e. makeTreadObj), for its undo chunks and the profiler
+    """
+
+    if startTreadBuild.task and startTreadBuild.task.running:
+        cmds.confirmDialog(t="Tread build", m="Wait for the current build to finish or cancel it")
+        steps.close()
+        return
+
+    # Keep a copy of the data, the lists are copied as the steps append to them
+    savedData = dict((key, list(value) if isinstance(value, list) else value) for key, value in data.__dict__.items())
+
+    def onCancel():
+        data.__dict__.update(savedData)
+        onFinish(None)
+
+    def onFinish(result):
+        if cmds.button("treadCancel", exists=True):
+            cmds.button("treadCancel", edit=True, enable=False)
+
+    startTreadBuild.task = chunkedTask.ChunkedTask(steps, progressBar="treadProgress", statusText="treadProgressStage",
+                                                   onFinish=onFinish, onCancel=onCancel, name=name)
+    cmds.button("treadCancel", edit=True, enable=True)
+    startTreadBuild.task.start()
+
+# Function attribute, the task being run or the last one, its timings are kept in it
+startTreadBuild.task = None
+
+def cancelTreadBuild(*args):
+    """This function stops the build that is running and rolls it back"""
+
+    if startTreadBuild.task:
+        startTreadBuild.task.cancel()
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
 def makeTreadObj(*args):
-    """This function makes a tread out of the selected object"""
+    """This function makes a tread out of the selected object, all at once"""
+
+    chunkedTask.run(makeTreadSteps())
+
+def makeTreadSteps():
+    """This function makes a tread out of the selected object, one step at a time
+
+    It is a generator that yields the stage it is in and its progress,
+    so startTreadBuild can run it from the idle queue.
+    """
 
     usePreMade = cmds.radioButton("premadeGeo", query=True, select=True)
     
@@ -347,51 +788,104 @@ def makeTreadObj(*args):
             cmds.confirmDialog(t="Select a piece", m="Please choose a piece to build a tread or tick proxy option")
             return
     
-    cmds.select(userObj, replace=True)
-    
+    yield "Measuring curve", 0.0
+
+    # Measure the curve, it might not be a circle anymore if the user moved its CVs
+    if arcLength.isAvailable():
+        data.arcLengthTable = arcLength.getTable(data.treadCircle, data.arcLengthTable)
+    else:
+        data.arcLengthTable = None
+
     # Verify if we want to use the actual measures of the object
     useBbox = cmds.checkBox("bboxCheck", q=True, v=True)
     
     if useBbox:
     
         bbox = cmds.exactWorldBoundingBox(userObj)
-        radius = data.curveRadius
-        perimeter = 2*3.14159*radius
         bboxDistance = abs(bbox[2]-bbox[-1])
         bboxDistance*=.85
-        amount = round(perimeter / bboxDistance)
+
+        # Fit as many pieces as possible along the length of the curve
+        if data.arcLengthTable:
+            amount = data.arcLengthTable.pieceCount(bboxDistance)
+        else:
+            amount = max(1, round(cmds.arclen(data.treadCircle) / bboxDistance))
         
     else:
         amount = cmds.intSliderGrp("treadAmount", q=True, v=True)
-     
-    
-    cmds.select(data.treadCircle, add=True)
-    pathAnimation = cmds.pathAnimation(fm=True, f=True, fa="z", ua="y", stu=1, etu=amount, wu=(0,1,0), iu=False)
-    
-    # Adjust animCurve
-    cmds.selectKey("{}_uValue".format(pathAnimation), time=(1,amount))
-    cmds.keyTangent(itt="linear", ott="linear")
-    
-    #Creating snapshot
-    cmds.snapshot(n="TreadSnapShot", ch=False, i=1, st=1, et=amount, update="animCurve")
-    cmds.DeleteMotionPaths()
-    cmds.select("TreadSnapShotGroup", r=True)
-    
-    if not amount == 1:
-        data.treadMesh = cmds.polyUnite(n="TreadMesh", ch=False)[0]
-        data.treadMesh = checkDuplicatedName(data.treadMesh)
-        
+
+    amount = int(amount)
+
+    # Rotating the base wire this many degrees scrolls the tread one piece
+    data.pieceSpacing = 360.0/amount
+
+    # Get a name that is not used in the scene
+    meshName = rigUtils.sharedNames().reserve("TreadMesh")
+
+    # A merged mesh can be built in batches, 0 builds it at once
+    batchSize = 0
+    if cmds.checkBox("streamMerge", exists=True) and cmds.checkBox("streamMerge", query=True, value=True):
+        batchSize = cmds.intSliderGrp("streamBatch", query=True, value=True)
+
+    # Get the build mode from the menu, its items start at 1
+    if cmds.optionMenuGrp("treadMode", exists=True):
+        data.buildMode = BUILD_MODES[cmds.optionMenuGrp("treadMode", query=True, select=True)-1]
     else:
-        piece = cmds.listRelatives(cmds.ls(selection=True))[0]
-        cmds.select(piece)
-        cmds.parent(world=True)
-        piece = cmds.rename("TreadMesh")
-        cmds.DeleteHistory()
-        
-    cmds.delete("TreadSnapShotGroup")
+        data.buildMode = BUILD_MODES[0]
+
+    if data.buildMode != "merged":
+        # Every piece is a copy or an instance of the piece that rides on the curve
+        variant = cmds.textFieldButtonGrp("variantName", query=True, text=True)
+        variantEvery = cmds.intSliderGrp("variantEvery", query=True, value=True)
+
+        if variant and not cmds.objExists(variant):
+            cmds.confirmDialog(t="Variant piece", m="The variant piece {} doesn't exist".format(variant))
+            return
+
+        data.pieceData = None
+        for step in rigidTreadSteps(userObj, data.treadCircle, amount, name=meshName,
+                                    instanced=data.buildMode == "instanced", variant=variant, variantEvery=variantEvery):
+            if isinstance(step, chunkedTask.Result):
+                data.treadMesh = step.value
+            else:
+                yield step
+
+        # Hide the variant geo as well
+        if variant and variantEvery:
+            cmds.setAttr("%s.visibility"%variant, False)
+    elif treadLayout.isAvailable():
+        yield "Building mesh", 0.0
+
+        # Keep the piece's geometry so the tread can be resized later
+        data.pieceData = treadLayout.getMeshData(userObj)
+
+        if batchSize:
+            # Build the mesh a batch of pieces at a time, so huge treads don't run out of memory
+            for mesh, piecesDone in treadLayout.streamTreadMesh(data.pieceData, data.treadCircle, amount, batchSize,
+                                                                name=meshName, table=data.arcLengthTable):
+                data.treadMesh = mesh
+                yield "Merging batches", float(piecesDone)/amount
+        else:
+            # Compute every piece's transform from the curve and build the mesh in one step
+            data.treadMesh = treadLayout.buildTreadMesh(data.pieceData, data.treadCircle, amount, name=meshName,
+                                                        table=data.arcLengthTable)
+    else:
+        yield "Building mesh", 0.0
+
+        # Without NumPy, place the pieces with a motion path and snapshots
+        data.pieceData = None
+        for step in snapshotTreadSteps(userObj, data.treadCircle, amount, name=meshName, batchSize=batchSize):
+            if isinstance(step, chunkedTask.Result):
+                data.treadMesh = step.value
+            else:
+                yield step
         
-    cmds.select(data.treadMesh, r=True)
-    cmds.CenterPivot()
+    rigUtils.centerPivot(data.treadMesh)
+
+    yield "Building proxy", 0.0
+
+    # Build a low resolution version of the tread for playback
+    buildProxy(userObj, amount)
     
     # Hide original geo
     cmds.setAttr("%s.visibility"%userObj, False)
@@ -400,69 +894,642 @@ def makeTreadObj(*args):
     if cmds.objExists("TreadProxyGeo"):
         cmds.delete("TreadProxyGeo")
 
+def makeProxyPiece(userObj, name="TreadProxyPiece"):
+    """This function creates a box with the size of the piece to use as its low resolution version
+
+    Parameters
+    ----------
+    userObj : str
+        The name of the piece
+    name : str
+        The name for the box
+
+    Returns
+    -------
+    str
+        The name of the box
+    """
+
+    # The bounding box of the shape is in object space, like the points used to build the tread
+    shape = cmds.listRelatives(userObj, shapes=True, noIntermediate=True, path=True)[0]
+    minPoint = cmds.getAttr("{}.boundingBoxMin".format(shape))[0]
+    maxPoint = cmds.getAttr("{}.boundingBoxMax".format(shape))[0]
+
+    box = cmds.polyCube(name=name, width=maxPoint[0]-minPoint[0], height=maxPoint[1]-minPoint[1],
+                        depth=maxPoint[2]-minPoint[2])[0]
+
+    # Move the box to the center of the piece and make it its zero position
+    cmds.move((minPoint[0]+maxPoint[0])/2.0, (minPoint[1]+maxPoint[1])/2.0, (minPoint[2]+maxPoint[2])/2.0, box)
+    rigUtils.freezeTransformations(box)
+    rigUtils.deleteHistory(box)
+
+    return box
+
+def buildProxy(userObj, amount):
+    """This function builds the low resolution version of the tread
+
+    A merged tread gets a second mesh made of boxes. Rigid and instanced pieces get
+    the shape of a hidden box instanced under every piece, so it rides with them.
+    The proxy stays hidden until the tread is finalized, then displayLevel shows it.
+
+    Parameters
+    ----------
+    userObj : str
+        The name of the piece
+    amount : int
+        The number of pieces
+    """
+
+    names = rigUtils.sharedNames()
+    proxyPiece = makeProxyPiece(userObj, names.reserve("TreadProxyPiece"))
+
+    if data.buildMode == "merged":
+        meshName = names.reserve("TreadProxyMesh")
+
+        # Build it in the same way as the tread mesh
+        if data.pieceData:
+            data.proxyData = treadLayout.getMeshData(proxyPiece)
+            data.proxyMesh = treadLayout.buildTreadMesh(data.proxyData, data.treadCircle, amount, name=meshName,
+                                                        table=data.arcLengthTable)
+        else:
+            data.proxyData = None
+            data.proxyMesh = snapshotTread(proxyPiece, data.treadCircle, amount, name=meshName)
+
+        cmds.delete(proxyPiece)
+        cmds.setAttr("{}.visibility".format(data.proxyMesh), False)
+        return
+
+    # Keep the box hidden in the group of pieces and add an instance of its shape to every piece
+    data.proxyData = None
+    data.proxyMesh = cmds.parent(proxyPiece, data.treadMesh)[0]
+    cmds.setAttr("{}.visibility".format(data.proxyMesh), False)
+
+    proxyShape = cmds.listRelatives(data.proxyMesh, shapes=True, path=True)[0]
+    for piece in data.treadPieces:
+        cmds.parent(proxyShape, piece, add=True, shape=True)
+
+    cmds.setAttr("{}.visibility".format(proxyShape), False)
+
+def snapshotTread(userObj, curve, amount, name="TreadMesh", batchSize=0):
+    """This function places the pieces by animating them on a motion path and taking snapshots, all at once
+
+    It takes the same parameters as snapshotTreadSteps and returns the name of the tread mesh.
+    """
+
+    return chunkedTask.run(snapshotTreadSteps(userObj, curve, amount, name, batchSize))
+
+def snapshotTreadSteps(userObj, curve, amount, name="TreadMesh", batchSize=0):
+    """This function places the pieces by animating them on a motion path and taking snapshots
+
+    The motion path goes around the curve in amount+1 frames and the snapshots are taken
+    on the first amount frames, so the last piece doesn't land on top of the first one.
+
+    With a batch size, the snapshots are taken a batch at a time and merged into the
+    tread mesh right away, so only one batch of pieces exists at a time.
+
+    Parameters
+    ----------
+    userObj : str
+        The name of the piece to repeat along the curve
+    curve : str
+        The name of the tread curve
+    amount : int
+        The number of pieces
+    name : str
+        The name for the tread mesh
+    batchSize : int
+        The number of snapshots merged at a time, 0 to merge them all at the end
+
+    Yields
+    ------
+    tuple
+        The stage and the fraction of the pieces made, then a Result with the name of the tread mesh
+    """
+
+    batchSize = batchSize or amount
+
+    pathAnimation = cmds.pathAnimation(userObj, curve=curve, fm=True, f=True, fa="z", ua="y", stu=1, etu=amount+1,
+                                       wu=(0,1,0), iu=False)
+    
+    # Adjust animCurve
+    uValueCurve = "{}_uValue".format(pathAnimation)
+    cmds.keyTangent(uValueCurve, edit=True, time=(1,amount+1), itt="linear", ott="linear")
+    
+    treadMesh = None
+
+    for first in range(1, amount + 1, batchSize):
+        last = min(first + batchSize - 1, amount)
+
+        #Creating snapshot
+        cmds.snapshot(userObj, n="TreadSnapShot", ch=False, i=1, st=first, et=last, update="animCurve")
+
+        # Every piece of the batch exists at this point
+        yield "Taking snapshots", float(last)/amount
+
+        pieces = cmds.listRelatives("TreadSnapShotGroup", children=True, fullPath=True)
+
+        # Merge the batch into the mesh made so far
+        if treadMesh:
+            pieces.insert(0, treadMesh)
+
+        if len(pieces) > 1:
+            merged = cmds.polyUnite(pieces, n="{}Merged".format(name), ch=False)[0]
+
+            # Without history polyUnite leaves the empty transforms behind
+            if treadMesh and cmds.objExists(treadMesh):
+                cmds.delete(treadMesh)
+            treadMesh = merged
+
+        else:
+            treadMesh = cmds.parent(pieces[0], world=True)[0]
+            rigUtils.deleteHistory(treadMesh)
+
+        cmds.delete("TreadSnapShotGroup")
+
+    # Delete the motion path and its animation
+    cmds.delete(pathAnimation, uValueCurve)
+
+    treadMesh = cmds.rename(treadMesh, name)
+
+    yield chunkedTask.Result(treadMesh)
+
+def rigidTread(userObj, curve, amount, name="TreadMesh", instanced=False, variant=None, variantEvery=0):
+    """This function places a copy of the piece on the curve for every link of the tread, all at once
+
+    It takes the same parameters as rigidTreadSteps and returns the name of the group of pieces.
+    """
+
+    return chunkedTask.run(rigidTreadSteps(userObj, curve, amount, name, instanced, variant, variantEvery))
+
+def rigidTreadSteps(userObj, curve, amount, name="TreadMesh", instanced=False, variant=None, variantEvery=0):
+    """This function places a copy of the piece on the curve for every link of the tread
+
+    Each piece rides on the curve with its own motion path, so reshaping the curve moves
+    the pieces without deforming them. The position of a piece on the curve is its
+    fraction of the length (index/amount) plus an offset shared by every piece, the
+    result is wrapped so the pieces go around the curve.
+
+    When instanced, the geometry is saved once in a hidden source piece (and once more for
+    the variant) and every piece is an instance of it, so the memory and the file size
+    depend on the number of different pieces instead of the amount of pieces.
+
+    Parameters
+    ----------
+    userObj : str
+        The name of the piece to repeat along the curve
+    curve : str
+        The name of the tread curve
+    amount : int
+        The number of pieces
+    name : str
+        The name for the group of pieces
+    instanced : bool
+        If True, the pieces are instances instead of copies
+    variant : str
+        The name of an optional second piece
+    variantEvery : int
+        The variant is used on the first piece and then every variantEvery pieces, 0 to not use it
+
+    Yields
+    ------
+    tuple
+        The stage and the fraction of the pieces made, then a Result with the name of the group of pieces
+    """
+
+    curveShape = cmds.listRelatives(curve, shapes=True, path=True)[0]
+    names = rigUtils.sharedNames()
+    pieceNames = names.reserveBatch("TreadPiece", amount)
+
+    if not variant:
+        variantEvery = 0
+
+    sources = []
+
+    if instanced:
+        # Keep hidden copies as sources, the user's piece (or the proxy) might be deleted later
+        userObj = cmds.duplicate(userObj, name=names.reserve("TreadSourcePiece"))[0]
+        sources.append(userObj)
+
+        if variantEvery:
+            variant = cmds.duplicate(variant, name=names.reserve("TreadSourceVariant"))[0]
+            sources.append(variant)
+
+    data.treadPieces = []
+    data.pieceOffsets = []
+
+    for index, pieceName in enumerate(pieceNames):
+        source = variant if variantEvery and index % variantEvery == 0 else userObj
+
+        if instanced:
+            piece = cmds.instance(source, name=pieceName)[0]
+        else:
+            piece = cmds.duplicate(source, name=pieceName)[0]
+
+        # The original piece might be hidden from a previous build
+        cmds.setAttr("{}.visibility".format(piece), True)
+
+        data.treadPieces.append(piece)
+        data.pieceOffsets.append(attachToCurve(piece, curveShape, float(index)/amount))
+
+        yield "Placing pieces", float(index + 1)/amount
+
+    pieceGroup = cmds.group(data.treadPieces + sources, name=name)
+
+    # The motion paths place the pieces in world space, so the group must not move them again
+    cmds.setAttr("{}.inheritsTransform".format(pieceGroup), False)
+
+    for source in sources:
+        cmds.setAttr("{}.visibility".format(source), False)
+
+    yield chunkedTask.Result(pieceGroup)
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
+def mergeTreadPieces(*args):
+    """This function merges the rigid or instanced pieces into a single mesh, for exporting
+
+    The pieces are copied in their current position, the rig is not modified.
+    Only their full resolution shapes are merged, the proxy box instanced under them is left out.
+
+    Returns
+    -------
+    str
+        The name of the merged mesh
+    """
+
+    pieces = rigUtils.existingNodes(data.treadPieces)
+
+    if data.buildMode == "merged" or not pieces:
+        cmds.confirmDialog(t="Merge pieces", m="Build the tread with rigid or instanced pieces first")
+        return
+
+    # Duplicating an instance makes a real copy of its geometry
+    copies = [cmds.duplicate(piece)[0] for piece in pieces]
+
+    # Every piece also carries an instance of the hidden proxy box, its copy is left out of the export mesh
+    if data.proxyMesh and cmds.objExists(data.proxyMesh):
+        proxyShape = cmds.listRelatives(data.proxyMesh, shapes=True, path=True)[0]
+        proxyUuid = cmds.ls(proxyShape, uuid=True)[0]
+
+        proxyCopies = []
+        for piece, copy in zip(pieces, copies):
+            # The shapes of the copy are in the same order as the shapes of the piece
+            pieceShapes = cmds.listRelatives(piece, shapes=True, path=True) or []
+            copyShapes = cmds.listRelatives(copy, shapes=True, path=True) or []
+            proxyCopies.extend(copyShape for pieceShape, copyShape in zip(pieceShapes, copyShapes)
+                               if cmds.ls(pieceShape, uuid=True)[0] == proxyUuid)
+
+        if proxyCopies:
+            cmds.delete(proxyCopies)
+
+    # The group doesn't move the pieces, so taking them out of it keeps them in place
+    copies = cmds.parent(copies, world=True)
+
+    meshName = rigUtils.sharedNames().reserve("TreadExportMesh")
+
+    if len(copies) == 1:
+        return cmds.rename(copies[0], meshName)
+
+    return cmds.polyUnite(copies, name=meshName, constructionHistory=False)[0]
+
+def attachToCurve(piece, curveShape, fraction):
+    """This function makes a piece ride on the curve at a fraction of its length
+
+    The motion path uses the same settings as snapshotTread: the front axis (Z) follows
+    the curve and the up axis (Y) points to world up.
+
+    Parameters
+    ----------
+    piece : str
+        The name of the piece
+    curveShape : str
+        The name of the shape of the tread curve
+    fraction : float
+        The position of the piece on the curve, from 0 to 1
+
+    Returns
+    -------
+    str
+        The name of the addDoubleLinear node whose input1 receives the shared offset
+    """
+
+    motionPath = cmds.createNode("motionPath", name="{}MotionPath".format(piece), skipSelect=True)
+    cmds.connectAttr("{}.worldSpace[0]".format(curveShape), "{}.geometryPath".format(motionPath))
+
+    # Use the length of the curve instead of its parameters, follow it with Z and keep Y up
+    cmds.setAttr("{}.fractionMode".format(motionPath), True)
+    cmds.setAttr("{}.follow".format(motionPath), True)
+    cmds.setAttr("{}.frontAxis".format(motionPath), 2)
+    cmds.setAttr("{}.upAxis".format(motionPath), 1)
+    cmds.setAttr("{}.worldUpType".format(motionPath), 3)
+    cmds.setAttr("{}.worldUpVector".format(motionPath), 0, 1, 0, type="double3")
+
+    cmds.connectAttr("{}.rotateOrder".format(piece), "{}.rotateOrder".format(motionPath))
+    cmds.connectAttr("{}.allCoordinates".format(motionPath), "{}.translate".format(piece))
+    cmds.connectAttr("{}.rotate".format(motionPath), "{}.rotate".format(piece))
+
+    # position = fraction + offset, the offset is connected to input1 when the tread is finalized
+    position = cmds.createNode("addDoubleLinear", name="{}Position".format(piece), skipSelect=True)
+    cmds.setAttr("{}.input2".format(position), fraction)
+
+    # A linear curve from 0 to 1 that repeats itself wraps the position between 0 and 1
+    wrap = cmds.createNode("animCurveUU", name="{}Wrap".format(piece), skipSelect=True)
+    cmds.setKeyframe(wrap, float=0, value=0, inTangentType="linear", outTangentType="linear")
+    cmds.setKeyframe(wrap, float=1, value=1, inTangentType="linear", outTangentType="linear")
+    cmds.setInfinity(wrap, preInfinite="cycle", postInfinite="cycle")
+
+    cmds.connectAttr("{}.output".format(position), "{}.input".format(wrap))
+    cmds.connectAttr("{}.output".format(wrap), "{}.uValue".format(motionPath))
+
+    return position
+
+def deleteTread():
+    """This function deletes the tread mesh, or the pieces and the nodes that place them on the curve"""
+
+    nodes = [data.treadMesh]
+
+    if data.buildMode == "merged":
+        nodes.append(data.proxyMesh)
+
+        # The nodes of the periodic cache drive the mesh
+        if data.cacheNodes:
+            treadCache.unwatch(data.mainController)
+            nodes += data.cacheNodes
+            data.cacheNodes = []
+    else:
+        pieces = rigUtils.existingNodes(data.treadPieces)
+        offsets = rigUtils.existingNodes(data.pieceOffsets)
+
+        # The motion paths and the wrap curves are not deleted with the pieces
+        if pieces:
+            nodes += cmds.listConnections(pieces, type="motionPath", source=True, destination=False) or []
+        if offsets:
+            nodes += cmds.listConnections(offsets, type="animCurveUU", source=False, destination=True) or []
+            nodes += offsets
+
+    # An empty list would delete the selection
+    nodes = rigUtils.existingNodes(nodes)
+    if nodes:
+        cmds.delete(nodes)
+
 def RemakeTread(*args):
-    """This function remakes the tread if the user changes the amount of pieces"""
+    """This function remakes the tread if the user changes the amount of pieces
+
+    The slider calls this function many times while it is dragged, so the rebuild
+    is deferred until Maya is idle. Only one rebuild is scheduled at a time and
+    it uses the last value of the slider.
+    """
+
+    # A rebuild is already waiting, it will use the newest value
+    if RemakeTread.pending:
+        return
+
+    RemakeTread.pending = True
+    cmds.evalDeferred(rebuildTread, lowestPriority=True)
+
+# Saves whether a rebuild is scheduled
+RemakeTread.pending = False
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
+def rebuildTread():
+    """This function changes the amount of pieces of the tread mesh
+
+    If the piece's geometry is known and the mesh has not been deformed yet,
+    only the pieces that changed are added or removed. Otherwise the mesh is made again.
+    """
+
+    RemakeTread.pending = False
+
+    # The window might have been closed before Maya was idle
+    if not cmds.objExists(data.treadMesh) or not cmds.intSliderGrp("treadAmount", exists=True):
+        return
+
+    amount = cmds.intSliderGrp("treadAmount", q=True, v=True)
 
-    if cmds.objExists(data.treadMesh):
-        cmds.select(data.treadMesh,r=True)
-        cmds.delete()
+    # Pieces that ride on the curve are made again
+    if data.buildMode != "merged":
+        deleteTread()
         makeTreadObj()
+        return
+
+    # A mesh with history (i.e. the wire deformer) can't be edited in place
+    meshShape = cmds.listRelatives(data.treadMesh, shapes=True, noIntermediate=True, path=True)[0]
+    hasHistory = cmds.listConnections("{}.inMesh".format(meshShape), source=True, destination=False)
+
+    if data.pieceData and treadLayout.isAvailable() and not hasHistory:
+        # Only the spans of the curve that changed since the last build are measured again
+        data.arcLengthTable = arcLength.getTable(data.treadCircle, data.arcLengthTable)
+
+        treadLayout.resizeTreadMesh(data.treadMesh, data.pieceData, data.treadCircle, amount,
+                                    table=data.arcLengthTable)
+        data.pieceSpacing = 360.0/amount
+
+        if data.proxyData and cmds.objExists(data.proxyMesh):
+            treadLayout.resizeTreadMesh(data.proxyMesh, data.proxyData, data.treadCircle, amount,
+                                        table=data.arcLengthTable)
+    else:
+        deleteTread()
+        makeTreadObj()
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
+def finalizeTread(*args):
+    """This function creates a wire deformer that drives the shape of the mesh with a curve, all at once"""
+
+    chunkedTask.run(finalizeSteps())
 
-def finalizeTread(*args):    
-    """This function creates a wire deformer that drives the shape of the mesh with a curve"""
+def finalizeSteps():
+    """This function creates a wire deformer that drives the shape of the mesh with a curve, one step at a time"""
+
+    yield "Adding wire deformer", 0.0
+
+    # The names of the whole step come from one index of the scene
+    names = rigUtils.sharedNames()
 
     # Here we make wire deformer
     def makeWire(geo, CCurve, dropOffD=10):
         theWire = cmds.wire(geo, w=CCurve, n ="inputWire")
         wireNode = theWire[0]
-        data.treadBaseWire = "{}BaseWire".format(CCurve)
-        data.treadBaseWire = checkDuplicatedName(data.treadBaseWire)
+
+        # The base wire is connected to the deformer, so we get its name from the connection
+        data.treadBaseWire = cmds.listConnections("{}.baseWire[0]".format(wireNode), source=True, destination=False)[0]
         
         # Change dropoff distance
         cmds.setAttr("%s.dropoffDistance[0]"%wireNode, dropOffD)
+
+        return wireNode
     
-    makeWire(data.treadMesh, data.treadCircle, 35)
-    
-    cmds.select(data.treadCircle, r=True)
+    # Only the merged mesh is deformed, the pieces already ride on the curve
+    if data.buildMode == "merged":
+        data.treadWire = makeWire(data.treadMesh, data.treadCircle, 35)
+        wireCurves = [data.treadCircle, data.treadBaseWire]
+
+        # The proxy gets its own wire so it can be turned off, but it shares the base wire
+        data.proxyWire = ""
+        if cmds.objExists(data.proxyMesh):
+            data.proxyWire = shareWire(data.proxyMesh, 35)
+    else:
+        wireCurves = [data.treadCircle]
+
+    yield "Adding curve controllers", 0.0
 
     # Use point on curve deformation
     locatorPoints = addPointOnCurve()
 
     # Use result locators to add controllers to them
     controlGroups = controlOnLocator("curvePointCtrl", *locatorPoints)
+    data.curveControllers = cmds.listRelatives(controlGroups[1], children=True, path=True)
+
+    yield "Adding main controller", 0.0
 
     # Group the circle and base wire for organization
-    wireCurvesGroup = cmds.group(data.treadCircle, data.treadBaseWire, name="TreadWireDeform")
+    wireCurvesGroup = cmds.group(wireCurves, name="TreadWireDeform")
     
     # Create main controller
-    data.mainController = makeMainController()
-    data.mainController = checkDuplicatedName(data.mainController)
+    data.mainController = makeMainController(names.reserve("TreadMainController"))
 
     data.mainControllerGroup = cmds.group(data.mainController, name="TreadMainControllerGroup")
 
-    cmds.select(data.mainControllerGroup, data.treadMesh)
     # Align the circle to the mesh
-    cmds.align(x="mid", z="mid", alignToLead=True)
+    cmds.align(data.mainControllerGroup, data.treadMesh, x="mid", z="mid", alignToLead=True)
 
     # Parent curve controllers to main controller
-    cmds.parent(controlGroups[0], data.mainController)
-    cmds.parent(controlGroups[1], data.mainController)
+    cmds.parent(controlGroups, data.mainController)
 
     # Constraint curves and mesh to main controller to rotate properly due to wire deformer
-    cmds.select(data.mainController,data.treadMesh)
-    cmds.orientConstraint(maintainOffset=True)
-    cmds.select(data.mainController, wireCurvesGroup)
-    cmds.orientConstraint(maintainOffset=True)
+    # The pieces follow the curve in world space, so only a merged mesh is constrained
+    if data.buildMode == "merged":
+        cmds.orientConstraint(data.mainController, data.treadMesh, maintainOffset=True)
+        if data.proxyWire:
+            cmds.orientConstraint(data.mainController, data.proxyMesh, maintainOffset=True)
+    cmds.orientConstraint(data.mainController, wireCurvesGroup, maintainOffset=True)
+
+    yield "Connecting drive", 0.0
+
+    # Switch between the proxy and the full resolution tread
+    if cmds.objExists(data.proxyMesh):
+        displaySwitch()
+
+    # Make the tread rotate with main controller, using the driver chosen in the menu (its items start at 1)
+    if cmds.optionMenuGrp("treadDrive", exists=True):
+        driver = DRIVERS[cmds.optionMenuGrp("treadDrive", query=True, select=True)-1]
+    else:
+        driver = DRIVERS[0]
 
-    # Make the tread rotate with main controller
-    rotationExpression()
+    if data.buildMode != "merged":
+        # There is no base wire to rotate, the pieces are moved along the curve
+        rotationPieces()
+    elif driver == "nodes":
+        rotationNodes()
+    else:
+        rotationExpression()
+
+    # The curve is driven by its controllers now, the rollers don't move it anymore
+    watchRollers([])
 
-    # Delete locators
-    cmds.delete(data.firstLocator, data.secondLocator)
+    # Delete locators, a belt curve might have been made without them
+    locators = [locator for locator in (data.firstLocator, data.secondLocator) if locator and cmds.objExists(locator)]
+    if locators:
+        cmds.delete(locators)
 
     # Save this rigging data to the rigging node
     data.writeToNode()
 
+def shareWire(geo, dropOffD=10):
+    """This function deforms a mesh with the tread curve, using the base wire of the tread mesh
+
+    Parameters
+    ----------
+    geo : str
+        The name of the mesh
+    dropOffD : float
+        The dropoff distance of the wire
+
+    Returns
+    -------
+    str
+        The name of the wire deformer
+    """
+
+    wireNode = cmds.wire(geo, w=data.treadCircle, n="proxyWire")[0]
+
+    # Replace the new base wire with the one of the tread mesh, so both rotate together
+    newBaseWire = cmds.listConnections("{}.baseWire[0]".format(wireNode), source=True, destination=False)[0]
+    baseShape = cmds.listRelatives(data.treadBaseWire, shapes=True, path=True)[0]
+    cmds.connectAttr("{}.worldSpace[0]".format(baseShape), "{}.baseWire[0]".format(wireNode), force=True)
+    cmds.delete(newBaseWire)
+
+    cmds.setAttr("%s.dropoffDistance[0]"%wireNode, dropOffD)
+
+    return wireNode
+
+def displaySwitch():
+    """This function adds a displayLevel attribute to the main controller to switch between proxy and full resolution
+
+    Each level drives the visibility of its geometry and the nodeState of its wire deformer,
+    a hidden level is set to HasNoEffect so it doesn't deform anything.
+    Rigid and instanced pieces don't have deformers, only their shapes are switched.
+    """
+
+    cmds.addAttr(data.mainController, longName="displayLevel", attributeType="enum", enumName="Proxy:Full",
+                 defaultValue=1, keyable=True)
+
+    # outColorR is the visibility and outColorG the nodeState (0 Normal, 1 HasNoEffect)
+    levels = {}
+    for level, levelName in enumerate(["Proxy", "Full"]):
+        condition = cmds.createNode("condition", name="Tread{}Display".format(levelName), skipSelect=True)
+        cmds.connectAttr("{}.displayLevel".format(data.mainController), "{}.firstTerm".format(condition))
+        cmds.setAttr("{}.secondTerm".format(condition), level)
+        cmds.setAttr("{}.colorIfTrue".format(condition), 1, 0, 0, type="double3")
+        cmds.setAttr("{}.colorIfFalse".format(condition), 0, 1, 0, type="double3")
+        levels[levelName] = condition
+
+    if data.buildMode == "merged":
+        switches = [("Full", data.treadMesh, data.treadWire), ("Proxy", data.proxyMesh, data.proxyWire)]
+
+        for levelName, mesh, wireNode in switches:
+            cmds.connectAttr("{}.outColorR".format(levels[levelName]), "{}.visibility".format(mesh), force=True)
+            if wireNode:
+                cmds.connectAttr("{}.outColorG".format(levels[levelName]), "{}.nodeState".format(wireNode), force=True)
+        return
+
+    # Instanced shapes are the same node under many pieces, so each shape is connected once
+    proxyShape = cmds.listRelatives(data.proxyMesh, shapes=True, path=True)[0]
+    shapes = {}
+    for shape in cmds.listRelatives(data.treadPieces, shapes=True, path=True) or []:
+        shapes[cmds.ls(shape, uuid=True)[0]] = shape
+    proxyUuid = cmds.ls(proxyShape, uuid=True)[0]
+
+    for uuid, shape in shapes.items():
+        levelName = "Proxy" if uuid == proxyUuid else "Full"
+        cmds.connectAttr("{}.outColorR".format(levels[levelName]), "{}.visibility".format(shape), force=True)
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
+def bakePeriodicCache(*args):
+    """This function bakes the deformation of one piece length of the tread and plays it back instead of the wire
+
+    The cache is turned off when a curve controller or the tread mesh changes.
+    """
+
+    if data.buildMode != "merged" or not cmds.objExists(data.treadWire) or not cmds.objExists(data.mainController):
+        cmds.confirmDialog(t="Periodic cache", m="Finalize a tread built as a merged mesh first")
+        return
+
+    resolution = cmds.intSliderGrp("cacheResolution", q=True, v=True)
+
+    # Remove the previous cache, the samples must be taken with the wire
+    treadCache.remove(data.cacheNodes, data.treadMesh, data.treadWire, data.mainController)
+
+    cacheName = rigUtils.sharedNames().reserve("TreadPeriodicCache")
+    data.cacheNodes = treadCache.bake(data.treadMesh, data.treadWire, data.treadBaseWire, data.mainController,
+                                      data.pieceSpacing, resolution, name=cacheName)
+
+    # Turn the cache off when the curve controllers or the mesh change
+    meshShape = cmds.listRelatives(data.treadMesh, shapes=True, noIntermediate=True, path=True)
+    treadCache.watch(data.mainController, data.curveControllers + meshShape)
+
 def makeMainController(controlName="TreadMainController"):
     """This function creates the main controller for the rig"""
 
@@ -476,10 +1543,51 @@ def makeMainController(controlName="TreadMainController"):
 def rotationExpression():
     """This function adds an expression that allows the tread to rotate while moving"""
 
-    cmds.select(data.mainController)
     cmds.addAttr(data.mainController, longName="treadSpeed", attributeType="double", defaultValue=20, keyable=True)
 
     cmds.expression(name="TreadRotation", string="{0}.rotateX = -{1}.translateZ*{1}.treadSpeed".format(data.treadBaseWire, data.mainController))
+
+def rotationNodes():
+    """This function makes the tread rotate while moving using utility nodes instead of an expression
+
+    It computes the same rotation as rotationExpression: rotateX = -translateZ * treadSpeed degrees
+    """
+
+    cmds.addAttr(data.mainController, longName="treadSpeed", attributeType="double", defaultValue=20, keyable=True)
+
+    # translateZ * treadSpeed
+    speedNode = cmds.createNode("multDoubleLinear", name="TreadRotation", skipSelect=True)
+    cmds.connectAttr("{}.translateZ".format(data.mainController), "{}.input1".format(speedNode))
+    cmds.connectAttr("{}.treadSpeed".format(data.mainController), "{}.input2".format(speedNode))
+
+    # Rotations are saved in radians, so the degrees are converted and negated in one node
+    conversionNode = cmds.createNode("unitConversion", name="TreadRotationConversion", skipSelect=True)
+    cmds.setAttr("{}.conversionFactor".format(conversionNode), -math.pi/180.0)
+    cmds.connectAttr("{}.output".format(speedNode), "{}.input".format(conversionNode))
+    cmds.connectAttr("{}.output".format(conversionNode), "{}.rotateX".format(data.treadBaseWire))
+
+def rotationPieces():
+    """This function makes the pieces that ride on the curve advance while the tread moves
+
+    Rotating the base wire by some degrees moves the tread by degrees/360 of its length,
+    so the pieces are moved by the same fraction: offset = -translateZ * treadSpeed / 360
+    """
+
+    cmds.addAttr(data.mainController, longName="treadSpeed", attributeType="double", defaultValue=20, keyable=True)
+
+    # translateZ * treadSpeed
+    speedNode = cmds.createNode("multDoubleLinear", name="TreadRotation", skipSelect=True)
+    cmds.connectAttr("{}.translateZ".format(data.mainController), "{}.input1".format(speedNode))
+    cmds.connectAttr("{}.treadSpeed".format(data.mainController), "{}.input2".format(speedNode))
+
+    # Degrees to a fraction of the curve, in the direction the base wire would rotate
+    offsetNode = cmds.createNode("multDoubleLinear", name="TreadOffset", skipSelect=True)
+    cmds.setAttr("{}.input2".format(offsetNode), -1/360.0)
+    cmds.connectAttr("{}.output".format(speedNode), "{}.input1".format(offsetNode))
+
+    # Every piece shares the same offset
+    for position in data.pieceOffsets:
+        cmds.connectAttr("{}.output".format(offsetNode), "{}.input1".format(position))
     
 def addClusters():
     """This function adds clusters to the curve"""
@@ -489,9 +1597,8 @@ def addClusters():
     clusterList = []
     
     for cv in cvList:
-        cmds.select(cv, replace=True)
         # Append clusterHandles [index 1] to list of clusters
-        clusterList.append(cmds.cluster()[1])
+        clusterList.append(cmds.cluster(cv)[1])
 
     return clusterList
 
@@ -500,30 +1607,19 @@ def createCubeController():
 
     # Create list of clusters
     clusterList = addClusters()
-    
-    for clusterName in clusterList:
-        cubeCtrl = cmds.curve(n="clusterCtrl",
-                   degree=1,
-                   point=[(-0.5, 0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5), (-0.5, 0.5, 0.5),
-                          (-0.5, -0.5, 0.5), (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5), (-0.5, -0.5, 0.5),
-                          (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5), (-0.5, -0.5, -0.5),
-                          (-0.5, 0.5, -0.5)],
-                   k=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0, 15.0])
-    
-        #clusterName = "cluster%iHandle"%(i+1)
-        cmds.select(cubeCtrl, clusterName)
-        cmds.MatchTransform()
-        cmds.select(cubeCtrl, r=True)
-        cmds.FreezeTransformations()
-        cmds.select(cubeCtrl, clusterName)
-        cmds.parentConstraint(mo=True, w=1)
+
+    # Create a cube controller, already frozen, on every cluster handle
+    controllerNames = rigUtils.sharedNames().reserveBatch("clusterCtrl", len(clusterList))
+    controllerList = controllerShapes.stampControllers(controllerNames, rigUtils.getPivots(clusterList), shape="cube")
+
+    # Make them drive the clusters
+    for cubeCtrl, clusterName in zip(controllerList, clusterList):
+        cmds.parentConstraint(cubeCtrl, clusterName, mo=True, w=1)
         
-    cmds.select("clusterCtrl*")
-    cmds.group(name="ClusterControlGroup")
+    cmds.group(controllerList, name="ClusterControlGroup")
 
-    cmds.select("cluster*Handle")
-    handleGroup = cmds.group(name="ClusterHandlesGroup")
-    cmds.setAttr("TreadCurve.visibility",0)
+    handleGroup = cmds.group(clusterList, name="ClusterHandlesGroup")
+    cmds.setAttr("%s.visibility"%data.treadCircle,0)
     cmds.setAttr("%s.visibility"%handleGroup,0)
 
 def addPointOnCurve():
@@ -534,21 +1630,24 @@ def addPointOnCurve():
     locatorList = []
     
     for ep in epList:
-        cmds.select(ep, replace=True)
-
         # Append locators generated on constraint to their list
-        locatorList.append(cmds.pointCurveConstraint(constructionHistory=True, replaceOriginal=True)[0])
-        cmds.CenterPivot()
+        locatorList.append(cmds.pointCurveConstraint(ep, constructionHistory=True, replaceOriginal=True)[0])
+
+    rigUtils.centerPivot(locatorList)
 
     return locatorList
 
-def controlOnLocator(controllerName="controller", *args):
-    """This function adds controllers on the selected locators
+def controlOnLocator(controllerName="controller", *args, **kwargs):
+    """This function adds controllers on the given locators
     
     Parameters
     ----------
     controllerName : str
         The desired naming convention for the controllers and their group
+    *args : str
+        The names of the locators
+    sharedShape : bool
+        Keyword only. If True, every controller instances the same curve shape
 
     
     Returns
@@ -557,34 +1656,24 @@ def controlOnLocator(controllerName="controller", *args):
         A list containing the driven group on index [0] and controller group on index [1]
     """
 
-    controllerList = []
-
-    for locator in args:
-        # Create a curve with a cube shape
-        cubeCtrl = cmds.curve(n=controllerName,
-                   degree=1,
-                   point=[(-0.5, 0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5), (-0.5, 0.5, 0.5),
-                          (-0.5, -0.5, 0.5), (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5), (-0.5, -0.5, 0.5),
-                          (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5), (-0.5, -0.5, -0.5),
-                          (-0.5, 0.5, -0.5)],
-                   k=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0, 15.0])
-
-        controllerList.append(cubeCtrl)
-
-        # Select both objects to match translation
-        cmds.select(cubeCtrl, locator)
-        cmds.MatchTranslation()
-        cmds.select(cubeCtrl, r=True)
-        cmds.FreezeTransformations()
-        cmds.select(cubeCtrl, locator)
-        cmds.parentConstraint(mo=True, w=1)
-
-    cmds.select(args)
-    locatorsGroup = cmds.group(name="PointLocatorsGroup")
+    # Python 2 doesn't allow keyword arguments after *args
+    sharedShape = kwargs.get("sharedShape", False)
+
+    # Get the position of every locator with one query
+    positions = rigUtils.getPivots(args)
+
+    # Create a cube controller, already frozen, on every locator
+    controllerNames = rigUtils.sharedNames().reserveBatch(controllerName, len(args))
+    controllerList = controllerShapes.stampControllers(controllerNames, positions, shape="cube", sharedShape=sharedShape)
+
+    # Make them drive the locators
+    for cubeCtrl, locator in zip(controllerList, args):
+        cmds.parentConstraint(cubeCtrl, locator, mo=True, w=1)
+
+    locatorsGroup = cmds.group(list(args), name="PointLocatorsGroup")
     cmds.setAttr("{}.visibility".format(locatorsGroup), 0)
 
-    cmds.select(controllerList)
-    controllerGroup = cmds.group(name="{}Group".format(controllerName))
+    controllerGroup = cmds.group(controllerList, name="{}Group".format(controllerName))
 
     return [locatorsGroup, controllerGroup]
 
@@ -597,33 +1686,12 @@ def pickingObj(*args):
     # Edit textField to save the name of the object
     cmds.textFieldButtonGrp("treadName", edit=True, text=selectedObj)
 
-def checkDuplicatedName(obj):
-    
-    tries = 0
-
-    while("|" in obj):
-        tries +=1
-        obj = renameDuplicatedObject(obj, tries)
-    
-    return obj
+def pickingVariant(*args):
+    """This function saves the name of the selected object in the variant field button"""
 
-def renameDuplicatedObject(obj, index=0):
-    
-    if "|" in obj:
-        newName = obj.replace("|", "")
-
-        lastDigits = 0
+    selectedObj=cmds.ls(selection=True, objectsOnly=True)[0]
+    cmds.textFieldButtonGrp("variantName", edit=True, text=selectedObj)
 
-        if index > 1:
-            lastDigits = len(str(index))
-            newName = newName[:-lastDigits]
-        
-        newName += str(index)
-        obj = cmds.rename(obj, newName)
-        return obj
-    else:
-        return obj
-    
 '''
     ----------------------------------- First Dialog and Window Creation -----------------------------------------
 '''
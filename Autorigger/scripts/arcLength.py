@@ -0,0 +1,222 @@
+"""Arc-length parameterization of the tread curve.
+
+A nurbs curve is evaluated by parameter, but the pieces of a tread have to be
+spread by distance along the curve. This script samples every span of the curve
+once and keeps the cumulative length of the samples in a table, so the
+parameter at any distance is found with a lookup instead of measuring the curve
+again for every piece.
+
+The table is kept per span. When the user moves a few curvePointCtrl
+controllers, update() only samples again the spans that those CVs affect,
+the rest of the table is reused.
+
+Example:
+    table = arcLength.ArcLengthTable("TreadCurve")
+    amount = table.pieceCount(pieceDepth)
+    params = table.parameterAtDistance(numpy.arange(amount) * table.length / amount)
+
+This module needs NumPy, like treadLayout.
+"""
+
+import treadLayout
+reload(treadLayout)
+
+numpy = treadLayout.numpy
+
+# The number of samples taken on every span of the curve
+SAMPLES_PER_SPAN = treadLayout.SAMPLES_PER_SPAN
+
+# The distance a CV has to move to sample its spans again
+TOLERANCE = 1e-9
+
+def isAvailable():
+    """Returns True when NumPy can be used to build the table"""
+
+    return treadLayout.isAvailable()
+
+class ArcLengthTable(object):
+    """The cumulative length of a nurbs curve, sampled span by span
+
+    Attributes
+    ----------
+    curve : str
+        The name of the curve
+    curveData : dict
+        The curve information returned by treadLayout.getCurveData
+    samplesPerSpan : int
+        The number of segments measured on every span
+    spanParams : numpy.ndarray
+        (spans, samplesPerSpan+1) array with the parameters sampled on each span
+    segmentLengths : numpy.ndarray
+        (spans, samplesPerSpan) array with the length between consecutive samples
+    params : numpy.ndarray
+        The parameters of all the samples, from the start to the end of the curve
+    cumulativeLength : numpy.ndarray
+        The length of the curve from its start to each sample
+    length : float
+        The total length of the curve
+    closed : bool
+        True if the curve is periodic, distances past its length go around it again
+
+    Methods
+    -------
+    update()
+        Samples again the spans whose CVs moved
+    parameterAtDistance(distances)
+        Returns the parameters at many distances from the start of the curve
+    parameterAtFraction(fractions)
+        Returns the parameters at many fractions of the length of the curve
+    pieceCount(pieceLength)
+        Returns how many pieces of a given length fit on the curve
+    """
+
+    def __init__(self, curve, samplesPerSpan=SAMPLES_PER_SPAN):
+        self.curve = curve
+        self.samplesPerSpan = samplesPerSpan
+        self.resample()
+
+    def resample(self):
+        """Samples every span of the curve"""
+
+        self.curveData = treadLayout.getCurveData(self.curve)
+        self.closed = self.curveData["periodic"]
+
+        knots = self.curveData["knots"]
+        degree = self.curveData["degree"]
+        spans = len(self.curveData["cvs"]) - degree
+
+        # Span s goes from knot s+degree to knot s+degree+1, a span between repeated knots has no length
+        spanStarts = knots[degree:degree + spans]
+        spanEnds = knots[degree + 1:degree + spans + 1]
+        steps = numpy.linspace(0.0, 1.0, self.samplesPerSpan + 1)
+        self.spanParams = spanStarts[:, None] + (spanEnds - spanStarts)[:, None] * steps
+
+        self.segmentLengths = numpy.zeros((spans, self.samplesPerSpan))
+        self.measureSpans(numpy.ones(spans, dtype=bool))
+
+        # The last sample of a span is the first one of the next span, keep it once
+        self.params = numpy.concatenate((self.spanParams[:, :-1].reshape(-1), self.spanParams[-1:, -1]))
+
+    def measureSpans(self, spanMask):
+        """Measures the segments of some spans and accumulates the length of the whole curve
+
+        Parameters
+        ----------
+        spanMask : numpy.ndarray
+            A bool for every span, True to measure it again
+        """
+
+        spanParams = self.spanParams[spanMask]
+
+        if len(spanParams):
+            points = treadLayout.evaluateCurve(self.curveData["cvs"], self.curveData["knots"], self.curveData["degree"],
+                                               spanParams.reshape(-1))
+            points = points.reshape(len(spanParams), self.samplesPerSpan + 1, 3)
+            self.segmentLengths[spanMask] = numpy.linalg.norm(points[:, 1:] - points[:, :-1], axis=2)
+
+        # Accumulating is cheap, so it is always done for the whole curve
+        self.cumulativeLength = numpy.concatenate(([0.0], numpy.cumsum(self.segmentLengths.reshape(-1))))
+        self.length = self.cumulativeLength[-1]
+
+    def update(self):
+        """Samples again the spans whose CVs moved
+
+        A CV of a curve of degree d only changes the d+1 spans that follow it,
+        so moving a few controllers only measures a few spans again.
+        If the curve was rebuilt (its CVs, knots or degree changed) the whole curve is sampled.
+
+        Returns
+        -------
+        int
+            The number of spans that were sampled
+        """
+
+        curveData = treadLayout.getCurveData(self.curve)
+        previous = self.curveData
+        degree = previous["degree"]
+
+        if (curveData["degree"] != degree or curveData["cvs"].shape != previous["cvs"].shape or
+                not numpy.array_equal(curveData["knots"], previous["knots"])):
+            self.resample()
+            return len(self.segmentLengths)
+
+        moved = numpy.nonzero(numpy.linalg.norm(curveData["cvs"] - previous["cvs"], axis=1) > TOLERANCE)[0]
+        self.curveData = curveData
+
+        if not len(moved):
+            return 0
+
+        # CV i is used by the spans i-degree to i
+        spans = len(self.segmentLengths)
+        affected = (moved[:, None] - numpy.arange(degree + 1)).reshape(-1)
+        spanMask = numpy.zeros(spans, dtype=bool)
+        spanMask[affected[(affected >= 0) & (affected < spans)]] = True
+
+        self.measureSpans(spanMask)
+
+        return int(numpy.count_nonzero(spanMask))
+
+    def parameterAtDistance(self, distances):
+        """Returns the parameters at many distances from the start of the curve
+
+        Parameters
+        ----------
+        distances : numpy.ndarray
+            The distances along the curve
+
+        Returns
+        -------
+        numpy.ndarray
+            The parameter of the curve at each distance
+        """
+
+        distances = numpy.asarray(distances, dtype=float)
+
+        if self.closed and self.length > 0:
+            distances = numpy.mod(distances, self.length)
+
+        params = numpy.interp(distances, self.cumulativeLength, self.params)
+
+        return treadLayout.refineParameters(self.curveData, distances, params, self.params, self.cumulativeLength)
+
+    def parameterAtFraction(self, fractions):
+        """Returns the parameters at many fractions of the length of the curve
+
+        Parameters
+        ----------
+        fractions : numpy.ndarray
+            Values from 0 to 1, like the fractionMode of a motion path
+        """
+
+        return self.parameterAtDistance(numpy.asarray(fractions, dtype=float) * self.length)
+
+    def pieceCount(self, pieceLength):
+        """Returns how many pieces of a given length fit on the curve, at least one
+
+        Parameters
+        ----------
+        pieceLength : float
+            The length a piece takes along the curve
+        """
+
+        if pieceLength <= 0:
+            return 1
+
+        return max(1, int(round(self.length / pieceLength)))
+
+def getTable(curve, table=None):
+    """Returns an up to date table for a curve, reusing the given one if it was made for the same curve
+
+    Parameters
+    ----------
+    curve : str
+        The name of the curve
+    table : ArcLengthTable
+        The table made on a previous call, or None
+    """
+
+    if table is not None and table.curve == curve:
+        table.update()
+        return table
+
+    return ArcLengthTable(curve)
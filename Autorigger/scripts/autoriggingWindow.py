@@ -9,6 +9,9 @@ It imports each different files that are needed.
 from maya import cmds
 import os
 
+import rigUtils
+reload(rigUtils)
+
 import ThreadMaker as TM
 reload(TM)
 
@@ -21,6 +24,9 @@ reload(AM)
 import finalizeRig as FR
 reload(FR)
 
+import rigProfiler
+reload(rigProfiler)
+
 def makeWindow():
     """This function creates and displays a window"""
 
@@ -35,7 +41,7 @@ def makeWindow():
         cmds.windowPref(windowName, remove=True)
 
     # Create the window 
-    cmds.window(windowName, title="Auto rigger tool for Heavy Duty Vehicle", sizeable=False)
+    cmds.window(windowName, title="Auto rigger tool for Heavy Duty Vehicle", sizeable=False, menuBar=True)
     cmds.window(windowName, edit=True, width=500)
 
     # Create the UI elements (buttons, etc)
@@ -47,6 +53,9 @@ def makeWindow():
 def populateWindow():
     """This function creates the UI elements that go inside the window"""
 
+    # Menu to build without recording the undo queue
+    rigUtils.fastModeMenu()
+
     # Create main form layout that will contain every tab
     form = cmds.formLayout()
     # Add tab layout to organize each part of the process
@@ -68,8 +77,13 @@ def populateWindow():
     populateFinalize()
     cmds.setParent( '..' )
     
+    # Child tab for the command profiler
+    child4 = cmds.columnLayout(adjustableColumn=True)
+    populateProfiler()
+    cmds.setParent( '..' )
+    
     # Modify tab layout to add labels to each individual tab
-    cmds.tabLayout( tabs, edit=True, tabLabel=((child1, 'Bottom'), (child2, 'Arm'), (child3, 'Finalize')) )
+    cmds.tabLayout( tabs, edit=True, tabLabel=((child1, 'Bottom'), (child2, 'Arm'), (child3, 'Finalize'), (child4, 'Profiler')) )
     
 def populateBottomTab():
     """This function creates the content of the first tab of the window"""
@@ -160,6 +174,11 @@ def populateFinalize():
 
     finalizeLayout = FR.populateWindow()
 
+def populateProfiler():
+    """This function creates the content of the profiler tab of the window"""
+
+    profilerLayout = rigProfiler.populateWindow()
+
 # __name__ is a variable that all python modules have when executed
 # When a python module is executed directly (pasting it on script editor,
 # charcoal or through vsCode), the name is "__main__"
@@ -0,0 +1,466 @@
+"""Belt path around rollers.
+
+A real tread is not a circle, it wraps around a drive sprocket, an idler and
+several road wheels. This script computes the path of a belt stretched around
+any number of rollers (circles in the plane of the tread):
+    * The rollers that touch the belt are the ones on the convex hull of the circles
+    * Between two neighbouring rollers the belt is their outer tangent line
+    * Around a roller the belt is an arc from one tangent point to the next
+
+Everything is computed analytically and with NumPy arrays, so moving a roller
+and computing the path again takes a fraction of a millisecond.
+
+The path is turned into the CVs of a periodic cubic curve. Arcs get a CV every
+MAX_ARC_STEP degrees, pushed out so the curve passes on the roller instead of
+inside it, and straight parts only get the CVs that keep them straight.
+
+The tread lies on the YZ plane, like the circle made by ThreadMaker, and the
+belt goes around the rollers in the same direction as that circle.
+
+Example:
+    curve, path = beltPath.makeBeltCurve(["Sprocket", "RoadWheel1", "RoadWheel2", "Idler"], name="TreadCurve")
+"""
+
+from maya import cmds
+from maya.api import OpenMaya
+import functools
+import rigUtils
+reload(rigUtils)
+import treadLayout
+reload(treadLayout)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The attribute that stores the radius of a roller locator
+RADIUS_ATTRIBUTE = "rollerRadius"
+
+# The number of directions used to find the rollers that touch the belt
+HULL_DIRECTIONS = 2048
+
+# The biggest angle of a roller covered by one section of the curve, in degrees
+MAX_ARC_STEP = 30.0
+
+# The range of sections per full turn of a roller tried by adaptiveCvs
+MIN_TURN_SECTIONS = 4
+MAX_TURN_SECTIONS = 64
+
+# The number of points measured on every section of the curve to find its deviation
+DEVIATION_SAMPLES = 16
+
+def isAvailable():
+    """Returns True when NumPy can be used to compute the belt path"""
+
+    return numpy is not None
+
+def addRollerLocator(name="RollerLocator", radius=1.0):
+    """Creates a locator with a rollerRadius attribute to mark a roller
+
+    Parameters
+    ----------
+    name : str
+        The name of the locator
+    radius : float
+        The radius of the roller
+
+    Returns
+    -------
+    str
+        The name of the locator
+    """
+
+    locator = cmds.spaceLocator(name=name)[0]
+    cmds.addAttr(locator, longName=RADIUS_ATTRIBUTE, attributeType="double", minValue=0, defaultValue=radius, keyable=True)
+
+    return locator
+
+def getRollers(nodes):
+    """Reads the center and radius of every roller
+
+    A locator with a rollerRadius attribute uses its pivot and that radius. Any
+    other object (i.e. a wheel mesh) uses the center and the size of its bounding box on the YZ plane.
+
+    Parameters
+    ----------
+    nodes : list
+        The names of the locators or meshes
+
+    Returns
+    -------
+    tuple
+        centers: (n,3) array with the world position of the rollers
+        radii: (n,) array with the radius of the rollers
+    """
+
+    nodes = rigUtils.asList(nodes)
+    centers = []
+    radii = []
+
+    for node in nodes:
+        if cmds.attributeQuery(RADIUS_ATTRIBUTE, node=node, exists=True):
+            centers.append(rigUtils.getPivot(node))
+            radii.append(cmds.getAttr("{}.{}".format(node, RADIUS_ATTRIBUTE)))
+        else:
+            # [minX, minY, minZ, maxX, maxY, maxZ]
+            bbox = cmds.exactWorldBoundingBox(node)
+            centers.append(((bbox[0]+bbox[3])/2.0, (bbox[1]+bbox[4])/2.0, (bbox[2]+bbox[5])/2.0))
+            radii.append(max(bbox[4]-bbox[1], bbox[5]-bbox[2])/2.0)
+
+    return numpy.array(centers, dtype=float), numpy.array(radii, dtype=float)
+
+def hullOrder(centers, radii):
+    """Finds the rollers that touch the belt, in the order the belt goes around them
+
+    For every direction, the roller that reaches the furthest is the one the belt
+    touches on that side. Going around all the directions gives the order of the rollers.
+
+    Parameters
+    ----------
+    centers : numpy.ndarray
+        (n,2) array with the center of the rollers on the plane
+    radii : numpy.ndarray
+        (n,) array with the radius of the rollers
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the rollers that touch the belt, counterclockwise
+    """
+
+    angles = numpy.linspace(0.0, 2*numpy.pi, HULL_DIRECTIONS, endpoint=False)
+    directions = numpy.stack((numpy.cos(angles), numpy.sin(angles)), axis=1)
+
+    # The distance each roller reaches in each direction, (directions, rollers)
+    reach = directions.dot(centers.T) + radii[None, :]
+    furthest = numpy.argmax(reach, axis=1)
+
+    # Keep one index per run of the same roller, the first and last runs are the same roller when they match
+    changes = numpy.concatenate(([True], furthest[1:] != furthest[:-1]))
+    order = furthest[changes]
+    if len(order) > 1 and order[0] == order[-1]:
+        order = order[:-1]
+
+    return order
+
+def outerTangents(centers, radii):
+    """Computes the outer tangent from every roller to the next one
+
+    Parameters
+    ----------
+    centers : numpy.ndarray
+        (n,2) array with the centers of the rollers, in the order of the belt
+    radii : numpy.ndarray
+        (n,) array with their radius
+
+    Returns
+    -------
+    tuple
+        normals: (n,2) array with the outward normal of every tangent line
+        starts: (n,2) array with the tangent point on each roller
+        ends: (n,2) array with the tangent point on the next roller
+    """
+
+    nextCenters = numpy.roll(centers, -1, axis=0)
+    nextRadii = numpy.roll(radii, -1)
+
+    offsets = nextCenters - centers
+    distances = numpy.linalg.norm(offsets, axis=1)
+    along = offsets / distances[:, None]
+
+    # Going counterclockwise, the outside of the belt is on the right of the line
+    right = numpy.stack((along[:, 1], -along[:, 0]), axis=1)
+
+    # The normal touches both circles when normal.offset = radius - nextRadius
+    cosine = numpy.clip((radii - nextRadii) / distances, -1.0, 1.0)
+    normals = cosine[:, None] * along + numpy.sqrt(1.0 - cosine**2)[:, None] * right
+
+    return normals, centers + radii[:, None] * normals, nextCenters + nextRadii[:, None] * normals
+
+def computePath(centers, radii):
+    """Computes the belt path around the rollers on the YZ plane
+
+    Parameters
+    ----------
+    centers : numpy.ndarray
+        (n,3) array with the world position of the rollers
+    radii : numpy.ndarray
+        (n,) array with the radius of the rollers
+
+    Returns
+    -------
+    dict
+        rollers: the indices of the rollers that touch the belt, in order
+        centers, radii: the (y, z) centers and the radius of those rollers
+        arcStarts, arcSweeps: the angle where the belt arrives to each roller and the angle it goes around it
+        lineStarts, lineEnds: the tangent points of the line that leaves each roller
+        x: the position of the plane of the belt
+    """
+
+    centers = numpy.asarray(centers, dtype=float)
+    radii = numpy.asarray(radii, dtype=float)
+
+    # Work on the (y, z) plane, counterclockwise there is the direction of the circle of makeTread
+    planeCenters = centers[:, 1:]
+    order = hullOrder(planeCenters, radii)
+    planeCenters = planeCenters[order]
+    planeRadii = radii[order]
+
+    if len(order) == 1:
+        # A single roller, the belt is the whole circle
+        arcStarts = numpy.zeros(1)
+        arcSweeps = numpy.full(1, 2*numpy.pi)
+        lineStarts = lineEnds = planeCenters + planeRadii[:, None] * numpy.array([(1.0, 0.0)])
+    else:
+        normals, lineStarts, lineEnds = outerTangents(planeCenters, planeRadii)
+
+        # The belt arrives to a roller with the normal of the previous line and leaves with its own
+        normalAngles = numpy.arctan2(normals[:, 1], normals[:, 0])
+        arcStarts = numpy.roll(normalAngles, 1)
+        arcSweeps = numpy.mod(normalAngles - arcStarts, 2*numpy.pi)
+
+    return {"rollers": order,
+            "centers": planeCenters,
+            "radii": planeRadii,
+            "arcStarts": arcStarts,
+            "arcSweeps": arcSweeps,
+            "lineStarts": lineStarts,
+            "lineEnds": lineEnds,
+            "x": centers[:, 0].mean()}
+
+def pathCvs(path, maxArcStep=MAX_ARC_STEP):
+    """Places the CVs of a periodic cubic curve that follows the belt path
+
+    A periodic cubic curve passes through (previous + 4*cv + next)/6 at every CV. For CVs
+    on a circle a step apart, that point is at radius*(2+cos(step))/3, so the CVs
+    inside an arc are pushed out by 3/(2+cos(step)) to make the curve touch the roller.
+
+    A straight part gets a CV on each tangent point and one more next to each of them,
+    so the curve stays straight between them.
+
+    Parameters
+    ----------
+    path : dict
+        The belt path returned by computePath
+    maxArcStep : float
+        The biggest angle between two CVs on a roller, in degrees
+
+    Returns
+    -------
+    numpy.ndarray
+        (n,3) array with the world position of the CVs, without repeating the first ones
+    """
+
+    radii = path["radii"]
+    sweeps = path["arcSweeps"]
+
+    # The sections of every arc, a tiny arc still gets its two tangent points
+    sections = numpy.maximum(1, numpy.ceil(sweeps / numpy.radians(maxArcStep) - 1e-9)).astype(int)
+    steps = sweeps / sections
+    correction = 3.0 / (2.0 + numpy.cos(steps))
+
+    # The angle and radius of every CV of every arc, all the arcs at once
+    arcIndex = numpy.repeat(numpy.arange(len(sweeps)), sections + 1)
+    firstCv = numpy.repeat(numpy.cumsum(sections + 1) - (sections + 1), sections + 1)
+    cvIndex = numpy.arange(len(arcIndex)) - firstCv
+    angles = path["arcStarts"][arcIndex] + steps[arcIndex] * cvIndex
+    # The tangent points stay on the roller, unless the arc is a full circle and has none
+    fullCircle = sweeps >= 2*numpy.pi - 1e-9
+    inside = ((cvIndex > 0) | fullCircle[arcIndex]) & (cvIndex < sections[arcIndex])
+    cvRadii = radii[arcIndex] * numpy.where(inside, correction[arcIndex], 1.0)
+    arcPoints = path["centers"][arcIndex] + cvRadii[:, None] * numpy.stack((numpy.cos(angles), numpy.sin(angles)), axis=1)
+
+    if fullCircle[0]:
+        # A full circle, the last CV is the first one
+        points = arcPoints[:-1]
+    else:
+        # The extra CVs of each line are one arc step away from its tangent points, or a third of the line if it is short
+        lines = path["lineEnds"] - path["lineStarts"]
+        lengths = numpy.linalg.norm(lines, axis=1)
+        directions = lines / numpy.where(lengths == 0, 1.0, lengths)[:, None]
+        gaps = numpy.minimum(radii * steps, lengths / 3.0)[:, None]
+        afterStart = path["lineStarts"] + directions * gaps
+        beforeEnd = path["lineEnds"] - directions * gaps
+
+        # Each arc is followed by the two CVs of the line that leaves it, the tangent points are already on the arcs
+        pieces = []
+        arcEnds = numpy.cumsum(sections + 1)
+        for index in range(len(sweeps)):
+            pieces.append(arcPoints[arcEnds[index] - sections[index] - 1:arcEnds[index]])
+            pieces.append(numpy.stack((afterStart[index], beforeEnd[index])))
+        points = numpy.concatenate(pieces)
+
+    # Back to 3D, on the plane of the rollers
+    return numpy.column_stack((numpy.full(len(points), path["x"]), points))
+
+def pathDeviation(path, cvs):
+    """Measures how far the periodic cubic curve of some CVs goes from the belt path
+
+    Parameters
+    ----------
+    path : dict
+        The belt path returned by computePath
+    cvs : numpy.ndarray
+        (n,3) array with the CVs, without repeating the first ones
+
+    Returns
+    -------
+    float
+        The biggest distance from the curve to the path
+    """
+
+    # The curve that createCurve would make, sampled on every section
+    count = len(cvs)
+    points = numpy.concatenate((cvs, cvs[:3]))[:, 1:]
+    knots = numpy.arange(-3, count + 4, dtype=float)
+    params = numpy.linspace(0, count, count * DEVIATION_SAMPLES, endpoint=False)
+    samples = treadLayout.evaluateCurve(points, knots, 3, params)
+
+    # Distance to every arc, only from the points that are in front of it
+    offsets = samples[:, None, :] - path["centers"][None, :, :]
+    angles = numpy.mod(numpy.arctan2(offsets[..., 1], offsets[..., 0]) - path["arcStarts"][None, :], 2*numpy.pi)
+    arcDistances = numpy.abs(numpy.linalg.norm(offsets, axis=2) - path["radii"][None, :])
+    arcDistances[angles > path["arcSweeps"][None, :] + 1e-9] = numpy.inf
+
+    # Distance to every straight part
+    lines = path["lineEnds"] - path["lineStarts"]
+    lengths = numpy.maximum((lines**2).sum(axis=1), 1e-12)
+    fromStarts = samples[:, None, :] - path["lineStarts"][None, :, :]
+    along = numpy.clip((fromStarts * lines[None]).sum(axis=2) / lengths[None, :], 0.0, 1.0)
+    lineDistances = numpy.linalg.norm(fromStarts - along[..., None] * lines[None], axis=2)
+
+    return float(numpy.minimum(arcDistances.min(axis=1), lineDistances.min(axis=1)).max())
+
+def adaptiveCvs(path, tolerance):
+    """Finds the fewest CVs that keep the curve closer to the belt path than a tolerance
+
+    The sections per turn of the rollers grow until the curve is close enough, or
+    MAX_TURN_SECTIONS is reached.
+
+    Parameters
+    ----------
+    path : dict
+        The belt path returned by computePath
+    tolerance : float
+        The biggest distance allowed between the curve and the path
+
+    Returns
+    -------
+    tuple
+        cvs: the CVs as returned by pathCvs
+        deviation: the biggest distance from the curve to the path
+    """
+
+    for turnSections in range(MIN_TURN_SECTIONS, MAX_TURN_SECTIONS + 1):
+        cvs = pathCvs(path, 360.0 / turnSections)
+        deviation = pathDeviation(path, cvs)
+
+        if deviation <= tolerance:
+            break
+
+    return cvs, deviation
+
+def createCurve(cvs, name="TreadCurve"):
+    """Creates a periodic cubic curve from its CVs
+
+    Parameters
+    ----------
+    cvs : numpy.ndarray
+        (n,3) array with the CVs, without repeating the first ones
+    name : str
+        The name of the curve
+
+    Returns
+    -------
+    str
+        The name of the curve
+    """
+
+    points = [tuple(point) for point in cvs.tolist()]
+
+    # A periodic curve repeats its first degree CVs and has uniform knots
+    return cmds.curve(name=name, degree=3, periodic=True, point=points + points[:3],
+                      knot=list(range(-2, len(points) + 3)))
+
+def updateCurve(curve, cvs):
+    """Moves the CVs of an existing belt curve, if it has the same amount of CVs
+
+    Parameters
+    ----------
+    curve : str
+        The name of the curve
+    cvs : numpy.ndarray
+        (n,3) array with the CVs, without repeating the first ones
+
+    Returns
+    -------
+    bool
+        False if the curve has a different amount of CVs and must be made again
+    """
+
+    curveFn = OpenMaya.MFnNurbsCurve(treadLayout.getShapePath(curve))
+
+    # A periodic curve repeats its first degree CVs
+    if curveFn.numCVs != len(cvs) + curveFn.degree:
+        return False
+
+    points = cvs.tolist()
+    previousPoints = curveFn.cvPositions(OpenMaya.MSpace.kWorld)
+    newPoints = OpenMaya.MPointArray(points + points[:curveFn.degree])
+    setCurvePoints(curveFn, newPoints)
+
+    rigUtils.recordApiEdit(functools.partial(setCurvePoints, curveFn, previousPoints),
+                           functools.partial(setCurvePoints, curveFn, newPoints))
+
+    return True
+
+def setCurvePoints(curveFn, points):
+    """Moves the CVs of a curve and redraws it
+
+    Parameters
+    ----------
+    curveFn : MFnNurbsCurve
+        The function set of the curve
+    points : MPointArray
+        The world position of every CV, including the repeated ones of a periodic curve
+    """
+
+    curveFn.setCVPositions(points, OpenMaya.MSpace.kWorld)
+    curveFn.updateCurve()
+
+def makeBeltCurve(nodes, name="TreadCurve", curve=None, tolerance=None):
+    """Builds or updates the tread curve that wraps around the rollers
+
+    Parameters
+    ----------
+    nodes : list
+        The names of the roller locators or meshes
+    name : str
+        The name for a new curve
+    curve : str
+        A belt curve made before, it is updated if the amount of CVs didn't change
+    tolerance : float
+        If given, the fewest CVs that keep the curve this close to the path are used
+
+    Returns
+    -------
+    tuple
+        The name of the curve and the belt path returned by computePath
+    """
+
+    centers, radii = getRollers(nodes)
+    path = computePath(centers, radii)
+
+    if tolerance:
+        cvs = adaptiveCvs(path, tolerance)[0]
+    else:
+        cvs = pathCvs(path)
+
+    if curve and cmds.objExists(curve) and updateCurve(curve, cvs):
+        return curve, path
+
+    if curve and cmds.objExists(curve):
+        cmds.delete(curve)
+
+    return createCurve(cvs, name), path
@@ -0,0 +1,261 @@
+"""Chunked tasks that run from Maya's idle queue.
+
+A long rigging step (i.e. building a tread with hundreds of pieces) blocks Maya
+until it is done. Here the step is written as a generator that yields every
+now and then, and a ChunkedTask runs it a few milliseconds at a time with
+evalDeferred, so the UI is redrawn, a progress bar moves and the user can
+cancel it between chunks.
+
+A step yields (stage, fraction) tuples to report its progress. The time spent
+on every stage is recorded in the timings of the task, printTimings() prints
+them to see where the time goes. To give a value back, the step yields a Result
+as its last item.
+
+The task has a single rigUtils.Transaction, which is open only while a chunk
+runs, so every chunk is its own undo and nothing the user does between chunks
+is recorded with the task. The other rigging steps can't start until the task
+is done. If the task is cancelled or fails, the transaction is rolled back,
+removing only what its chunks did, and onCancel is called, so the caller can
+restore its own data.
+
+Example:
+    def steps():
+        for index in range(100):
+            cmds.polyCube()
+            yield "Cubes", index/100.0
+
+    task = chunkedTask.ChunkedTask(steps(), progressBar="myProgressBar")
+    task.start()
+
+The same generator can run at once, without the idle queue, with run(steps()).
+"""
+
+from maya import cmds
+import timeit
+import traceback
+import rigUtils
+reload(rigUtils)
+
+# The time a chunk runs before giving control back to Maya, in seconds
+TIME_BUDGET = 0.05
+
+class Result(object):
+    """The value a step gives back, yielded as its last item
+
+    Attributes
+    ----------
+    value : object
+        The value given back
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+def run(steps):
+    """Runs all the steps of a generator at once
+
+    Parameters
+    ----------
+    steps : generator
+        The generator of the step
+
+    Returns
+    -------
+    object
+        The value of the Result it yielded, or None
+    """
+
+    result = None
+
+    for item in steps:
+        if isinstance(item, Result):
+            result = item.value
+
+    return result
+
+class ChunkedTask(object):
+    """Runs a generator from Maya's idle queue, a few milliseconds at a time
+
+    Attributes
+    ----------
+    steps : generator
+        The generator of the task
+    progressBar : str
+        The name of the progressBar to update, or None
+    statusText : str
+        The name of a text control that shows the current stage, or None
+    onFinish : function
+        Called with the result when the task finishes
+    onCancel : function
+        Called after the nodes of a cancelled or failed task are deleted
+    transaction : rigUtils.Transaction
+        The transaction of the task, named after it, it begins and ends with every chunk
+    timings : list
+        (stage, seconds) tuples in the order the stages ran
+    result : object
+        The value of the Result yielded by the task
+    running : bool
+        True until the task finishes, is cancelled or fails
+
+    Methods
+    -------
+    start()
+        Queues the first chunk
+    cancel()
+        Stops the task between chunks and rolls it back
+    printTimings()
+        Prints the time spent on every stage, it is not printed unless asked for
+    """
+
+    def __init__(self, steps, progressBar=None, statusText=None, onFinish=None, onCancel=None, timeBudget=TIME_BUDGET,
+                 name="chunkedTask"):
+        self.steps = steps
+        self.progressBar = progressBar
+        self.statusText = statusText
+        self.onFinish = onFinish
+        self.onCancel = onCancel
+        self.timeBudget = timeBudget
+        self.timings = []
+        self.result = None
+        self.running = False
+        self.stage = None
+        self.stageStart = 0.0
+        self.transaction = rigUtils.Transaction(name)
+        self.selection = []
+
+    def start(self):
+        """Queues the first chunk, the other rigging steps wait until the task is done"""
+
+        rigUtils.Transaction.runningTask = self.transaction
+        self.selection = cmds.ls(selection=True, long=True)
+        self.running = True
+        self.setProgress(0.0)
+
+        cmds.evalDeferred(self.step, lowestPriority=True)
+
+    def cancel(self):
+        """Stops the task and rolls it back, no chunk is running when the user cancels"""
+
+        if self.running:
+            self.rollback("Cancelled")
+
+    def step(self):
+        """Runs the task until the time budget is spent and queues the next chunk"""
+
+        if not self.running:
+            return
+
+        # Only the chunk is recorded, not what the user does until the next one
+        self.transaction.begin()
+
+        chunkStart = timeit.default_timer()
+
+        try:
+            while timeit.default_timer() - chunkStart < self.timeBudget:
+                item = next(self.steps)
+
+                if isinstance(item, Result):
+                    self.result = item.value
+                    continue
+
+                stage, fraction = item
+                self.enterStage(stage)
+                self.setProgress(fraction)
+        except StopIteration:
+            self.transaction.end()
+            self.finish()
+            return
+        except Exception:
+            traceback.print_exc()
+            self.rollback("Failed")
+            return
+
+        self.transaction.end()
+        cmds.evalDeferred(self.step, lowestPriority=True)
+
+    def enterStage(self, stage):
+        """Records the time of the previous stage when a new one starts
+
+        Parameters
+        ----------
+        stage : str
+            The name of the stage the task is in
+        """
+
+        if stage == self.stage:
+            return
+
+        now = timeit.default_timer()
+        if self.stage is not None:
+            self.timings.append((self.stage, now - self.stageStart))
+
+        self.stage = stage
+        self.stageStart = now
+
+        if self.statusText and cmds.text(self.statusText, exists=True):
+            cmds.text(self.statusText, edit=True, label=stage)
+
+    def setProgress(self, fraction):
+        """Moves the progress bar
+
+        Parameters
+        ----------
+        fraction : float
+            The progress of the current stage, from 0 to 1
+        """
+
+        if self.progressBar and cmds.progressBar(self.progressBar, exists=True):
+            cmds.progressBar(self.progressBar, edit=True, progress=int(fraction*100))
+
+    def stop(self, message):
+        """Closes the last stage and restores the selection
+
+        Parameters
+        ----------
+        message : str
+            What is shown in the status text
+        """
+
+        self.enterStage(message)
+        self.stage = None
+        self.running = False
+
+        if rigUtils.Transaction.runningTask is self.transaction:
+            rigUtils.Transaction.runningTask = None
+
+        # Objects in the selection might have been deleted by the task
+        rigUtils.restoreSelection(self.selection)
+
+    def finish(self):
+        """Closes the task and gives its result"""
+
+        self.stop("Done in {:.2f} s".format(sum(seconds for stage, seconds in self.timings) +
+                                             timeit.default_timer() - self.stageStart))
+        self.setProgress(1.0)
+
+        if self.onFinish:
+            self.onFinish(self.result)
+
+    def rollback(self, message):
+        """Rolls back the transaction, removing what the chunks of the task did
+
+        Parameters
+        ----------
+        message : str
+            What is shown in the status text
+        """
+
+        self.steps.close()
+        self.transaction.rollback()
+        self.stop(message)
+        self.setProgress(0.0)
+
+        if self.onCancel:
+            self.onCancel()
+
+    def printTimings(self):
+        """Prints the time spent on every stage, i.e. from onFinish to see where the time went"""
+
+        print("{:<30}{:>10}".format("Stage", "seconds"))
+        for stage, seconds in self.timings:
+            print("{:<30}{:>10.3f}".format(stage, seconds))
@@ -0,0 +1,152 @@
+"""Controller shape library.
+
+This script creates many nurbs curve controllers at once. Every shape is
+described once in SHAPES and the controllers are stamped out of it, instead
+of building a new curve with cmds.curve and then matching, freezing and
+selecting each controller one by one.
+
+The controllers are made in two modes:
+    * Baked (default): the position is stored in the CVs and the pivots, which is
+      the same result as MatchTranslation followed by FreezeTransformations
+    * Shared shape: one curve shape is instanced under every controller and the
+      position is stored in the translate, so the shape data is saved only once
+
+Example:
+    positions = rigUtils.getPivots(locators)
+    controllers = controllerShapes.stampControllers(["ctrl1", "ctrl2"], positions, shape="cube")
+"""
+
+from maya.api import OpenMaya
+import rigUtils
+reload(rigUtils)
+
+# The CVs and knots of every shape, as they would be given to cmds.curve
+SHAPES = {
+    "cube": {
+        "degree": 1,
+        "points": [(-0.5, 0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5), (-0.5, 0.5, 0.5),
+                   (-0.5, -0.5, 0.5), (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5), (-0.5, -0.5, 0.5),
+                   (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5), (-0.5, -0.5, -0.5),
+                   (-0.5, 0.5, -0.5)],
+        "knots": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0, 15.0],
+    },
+    "diamond": {
+        "degree": 1,
+        "points": [(0, 0.5, 0), (0.5, 0, 0), (0, -0.5, 0), (-0.5, 0, 0), (0, 0.5, 0), (0, 0, 0.5), (0, -0.5, 0),
+                   (0, 0, -0.5), (0, 0.5, 0), (0.5, 0, 0), (0, 0, 0.5), (-0.5, 0, 0), (0, 0, -0.5), (0.5, 0, 0)],
+        "knots": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0],
+    },
+}
+
+def createCurveShape(shape, parent, offset=(0, 0, 0), size=1.0):
+    """Creates a curve shape under a transform
+
+    Parameters
+    ----------
+    shape : str
+        The name of the shape in SHAPES
+    parent : MObject
+        The transform that gets the curve
+    offset : tuple
+        A position added to every CV
+    size : float
+        The scale of the shape
+
+    Returns
+    -------
+    MObject
+        The new nurbsCurve shape
+    """
+
+    shapeData = SHAPES[shape]
+    points = OpenMaya.MPointArray([OpenMaya.MPoint(point[0]*size + offset[0],
+                                                   point[1]*size + offset[1],
+                                                   point[2]*size + offset[2]) for point in shapeData["points"]])
+
+    return OpenMaya.MFnNurbsCurve().create(points, OpenMaya.MDoubleArray(shapeData["knots"]), shapeData["degree"],
+                                           OpenMaya.MFnNurbsCurve.kOpen, False, False, parent)
+
+def stampControllers(names, positions, shape="cube", size=1.0, sharedShape=False):
+    """Creates a controller for every position
+
+    All the transforms are created and placed with one modifier each, so the
+    cost per controller is only the creation of its curve.
+
+    Parameters
+    ----------
+    names : list
+        The names of the controllers
+    positions : list
+        The (x, y, z) world position of every controller
+    shape : str
+        The name of the shape in SHAPES
+    size : float
+        The scale of the shape
+    sharedShape : bool
+        If True, every controller instances the same curve shape
+
+    Returns
+    -------
+    list
+        The names of the controllers, in the same order as the positions
+    """
+
+    if shape not in SHAPES:
+        raise ValueError("Unknown controller shape '{}', choose one of {}".format(shape, sorted(SHAPES)))
+
+    if not names:
+        return []
+
+    # Create and name every transform in one step
+    modifier = OpenMaya.MDagModifier()
+    transforms = []
+
+    for name in names:
+        transform = modifier.createNode("transform")
+        modifier.renameNode(transform, name)
+        transforms.append(transform)
+
+    modifier.doIt()
+
+    # A shared shape stays at the origin so the transforms are moved,
+    # otherwise the transforms stay frozen at the origin with their pivots on the position
+    if sharedShape:
+        attributes = [["translateX", "translateY", "translateZ"]]
+    else:
+        attributes = [["rotatePivotX", "rotatePivotY", "rotatePivotZ"], ["scalePivotX", "scalePivotY", "scalePivotZ"]]
+
+    # Place every transform in one step
+    placement = OpenMaya.MDGModifier()
+
+    for transform, position in zip(transforms, positions):
+        transformFn = OpenMaya.MFnDependencyNode(transform)
+        for attributeNames in attributes:
+            for attributeName, value in zip(attributeNames, position):
+                placement.newPlugValueDouble(transformFn.findPlug(attributeName, False), value)
+
+    placement.doIt()
+
+    # Add the curves
+    if sharedShape:
+        curveShape = createCurveShape(shape, transforms[0], size=size)
+
+        # The other controllers get an instance of the same shape
+        for transform in transforms[1:]:
+            OpenMaya.MFnDagNode(transform).addChild(curveShape, OpenMaya.MFnDagNode.kNextPos, True)
+
+        curveShapes = [curveShape]
+    else:
+        curveShapes = [createCurveShape(shape, transform, position, size) for transform, position in zip(transforms, positions)]
+
+    # Name the shapes like cmds.curve does
+    for curveShape, transform in zip(curveShapes, transforms):
+        OpenMaya.MFnDependencyNode(curveShape).setName("{}Shape".format(OpenMaya.MFnDependencyNode(transform).name()))
+
+    # The API doesn't record the controllers, undoing the step deletes them with their shapes
+    deleter = OpenMaya.MDagModifier()
+    for transform in transforms:
+        deleter.deleteNode(transform)
+    rigUtils.recordApiEdit(deleter.doIt, deleter.undoIt)
+
+    # Maya might have changed the names if they were used, so return the ones they got
+    return [OpenMaya.MFnDagNode(transform).partialPathName() for transform in transforms]
@@ -11,9 +11,68 @@ process and the groups that contain them. This way we can get the data later
 to parent them correctly to the mainController. This allows us to create multiple
 rigs of the same type (multiple wheels, treads, etc) and rig creation after
 parenting (add more wheels or arms)
+
+Each rig component (a tread, an arm, a set of wheels) is saved as one record
+in the rigManifest attribute. A record is a JSON string with the type of the
+component, its main controller, its group and the data specific to that type:
+    {"version": 2, "type": "tread", "mainController": "TreadMainController",
+     "mainControllerUuid": "...", "group": "TreadMainControllerGroup",
+     "groupUuid": "...", "data": {"curveRadius": 20.0, ...}}
+
+Names change when the user renames an object, so the records also save the
+UUID of the controller and the group, and loadManifest() updates the names
+with them. Besides, every controller and group is connected to the node
+through its message attribute (rigControllers and rigControllerGroups),
+so getConnectedNodes() gets all the ones that still exist with one query.
+
+Nodes made with older versions of the tool saved the controllers and their
+groups in separate lists (i.e. treadControllers and treadControllerGroups),
+migrateLegacyData() turns them into records.
+
+The values read from the node are kept in memory, so reading them again
+during a rigging session doesn't query the scene. BatchWriter updates that
+memory as it writes, so saving values one by one doesn't read the list again.
+Callbacks clear it whenever the node or its attributes change in any other
+way (by deleting values, by undo, by opening a file or by the user editing
+the node). When the callbacks are missing, or before a step that depends on
+the data like finalizeRig, verifyCache() compares the memory with the node.
 """
 
 from maya import cmds
+from maya.api import OpenMaya
+import json
+
+# Set to False to always read the values from the node
+CACHE_ENABLED = True
+
+# The attribute that saves a record for every rig component
+MANIFEST_ATTRIBUTE = "rigManifest"
+
+# The version of the records written by this module
+# 1: names only. 2: adds the UUIDs of the controller and the group
+MANIFEST_VERSION = 2
+
+# The message attributes that connect the node to the controllers and groups
+CONTROLLERS_ATTRIBUTE = "rigControllers"
+GROUPS_ATTRIBUTE = "rigControllerGroups"
+
+# The attributes used by older versions: component type, controllers and their groups
+LEGACY_ATTRIBUTES = [("tread", "treadControllers", "treadControllerGroups"),
+                     ("arm", "armControllers", "armControllerGroups"),
+                     ("wheel", "wheelControllers", "wheelControllerGroups")]
+
+# The values read from the data nodes {nodeName: {attributeName: CachedAttribute}}
+# and the callbacks that clear them. They are created only the first time the module
+# is loaded, so reload() doesn't lose track of the callbacks that are already registered
+try:
+    dataCache
+except NameError:
+    dataCache = {}
+    nodeCallbacks = {}
+    sceneCallbacks = []
+
+# The nodes BatchWriter is writing on, their callbacks don't clear the values it keeps up to date
+writingNodes = set()
 
 class NodeData():
     """A class used to represent a Node that saves rigging data to Maya
@@ -29,13 +88,15 @@ class NodeData():
         The name of the main nurbs curve that controls the rig
     mainControllerGroup : str
         The name of the group where the mainController is
-    controllerAttributeName : str
-        The name of the type of rig that is saved (i.e. wheelControllers, treadControllers, armControllers)
-    controllerGroupAttributeName : str
-        The name of the type of rig GROUP that is saved (i.e. wheelControllerGroups, treadControllerGroups, armControllerGroups)
+    componentType : str
+        The type of rig that is saved (i.e. wheel, tread, arm)
+    componentAttributes : list
+        The names of the attributes specific to this type of rig that are saved with it
 
     Methods
     -------
+    makeRecord()
+        Returns the manifest record of this rig component
     writeToNode()
         Takes the rigging info and stores it in a node
     """
@@ -44,14 +105,162 @@ class NodeData():
 
         self.mainController = ""
         self.mainControllerGroup =""
-        self.controllerAttributeName = ""
-        self.controllerGroupAttributeName = ""
+        self.componentType = ""
+        self.componentAttributes = []
+
+    def makeRecord(self):
+        """Returns the manifest record of this rig component"""
+
+        return makeRecord(self.componentType, self.mainController, self.mainControllerGroup,
+                          dict((name, getattr(self, name)) for name in self.componentAttributes))
 
     def writeToNode(self):
         """Takes the rigging info and stores it in a node"""
 
-        saveData(attributeName=self.controllerGroupAttributeName, value=self.mainControllerGroup)
-        saveData(attributeName=self.controllerAttributeName, value=self.mainController)
+        # The whole component is saved as one record
+        with BatchWriter() as writer:
+            writer.add(MANIFEST_ATTRIBUTE, encodeRecord(self.makeRecord()))
+
+        # Connect the controller and group so they can be found even if they are renamed
+        connectNodes(CONTROLLERS_ATTRIBUTE, [self.mainController])
+        connectNodes(GROUPS_ATTRIBUTE, [self.mainControllerGroup])
+
+class BatchWriter():
+    """A class used to save many values on the node at once
+
+    It is used in a with statement. The values are kept in memory while
+    the block runs and each attribute is written in a single pass when it ends.
+    If there is an error inside the block, nothing is written.
+
+    Example:
+        with dataNodeManager.BatchWriter() as writer:
+            writer.add("wheelControllers", "WheelsController1")
+            writer.add("wheelControllers", "WheelsController2")
+
+    Attributes
+    ----------
+    nodeName : str
+        The name of the rigging data node
+    attributeNames : list
+        The attributes that have values to write, in the order they were added
+    values : dict
+        The values to write on each attribute
+
+    Methods
+    -------
+    add(attributeName, value)
+        Adds a value to write on an attribute
+    flush()
+        Writes every value on the node
+    """
+
+    def __init__(self, nodeName="rigDataNode"):
+        """Initialize default values"""
+
+        self.nodeName = nodeName
+        self.attributeNames = []
+        self.values = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, errorType, errorValue, traceback):
+        # Only write if the block finished without errors
+        if errorType is None:
+            self.flush()
+
+        self.attributeNames = []
+        self.values = {}
+
+        # Let the error continue (if there was one)
+        return False
+
+    def add(self, attributeName, value):
+        """Adds a value to write on an attribute
+
+        Parameters
+        ----------
+        attributeName : str
+            The name of the attribute to store the info
+        value : str
+            The information to store
+        """
+
+        if attributeName not in self.values:
+            self.attributeNames.append(attributeName)
+            self.values[attributeName] = []
+
+        self.values[attributeName].append(value)
+
+    def flush(self):
+        """Writes every value on the node, skipping the ones that are already stored"""
+
+        if not self.attributeNames:
+            return
+
+        createDataNode(self.nodeName)
+
+        for attributeName in self.attributeNames:
+            createDataAttribute(self.nodeName, attributeName)
+
+            # The stored values come from memory, they are read from the node only once
+            stored = getCachedAttribute(self.nodeName, attributeName)
+
+            # New values go after the last element of the multi attribute. The indices can
+            # have gaps (i.e. an element removed by hand), so the count of values is not enough
+            if stored.nextIndex is None:
+                indices = cmds.getAttr("{}.{}".format(self.nodeName, attributeName), multiIndices=True) or []
+                stored.nextIndex = max(indices) + 1 if indices else 0
+
+            # Our own writes don't clear the values in memory, they are updated with every value written
+            writingNodes.add(self.nodeName)
+            try:
+                for value in self.values[attributeName]:
+                    # Skip duplicates, both the stored ones and the ones on this batch
+                    if value in stored.valueSet:
+                        continue
+
+                    cmds.setAttr("{}.{}[{}]".format(self.nodeName, attributeName, stored.nextIndex), value,
+                                 type="string")
+                    stored.add(value)
+            finally:
+                writingNodes.discard(self.nodeName)
+
+class CachedAttribute():
+    """The values of an attribute kept in memory
+
+    Attributes
+    ----------
+    values : list
+        The values in the order they are stored on the node
+    valueSet : set
+        The same values, to find out quickly if a value is stored
+    nextIndex : int
+        The index after the last element of the multi attribute, None until it is queried
+
+    Methods
+    -------
+    add(value)
+        Records a value written on the next index
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.valueSet = set(values)
+        self.nextIndex = None
+
+    def add(self, value):
+        """Records a value written on the next index
+
+        Parameters
+        ----------
+        value : str
+            The value that was written
+        """
+
+        self.values.append(value)
+        self.valueSet.add(value)
+        self.nextIndex += 1
 
 def createDataNode(nodeName):
     """Creates a new network node if it was not previously created
@@ -84,6 +293,113 @@ def createDataAttribute(nodeName, attributeName):
     if not cmds.attributeQuery(attributeName, node=nodeName, exists=True):
         cmds.addAttr(nodeName, shortName=attributeName, dataType="string", multi=True)
 
+def createMessageAttribute(nodeName, attributeName):
+    """Creates a multi message attribute on the node if it doesn't exist.
+
+    Message attributes don't save data, they save connections to other nodes.
+    
+    Parameters
+    ----------
+    nodeName : str
+        The name of the rigging data node to create a new attribute into
+    attributeName : str
+        The name of the desired attribute
+    """
+
+    # indexMatters=False lets us connect to the next free element
+    if not cmds.attributeQuery(attributeName, node=nodeName, exists=True):
+        cmds.addAttr(nodeName, shortName=attributeName, attributeType="message", multi=True, indexMatters=False)
+
+def connectNodes(attributeName, nodes, nodeName="rigDataNode"):
+    """Connects the message attribute of the nodes to an attribute on the data node.
+
+    Parameters
+    ----------
+    attributeName : str
+        The name of the message attribute on the data node
+    nodes : list
+        The names of the nodes to connect
+    nodeName : str
+        The name of the rigging data node
+    """
+
+    createDataNode(nodeName)
+    createMessageAttribute(nodeName, attributeName)
+
+    # The nodes that are already connected are not connected twice
+    connected = set(getConnectedNodes(attributeName, nodeName=nodeName, fullPath=True))
+
+    for node in nodes:
+        if not node or not cmds.objExists(node) or cmds.ls(node, long=True)[0] in connected:
+            continue
+
+        cmds.connectAttr("{}.message".format(node), "{}.{}".format(nodeName, attributeName), nextAvailable=True)
+
+def getConnectedNodes(attributeName, nodeName="rigDataNode", fullPath=False):
+    """Gets every node connected to a message attribute of the data node with one query.
+
+    Deleted nodes are disconnected by Maya, so only the ones that exist are returned.
+
+    Parameters
+    ----------
+    attributeName : str
+        The name of the message attribute on the data node
+    nodeName : str
+        The name of the rigging data node
+    fullPath : bool
+        True to get the full DAG path of the nodes
+
+    Returns
+    -------
+    list
+        The names of the connected nodes, in the order they were connected
+    """
+
+    if not cmds.objExists(nodeName) or not cmds.attributeQuery(attributeName, node=nodeName, exists=True):
+        return []
+
+    return cmds.listConnections("{}.{}".format(nodeName, attributeName), source=True, destination=False,
+                                fullNodeName=fullPath) or []
+
+def getUuid(nodeName):
+    """Returns the UUID of a node, or an empty string if it doesn't exist
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node
+    """
+
+    if not nodeName or not cmds.objExists(nodeName):
+        return ""
+
+    return cmds.ls(nodeName, uuid=True)[0]
+
+def resolveUuids(uuids):
+    """Finds the current names of many nodes given their UUIDs
+
+    Parameters
+    ----------
+    uuids : list
+        The UUIDs to look for
+
+    Returns
+    -------
+    dict
+        The name of each UUID that belongs to a node in the scene
+    """
+
+    uuids = [uuid for uuid in set(uuids) if uuid]
+    if not uuids:
+        return {}
+
+    # ls doesn't keep the order of the UUIDs, so we ask for the UUIDs of the names it returns
+    names = cmds.ls(uuids) or []
+    if not names:
+        return {}
+
+    return dict(zip(cmds.ls(names, uuid=True), names))
+
 def saveData(nodeName="rigDataNode", attributeName="myAttr", value=""):
     """Save data in the specified attribute on the node.
 
@@ -97,47 +413,76 @@ def saveData(nodeName="rigDataNode", attributeName="myAttr", value=""):
         The information to store (i.e. the namme of the controllers which will be used in other step)
     """
 
-    # Try to create a new node
-    createDataNode(nodeName)
+    # A batch of one value. It creates the node and the attribute if needed
+    # and skips the value if it is already in the list
+    # (e.g. object was deleted and created new one with the same name)
+    # The list is read from the node only the first time, after that it is kept up to date in memory
+    with BatchWriter(nodeName) as writer:
+        writer.add(attributeName, value)
 
-    # Trye to create an attribute on that node
-    createDataAttribute(nodeName, attributeName)
+def getData(nodeName="rigDataNode", attributeName="myAttr", useCache=True):
+    """Get data from a specified attribute on the node.
 
-    # Get the first element [0] of the attribute
-    theAttr = cmds.getAttr("{}.{}[0]".format(nodeName, attributeName))
+    The values are read from the node only the first time, after that they
+    come from memory until the node changes.
 
-    # Check if that element is valid (the attribute list has at least one attribute)
-    if theAttr:
-        # Get entire list of attributes
-        attrList = getData(attributeName=attributeName)
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node where the attribute is located
+    attributeName : str
+        The name of the attribute to retrieve the info from
+    useCache : bool
+        False to read the values directly from the node
+    """
 
-        # If the value is already in the list (e.g. object was deleted and created new one with the same name)
-        # exit the function
-        if value in attrList:
-            return
+    # Return a copy so the saved list can't be modified by mistake
+    return list(getCachedAttribute(nodeName, attributeName, useCache).values)
 
-        # The index where we want to save the new value is the same as the length of the list
-        # Because we want to store it in the end of the multi attribute
-        elementIndex = len(attrList)
+def getCachedAttribute(nodeName="rigDataNode", attributeName="myAttr", useCache=True):
+    """Get the values of an attribute kept in memory, reading them from the node the first time.
 
-    # If the element is not valid (the list is empty),
-    # we add our value to the index 0
-    else:
-        elementIndex = 0
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node where the attribute is located
+    attributeName : str
+        The name of the attribute to retrieve the info from
+    useCache : bool
+        False to read the values directly from the node
 
-    # Set the attribute value
-    # Using format function to put variables inside {}'s
-    # This way we build the attribute's name using the function's parameters
-    # String is {nodeName}.{attributeName}{elementIndex}
-    cmds.setAttr("{}.{}[{}]".format(nodeName, attributeName, elementIndex), value, type="string")
+    Returns
+    -------
+    CachedAttribute
+        The values of the attribute. It is not kept if the cache is off or the node doesn't exist
     """
-    theAttr = cmds.getAttr("{}.{}[*]".format(nodeName, attributeName))
 
-    size = cmds.getAttr("{}.{}".format(nodeName, attributeName),size=True)
-    """
+    if not (useCache and CACHE_ENABLED):
+        return CachedAttribute(readData(nodeName, attributeName))
 
-def getData(nodeName="rigDataNode", attributeName="myAttr"):
-    """Get data from a specified attribute on the node.
+    # Nodes that don't exist are not saved, as there is no callback to know when they are created
+    if nodeName not in dataCache:
+        if not cmds.objExists(nodeName):
+            return CachedAttribute([])
+        watchNode(nodeName)
+        dataCache[nodeName] = {}
+
+    nodeCache = dataCache[nodeName]
+
+    if attributeName not in nodeCache:
+        nodeCache[attributeName] = CachedAttribute(readData(nodeName, attributeName))
+
+    # Without the callbacks nothing clears the values when the node changes, so compare them with the node
+    # and register the callbacks again
+    elif not isWatched(nodeName):
+        if verifyCache(nodeName, [attributeName]):
+            return getCachedAttribute(nodeName, attributeName)
+        watchNode(nodeName)
+
+    return nodeCache[attributeName]
+
+def readData(nodeName="rigDataNode", attributeName="myAttr"):
+    """Read data from a specified attribute directly from the node.
 
     Parameters
     ----------
@@ -147,8 +492,8 @@ def getData(nodeName="rigDataNode", attributeName="myAttr"):
         The name of the attribute to retrieve the info from
     """
 
-    # If the attribute doesn't exist, return an empty list
-    if not cmds.attributeQuery(attributeName, node=nodeName, exists=True):
+    # If the node or the attribute don't exist, return an empty list
+    if not cmds.objExists(nodeName) or not cmds.attributeQuery(attributeName, node=nodeName, exists=True):
         return []
 
     # Get the size of the attribute
@@ -171,6 +516,290 @@ def getData(nodeName="rigDataNode", attributeName="myAttr"):
     else:
         return []
 
+def makeRecord(componentType, mainController, group, componentData=None):
+    """Creates a manifest record for a rig component.
+
+    Parameters
+    ----------
+    componentType : str
+        The type of rig (i.e. wheel, tread, arm)
+    mainController : str
+        The name of the controller that drives the component
+    group : str
+        The name of the group that contains the controller
+    componentData : dict
+        Information specific to the type of rig (i.e. curveRadius, treadMesh, rootJoint)
+    """
+
+    return {"version": MANIFEST_VERSION,
+            "type": componentType,
+            "mainController": mainController,
+            "mainControllerUuid": getUuid(mainController),
+            "group": group,
+            "groupUuid": getUuid(group),
+            "data": componentData or {}}
+
+def encodeRecord(record):
+    """Turns a record into the string that is saved on the node.
+
+    The keys are sorted so the same record always gives the same string,
+    which lets the BatchWriter skip duplicates.
+    """
+
+    return json.dumps(record, sort_keys=True)
+
+def decodeRecord(value):
+    """Turns a string saved on the node back into a record.
+
+    Returns
+    -------
+    dict
+        The record, or None if the string is not a record this version can read
+    """
+
+    try:
+        record = json.loads(value)
+    except ValueError:
+        cmds.warning("Skipping invalid rig manifest record: {}".format(value))
+        return None
+
+    if not isinstance(record, dict) or record.get("version", 0) > MANIFEST_VERSION:
+        cmds.warning("Skipping rig manifest record made by a newer version: {}".format(value))
+        return None
+
+    # Version 1 records don't have UUIDs, look for them using the names
+    if record.get("version", 0) < 2:
+        record["mainControllerUuid"] = getUuid(record.get("mainController"))
+        record["groupUuid"] = getUuid(record.get("group"))
+        record["version"] = 2
+
+    return record
+
+def loadManifest(nodeName="rigDataNode"):
+    """Reads every rig component saved on the node.
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the rigging data node
+
+    Returns
+    -------
+    list
+        The records of the components in the order they were saved
+    """
+
+    records = [decodeRecord(value) for value in getData(nodeName=nodeName, attributeName=MANIFEST_ATTRIBUTE)]
+    records = [record for record in records if record]
+
+    # Update the names of the objects that were renamed, and clear the ones that were deleted
+    names = resolveUuids([record[key] for record in records for key in ("mainControllerUuid", "groupUuid")])
+    for record in records:
+        record["mainController"] = names.get(record["mainControllerUuid"], "")
+        record["group"] = names.get(record["groupUuid"], "")
+
+    return records
+
+def migrateLegacyData(nodeName="rigDataNode"):
+    """Turns the controller and group lists saved by older versions into manifest records.
+
+    The controllers and groups were matched by their position in the lists.
+    The old attributes are deleted after their records are saved.
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the rigging data node
+
+    Returns
+    -------
+    int
+        The number of records that were created
+    """
+
+    if not cmds.objExists(nodeName):
+        return 0
+
+    migrated = 0
+
+    with BatchWriter(nodeName) as writer:
+        for componentType, controllerAttribute, groupAttribute in LEGACY_ATTRIBUTES:
+            controllers = getData(nodeName=nodeName, attributeName=controllerAttribute)
+            groups = getData(nodeName=nodeName, attributeName=groupAttribute)
+
+            for index, controller in enumerate(controllers):
+                group = groups[index] if index < len(groups) else ""
+                writer.add(MANIFEST_ATTRIBUTE, encodeRecord(makeRecord(componentType, controller, group)))
+                migrated += 1
+
+            # Connect the ones that still exist
+            connectNodes(CONTROLLERS_ATTRIBUTE, controllers, nodeName=nodeName)
+            connectNodes(GROUPS_ATTRIBUTE, groups, nodeName=nodeName)
+
+    # Delete the old lists only after the records were saved
+    for componentType, controllerAttribute, groupAttribute in LEGACY_ATTRIBUTES:
+        deleteDataAttribute(nodeName=nodeName, attributeName=controllerAttribute)
+        deleteDataAttribute(nodeName=nodeName, attributeName=groupAttribute)
+
+    return migrated
+
+def verifyCache(nodeName="rigDataNode", attributeNames=None):
+    """Compares the values in memory against the values on the node.
+
+    The callbacks clear the memory whenever the node changes, this is the fallback
+    for when they can't be trusted. If something is different, the memory of that
+    node is cleared so the next read gets the values from the node.
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node to verify
+    attributeNames : list
+        The attributes to verify, every attribute in memory if not given
+
+    Returns
+    -------
+    list
+        The names of the attributes that were different
+    """
+
+    nodeCache = dataCache.get(nodeName, {})
+    if attributeNames is None:
+        attributeNames = list(nodeCache)
+
+    mismatches = []
+
+    for attributeName in attributeNames:
+        stored = nodeCache.get(attributeName)
+        if stored is None:
+            continue
+
+        if stored.values != readData(nodeName, attributeName):
+            mismatches.append(attributeName)
+            continue
+
+        # The next index is only known after a write
+        if stored.nextIndex is not None:
+            indices = cmds.getAttr("{}.{}".format(nodeName, attributeName), multiIndices=True) or []
+            if stored.nextIndex != (max(indices) + 1 if indices else 0):
+                mismatches.append(attributeName)
+
+    if mismatches:
+        cmds.warning("Rig data cache of {} was out of date: {}".format(nodeName, ", ".join(mismatches)))
+        clearCache(nodeName)
+
+    return mismatches
+
+def isWatched(nodeName):
+    """Returns True if the callbacks that clear the memory of a node are registered
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node
+    """
+
+    return nodeName in nodeCallbacks and bool(sceneCallbacks)
+
+def clearCache(nodeName=None):
+    """Forgets the values read from a node.
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node to forget, if not given every node is forgotten
+    """
+
+    if nodeName is None:
+        dataCache.clear()
+    else:
+        dataCache.pop(nodeName, None)
+
+def watchNode(nodeName):
+    """Registers the callbacks that clear the memory of a node when it changes.
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node to watch
+    """
+
+    watchScene()
+
+    # The callbacks are already there
+    if nodeName in nodeCallbacks:
+        return
+
+    selectionList = OpenMaya.MSelectionList()
+    selectionList.add(nodeName)
+    node = selectionList.getDependNode(0)
+
+    nodeCallbacks[nodeName] = [
+        # Any attribute of the node changes, is added or is removed (including undo and manual edits)
+        OpenMaya.MNodeMessage.addAttributeChangedCallback(node, onNodeChanged, nodeName),
+        # The node is renamed, the values are saved with its name
+        OpenMaya.MNodeMessage.addNameChangedCallback(node, onNodeRenamed, nodeName),
+        # The node is deleted
+        OpenMaya.MNodeMessage.addNodePreRemovalCallback(node, onNodeRemoved, nodeName)]
+
+def unwatchNode(nodeName):
+    """Removes the callbacks of a node and forgets its values.
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the node
+    """
+
+    clearCache(nodeName)
+
+    for callbackId in nodeCallbacks.pop(nodeName, []):
+        OpenMaya.MMessage.removeCallback(callbackId)
+
+def watchScene():
+    """Registers the callbacks that forget every node when the scene changes"""
+
+    if sceneCallbacks:
+        return
+
+    # Opening, importing or creating a new scene
+    for message in (OpenMaya.MSceneMessage.kAfterOpen, OpenMaya.MSceneMessage.kAfterNew,
+                    OpenMaya.MSceneMessage.kAfterImport, OpenMaya.MSceneMessage.kAfterCreateReference):
+        sceneCallbacks.append(OpenMaya.MSceneMessage.addCallback(message, onSceneChanged, True))
+
+    # Undo and redo can bring back nodes that were deleted
+    for event in ("Undo", "Redo"):
+        sceneCallbacks.append(OpenMaya.MEventMessage.addEventCallback(event, onSceneChanged, False))
+
+def onNodeChanged(message, plug, otherPlug, nodeName):
+    """Callback for changes on the attributes of a data node"""
+
+    # BatchWriter keeps the values up to date while it writes
+    if nodeName in writingNodes:
+        return
+
+    clearCache(nodeName)
+
+def onNodeRenamed(node, previousName, nodeName):
+    """Callback for a data node that was renamed"""
+
+    unwatchNode(nodeName)
+
+def onNodeRemoved(node, nodeName):
+    """Callback for a data node that is going to be deleted"""
+
+    unwatchNode(nodeName)
+
+def onSceneChanged(newScene):
+    """Callback for a new scene, an opened file, an import, undo or redo"""
+
+    clearCache()
+
+    # Nodes from a new or opened file are different objects, watch them again when they are read
+    if newScene:
+        for nodeName in list(nodeCallbacks):
+            unwatchNode(nodeName)
+
 def deleteValue(nodeName="rigDataNode", attributeName="myAttr", value=""):
     """Delete a specified value from the attribute list on the node.
 
@@ -191,25 +820,32 @@ def deleteValue(nodeName="rigDataNode", attributeName="myAttr", value=""):
     # Get the attribute list from the node
     dataList = getData(nodeName=nodeName, attributeName=attributeName)
 
-    # If it is empty (or doesn't exist), exit the function
-    if not dataList:
+    # If it is empty (or doesn't exist), or the value is not there, exit the function
+    if value not in dataList:
         return
 
-    # Delete each element on the attribute using their indexes
-    for index in xrange(len(dataList)):
-        # removeMultiInstance removes an element by giving the name of the attribute and the index of the element
-        cmds.removeMultiInstance("{}.{}[{}]".format(nodeName, attributeName, index))
-
-    # Create a new list containing only the elements that are not value
-    # This is a list comprehension. It uses a for statement to iterate over a list
-    # and at the same time compares the elements with the value given to see that they are not equal
-    # then every element that succeeds the verification is added to the new list
-    # [] are necessary to wrap the line to specify that we are saving a list
-    newList = [element for element in dataList if not element == value]
-
-    # Save each element on the new list to the node
-    for element in newList:
-        saveData(nodeName=nodeName, attributeName=attributeName, value=element)
+    plug = "{}.{}".format(nodeName, attributeName)
+
+    # The indices of the elements that exist on the attribute, in the same order as dataList
+    indices = cmds.getAttr(plug, multiIndices=True)
+
+    # Move every element that is kept down to the first free index
+    # Elements before the first deleted one stay where they are
+    writeIndex = 0
+    for readIndex, element in zip(indices, dataList):
+        if element == value:
+            continue
+
+        if readIndex != writeIndex:
+            cmds.setAttr("{}[{}]".format(plug, writeIndex), element, type="string")
+
+        writeIndex += 1
+
+    # Trim the elements left after the last one that was kept
+    for index in indices:
+        if index >= writeIndex:
+            # removeMultiInstance removes an element by giving the name of the attribute and the index of the element
+            cmds.removeMultiInstance("{}[{}]".format(plug, index), b=True)
 
 def deleteDataAttribute(nodeName="rigDataNode", attributeName="myAttr"):
     """Delete the entire attribute from the node.
@@ -12,6 +12,8 @@ import os
 import webbrowser
 import dataNodeManager
 reload(dataNodeManager)
+import rigUtils
+reload(rigUtils)
 
 class MainControllerData:
     """A class to save information for this rigging process"""
@@ -87,6 +89,8 @@ def pickingObj(*args):
     selectedObj=cmds.ls(selection=True, objectsOnly=True)[0]
     cmds.textFieldButtonGrp("bodyName", edit=True, text=selectedObj)
 
+@rigUtils.transaction
+@rigUtils.preserveSelection
 def finalizeRig(*args):
     """This function is in charge of putting together the previous rig parts"""
 
@@ -109,7 +113,7 @@ def finalizeRig(*args):
         cmds.setAttr("{}Shape.overrideColorB".format(data.mainController), 0)
 
         # Create group for all controllers and save it's name to the data object
-        data.mainGroup = cmds.group(name="MainControllerGroup")
+        data.mainGroup = cmds.group(data.mainController, name="MainControllerGroup")
     
     # If the controller already exists, save their names to the data object
     else:
@@ -119,20 +123,25 @@ def finalizeRig(*args):
     # If there is a node with the rigging data, we use it to retrieve the previous steps
     if cmds.objExists("rigDataNode"):
 
-        # Parent treads to main controller
-        parentRigControllers("treadControllers","treadControllerGroups")
+        # The controllers are parented from the data in memory, make sure it is the same as the node's
+        dataNodeManager.verifyCache()
 
-        # Parent arms to main controller
-        parentRigControllers("armControllers","armControllerGroups")
+        # Nodes made with older versions of the tool save the data in separate lists
+        dataNodeManager.migrateLegacyData()
 
-        # Parent wheels to main controller
-        parentRigControllers("wheelControllers", "wheelControllerGroups")
+        # Get every tread, arm and wheel set controller and group that still exist
+        controllers, groups = getRigComponents()
+
+        # Parent them to main controller
+        parentRigControllers(controllers, groups)
 
 
 def theEagle(*args):
     # open a link
     webbrowser.open("https://www.youtube.com/watch?v=IQnsREsChWs")
 
+@rigUtils.transaction
+@rigUtils.preserveSelection
 def parentMesh(*args):
     """This function looks for all the meshes on the scene and groups them together"""
 
@@ -142,71 +151,79 @@ def parentMesh(*args):
     # We got shape nodes, so now we list their parents to get transform nodes
     transforms = cmds.listRelatives(mesh, p=True, path=True)
 
-    # Select all the transform nodes that have meshes
-    cmds.select(transforms, r=True)
-    
     # If the group already exists, parent them
     if cmds.objExists("VehicleMeshGroup"):
-        cmds.parent("VehicleMeshGroup")
+        cmds.parent(transforms, "VehicleMeshGroup")
 
     # Else, create and group
     else:
-        cmds.group(name="VehicleMeshGroup")
+        cmds.group(transforms, name="VehicleMeshGroup")
 
-def parentRigControllers(controlAttributeName, groupAttributeName):
-    """Parents the previous steps of the rigging process to the MainController
+def getRigComponents():
+    """Gets the controllers and groups of the previous steps that still exist
 
-    It gets the data out of the rigData node, where the name of the controllers are saved.
-    Then uses those names to parent them to the main Controller.
-    
-    Parameters
-    ----------
-    controlAttributeName : str
-        The name of the attribute in the node that saves all the controllers previously created
-    groupAttributeName : str
-        The name of the attribute in that node that contains the offset groups for the controllers
+    The manifest records find them by their UUIDs, so renamed objects are found with their new names.
+    The nodes connected to the rigData node are added after them, in case a step connected a node
+    without saving its record.
+
+    Returns
+    -------
+    tuple
+        The list of controllers and the list of groups, without repeated names
     """
 
-    # Get a list with all the controller names
-    controllerData = dataNodeManager.getData(attributeName=controlAttributeName)
+    records = dataNodeManager.loadManifest()
+    controllers = [record["mainController"] for record in records]
+    groups = [record["group"] for record in records]
 
-    # Get a list with all the group names
-    controllerEmptyGroups = dataNodeManager.getData(attributeName=groupAttributeName)
+    controllers += dataNodeManager.getConnectedNodes(dataNodeManager.CONTROLLERS_ATTRIBUTE)
+    groups += dataNodeManager.getConnectedNodes(dataNodeManager.GROUPS_ATTRIBUTE)
 
-    # If there are no controllers, delete the attributes to restart the node
-    if not controllerData:
-        dataNodeManager.deleteDataAttribute(attributeName=controlAttributeName)
-        dataNodeManager.deleteDataAttribute(attributeName=groupAttributeName)
-        return
+    # Deleted objects have an empty name, and a node can be both in a record and connected
+    return removeRepeated(controllers), removeRepeated(groups)
 
-    # For each controller in the controller List
-    for controller in controllerData:
+def removeRepeated(names):
+    """Returns the names without the empty or repeated ones, keeping their order"""
+
+    found = set()
+    result = []
 
-        # If the object does not exist (it was deleted), skip this step of the for loop
-        if not cmds.objExists(controller):
-            continue
-        
-        # Select the vehicle's main controller and the rig part controller
-        cmds.select(data.mainController, controller)
+    for name in names:
+        if name and name not in found:
+            found.add(name)
+            result.append(name)
 
-        # Add a parent constraint
-        cmds.parentConstraint(mo=True)
+    return result
 
-        # Select the rig part controller and the offset group of the MainController
-        cmds.select(controller, data.mainGroup)
+def parentRigControllers(controllers, groups):
+    """Parents the previous steps of the rigging process to the MainController
 
-        # Parent them
-        cmds.parent()
+    It gets the controllers found by getRigComponents, which are the ones that still exist.
+    Then parents them to the main Controller.
+    
+    Parameters
+    ----------
+    controllers : list
+        The controllers of every rig component
+    groups : list
+        The offset groups of those controllers
+    """
 
-    # Delete the data for previous controllers so we don't try to parent them again
-    dataNodeManager.deleteDataAttribute(attributeName=controlAttributeName)
+    # For each controller in the controller List
+    for controller in controllers:
+
+        # Add a parent constraint from the vehicle's main controller to the rig part controller
+        cmds.parentConstraint(data.mainController, controller, mo=True)
+
+    # Parent every rig part controller to the offset group of the MainController in one call
+    if controllers:
+        cmds.parent(controllers, data.mainGroup)
 
     # Delete all the offset groups in the scene (now they are empty as we moved the controllers that were inside)
-    for group in controllerEmptyGroups:
-        if not cmds.objExists(group):
-            dataNodeManager.deleteValue(attributeName=groupAttributeName,value=controller)
-            continue
-        cmds.delete(group)
-
-    # Delete all group data from node
-    dataNodeManager.deleteDataAttribute(attributeName=groupAttributeName)
\ No newline at end of file
+    if groups:
+        cmds.delete(groups)
+
+    # Delete the data for previous components so we don't try to parent them again
+    dataNodeManager.deleteDataAttribute(attributeName=dataNodeManager.MANIFEST_ATTRIBUTE)
+    dataNodeManager.deleteDataAttribute(attributeName=dataNodeManager.CONTROLLERS_ATTRIBUTE)
+    dataNodeManager.deleteDataAttribute(attributeName=dataNodeManager.GROUPS_ATTRIBUTE)
\ No newline at end of file
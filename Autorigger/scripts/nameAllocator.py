@@ -0,0 +1,164 @@
+"""Unique name allocation.
+
+This script generates unique names for the objects created by the rigging
+tools. Instead of asking the scene if every candidate name exists, it reads
+every name in the scene once and keeps an index of them. The index groups
+the names by their prefix (the name without its last digits), so the next
+free number of a name can be found without trying every number before it.
+
+Example:
+    names = nameAllocator.NameAllocator()
+    bucketName = names.reserve("bucketCtrl")          # bucketCtrl, or bucketCtrl3 if bucketCtrl2 exists
+    jointNames = names.reserveBatch("ArmJnt", 4)      # ArmJnt1 to ArmJnt4, or ArmJnt5 to ArmJnt8
+
+Indexing the scene reads every name in it, so a rigging step makes one index and
+uses it for all its names. rigUtils.sharedNames() returns the index of the step
+that is running.
+"""
+
+from maya import cmds
+import re
+
+# Splits a name into its prefix and its last digits (i.e. ArmJnt12 -> ArmJnt, 12)
+SUFFIX_PATTERN = re.compile(r"^(.*?)(\d*)$")
+
+class NameAllocator():
+    """A class used to generate unique names for the scene
+
+    Attributes
+    ----------
+    names : set
+        Every short name in the scene plus the names reserved by this object
+    suffixes : dict
+        For every prefix, the list of digits that appear after it
+    highest : dict
+        The highest number found after each name that was already requested
+
+    Methods
+    -------
+    reserve(name)
+        Returns the name if it is free, otherwise the name with the next free number
+    reserveBatch(name, count)
+        Returns a list of names with the next free numbers
+    """
+
+    def __init__(self, sceneNames=None):
+        """Index the names in the scene
+
+        Parameters
+        ----------
+        sceneNames : list
+            The names to index, by default every node in the scene
+        """
+
+        if sceneNames is None:
+            sceneNames = cmds.ls()
+
+        self.names = set()
+        self.suffixes = {}
+        self.highest = {}
+
+        for name in sceneNames:
+            # Keep only the short name of DAG paths (i.e. |group|TreadCurve -> TreadCurve)
+            self.add(name.split("|")[-1])
+
+    def add(self, name):
+        """Adds a name to the index
+
+        Parameters
+        ----------
+        name : str
+            The name to add
+        """
+
+        self.names.add(name)
+
+        prefix, digits = SUFFIX_PATTERN.match(name).groups()
+        self.suffixes.setdefault(prefix, []).append(digits)
+
+        # Update the numbers of the names that were already requested
+        for base in self.highest:
+            number = self.numberAfter(base, name)
+            if number > self.highest[base]:
+                self.highest[base] = number
+
+    def numberAfter(self, base, name):
+        """Returns the number that goes after base in name, or 0 if name is not base plus a number
+
+        Parameters
+        ----------
+        base : str
+            The name without the number
+        name : str
+            The name to check
+        """
+
+        rest = name[len(base):]
+
+        # Numbers generated by this class never start with 0
+        if name.startswith(base) and rest.isdigit() and not rest.startswith("0"):
+            return int(rest)
+
+        return 0
+
+    def highestNumber(self, base):
+        """Returns the highest number found after a name in the scene
+
+        Parameters
+        ----------
+        base : str
+            The name without the number
+        """
+
+        if base not in self.highest:
+            # Only the names that share the prefix of base can be base plus a number
+            prefix, digits = SUFFIX_PATTERN.match(base).groups()
+            numbers = [self.numberAfter(base, prefix + suffix) for suffix in self.suffixes.get(prefix, [])]
+            self.highest[base] = max(numbers) if numbers else 0
+
+        return self.highest[base]
+
+    def reserve(self, name):
+        """Returns a unique name and reserves it
+
+        Parameters
+        ----------
+        name : str
+            The desired name
+
+        Returns
+        -------
+        str
+            The name if it is not used, otherwise the name followed by the next free number
+        """
+
+        if name in self.names:
+            name = "{}{}".format(name, self.highestNumber(name) + 1)
+
+        self.add(name)
+
+        return name
+
+    def reserveBatch(self, name, count):
+        """Returns a list of unique names and reserves them
+
+        Parameters
+        ----------
+        name : str
+            The desired name, a number is added to it
+        count : int
+            The amount of names to generate
+
+        Returns
+        -------
+        list
+            count names numbered after the highest number already used for that name
+        """
+
+        firstNumber = self.highestNumber(name) + 1
+        batch = ["{}{}".format(name, number) for number in range(firstNumber, firstNumber + count)]
+
+        for newName in batch:
+            self.add(newName)
+
+        return batch
@@ -0,0 +1,61 @@
+"""Maya plugin that puts the edits made through the API in the undo queue.
+
+Edits made with the API (MFnMesh.create, MDagModifier.doIt, setCVPositions...)
+are not commands, so undoing a rigging step leaves them behind. The rigApiEdit
+command of this plugin takes the undo and redo functions of an edit that was
+already made, and runs them when the command is undone or redone.
+
+It is not used directly, rigUtils loads the plugin and recordApiEdit gives it
+the functions of the edit:
+    meshFn.setPoints(newPoints)
+    rigUtils.recordApiEdit(functools.partial(meshFn.setPoints, oldPoints),
+                           functools.partial(meshFn.setPoints, newPoints))
+"""
+
+from maya.api import OpenMaya
+import rigUtils
+
+def maya_useNewAPI():
+    """Tells Maya the plugin uses the Python API 2.0"""
+
+class RigApiEdit(OpenMaya.MPxCommand):
+    """Command that undoes and redoes an edit made through the API
+
+    Attributes
+    ----------
+    undo : function
+        Takes the scene back to before the edit, or None
+    redo : function
+        Makes the edit again after it was undone
+    """
+
+    name = "rigApiEdit"
+
+    def __init__(self):
+        OpenMaya.MPxCommand.__init__(self)
+        self.undo = None
+        self.redo = None
+
+    @staticmethod
+    def creator():
+        return RigApiEdit()
+
+    def doIt(self, args):
+        # The edit is already made, only its functions are taken
+        self.undo, self.redo = rigUtils.pendingApiEdits.pop()
+
+    def undoIt(self):
+        if self.undo:
+            self.undo()
+
+    def redoIt(self):
+        self.redo()
+
+    def isUndoable(self):
+        return True
+
+def initializePlugin(plugin):
+    OpenMaya.MFnPlugin(plugin).registerCommand(RigApiEdit.name, RigApiEdit.creator)
+
+def uninitializePlugin(plugin):
+    OpenMaya.MFnPlugin(plugin).deregisterCommand(RigApiEdit.name)
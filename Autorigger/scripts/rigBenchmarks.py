@@ -0,0 +1,422 @@
+"""Rigging benchmarks.
+
+This script measures how long the rigging operations take inside Maya,
+so the different ways of building a rig can be compared.
+
+Every benchmark creates the objects it needs and deletes them at the end,
+so it can be run in any scene. The results are printed as a table in the
+script editor and returned as a list of dictionaries.
+
+Example:
+    import rigBenchmarks
+    rigBenchmarks.benchmarkTreadLayout()
+"""
+
+from maya import cmds
+import os
+import tempfile
+import timeit
+import ThreadMaker
+reload(ThreadMaker)
+import treadLayout
+reload(treadLayout)
+import dataNodeManager
+reload(dataNodeManager)
+import wheelRigger
+reload(wheelRigger)
+import rigUtils
+reload(rigUtils)
+
+def timeCall(function, *args, **kwargs):
+    """Calls a function and measures how long it takes
+
+    Returns
+    -------
+    tuple
+        The seconds it took and the result of the function
+    """
+
+    startTime = timeit.default_timer()
+    result = function(*args, **kwargs)
+
+    return timeit.default_timer() - startTime, result
+
+def printTable(title, columns, rows):
+    """Prints the results of a benchmark as a table
+
+    Parameters
+    ----------
+    title : str
+        The name of the benchmark
+    columns : list
+        The keys of the rows to print, in order
+    rows : list
+        A list of dictionaries with the results
+    """
+
+    # Each column is as wide as its title
+    widths = [max(len(column) + 2, 12) for column in columns]
+
+    print("# {}".format(title))
+    print("".join(column.rjust(width) for column, width in zip(columns, widths)))
+
+    for row in rows:
+        cells = []
+        for column, width in zip(columns, widths):
+            value = row.get(column, "-")
+            cells.append(("{:.4f}".format(value) if isinstance(value, float) else str(value)).rjust(width))
+        print("".join(cells))
+
+def timePlayback(controller, frames=100, distance=100):
+    """Animates a controller along Z and measures how long each frame takes to evaluate
+
+    Parameters
+    ----------
+    controller : str
+        The name of the controller to animate
+    frames : int
+        The number of frames to play
+    distance : float
+        How far the controller moves during the animation
+
+    Returns
+    -------
+    float
+        The average milliseconds per frame
+    """
+
+    currentTime = cmds.currentTime(query=True)
+
+    cmds.setKeyframe(controller, attribute="translateZ", time=1, value=0)
+    cmds.setKeyframe(controller, attribute="translateZ", time=frames, value=distance)
+
+    # Changing the current time evaluates the scene
+    startTime = timeit.default_timer()
+    for frame in range(1, frames + 1):
+        cmds.currentTime(frame, update=True)
+    seconds = timeit.default_timer() - startTime
+
+    cmds.currentTime(currentTime)
+
+    return seconds * 1000.0 / frames
+
+def benchmarkTreadLayout(sizes=(20, 50, 100, 200, 500), radius=20):
+    """Compares the snapshot process against the layout engine when building a tread mesh
+
+    Parameters
+    ----------
+    sizes : tuple
+        The number of tread pieces to build on each run
+    radius : float
+        The radius of the tread curve
+    """
+
+    currentTime = cmds.currentTime(query=True)
+
+    # Create a curve and a piece to build the treads
+    curve = cmds.circle(name="BenchmarkTreadCurve", radius=radius, nr=(1,0,0), sections=8)[0]
+    cmds.delete(curve, constructionHistory=True)
+    piece = ThreadMaker.makeProxyGeo()
+
+    rows = []
+
+    for amount in sizes:
+        row = {"pieces": amount}
+
+        if treadLayout.isAvailable():
+            row["layout (s)"], mesh = timeCall(treadLayout.buildTreadMesh, treadLayout.getMeshData(piece), curve, amount,
+                                               name="BenchmarkTreadMesh")
+            cmds.delete(mesh)
+
+        row["snapshot (s)"], mesh = timeCall(ThreadMaker.snapshotTread, piece, curve, amount)
+        cmds.delete(mesh)
+
+        rows.append(row)
+
+    # Clean the scene and go back to the frame where we were
+    cmds.delete(curve, piece)
+    cmds.currentTime(currentTime)
+
+    printTable("Tread layout", ["pieces", "snapshot (s)", "layout (s)"], rows)
+
+    return rows
+
+def benchmarkSaveData(sizes=(25, 50, 100, 200, 400), nodeName="benchmarkDataNode"):
+    """Compares saving values one by one with saveData against saving them with a BatchWriter
+
+    The cost per value of the batch should stay the same for every size,
+    which means the total cost grows linearly with the number of values.
+
+    Parameters
+    ----------
+    sizes : tuple
+        The number of values to save on each run
+    nodeName : str
+        The name of the temporary data node
+    """
+
+    def saveOneByOne(values):
+        for value in values:
+            dataNodeManager.saveData(nodeName=nodeName, attributeName="benchmarkControllers", value=value)
+
+    def saveInBatch(values):
+        with dataNodeManager.BatchWriter(nodeName) as writer:
+            for value in values:
+                writer.add("benchmarkControllers", value)
+
+    rows = []
+
+    for amount in sizes:
+        values = ["Controller{}".format(index) for index in range(amount)]
+        row = {"values": amount}
+
+        for column, function in (("saveData", saveOneByOne), ("batch", saveInBatch)):
+            row["{} (s)".format(column)], result = timeCall(function, values)
+            row["{} (ms/value)".format(column)] = row["{} (s)".format(column)] * 1000.0 / amount
+            cmds.delete(nodeName)
+
+        rows.append(row)
+
+    printTable("Data node writes", ["values", "saveData (s)", "saveData (ms/value)", "batch (s)", "batch (ms/value)"], rows)
+
+    return rows
+
+def benchmarkWheelDrivers(sizes=(10, 40, 100), frames=100):
+    """Compares the wheel drivers by the nodes they create and the time it takes to evaluate them
+
+    Parameters
+    ----------
+    sizes : tuple
+        The number of wheels in the set on each run
+    frames : int
+        The number of frames played to measure the evaluation
+    """
+
+    rows = []
+
+    for amount in sizes:
+        row = {"wheels": amount}
+
+        for driver in wheelRigger.DRIVERS:
+            sceneNodes = set(cmds.ls())
+
+            # Create the wheels along Z
+            wheels = []
+            for index in range(amount):
+                wheel = cmds.polyCylinder(name="BenchmarkWheel", axis=(1,0,0), radius=1, height=.5)[0]
+                cmds.move(0, 1, index * 3, wheel)
+                wheels.append(wheel)
+
+            wheelNodes = set(cmds.ls())
+
+            row["{} (s)".format(driver)], result = timeCall(wheelRigger.rigWheels, wheels, 1.0, driver)
+
+            # The nodes made by the rig, without counting the wheels
+            row["{} nodes".format(driver)] = len(set(cmds.ls()) - wheelNodes)
+            row["{} (ms/frame)".format(driver)] = timePlayback(wheelRigger.data.mainController, frames)
+
+            rigUtils.deleteNewNodes(sceneNodes)
+
+        rows.append(row)
+
+    columns = ["wheels"]
+    for driver in wheelRigger.DRIVERS:
+        columns += ["{} nodes".format(driver), "{} (s)".format(driver), "{} (ms/frame)".format(driver)]
+
+    printTable("Wheel drivers", columns, rows)
+
+    return rows
+
+def benchmarkTreadDrivers(amount=50, frames=100, radius=20):
+    """Compares the time per frame of a tread driven by an expression and by utility nodes
+
+    Both drivers rotate the base wire of a wire deformer, so the deformation of the mesh
+    is part of the time of every frame.
+
+    Parameters
+    ----------
+    amount : int
+        The number of tread pieces
+    frames : int
+        The number of frames played to measure the evaluation
+    radius : float
+        The radius of the tread curve
+    """
+
+    # The drivers work on the tread data of ThreadMaker, keep the user's data to restore it
+    treadData = (ThreadMaker.data.treadBaseWire, ThreadMaker.data.mainController)
+
+    rows = []
+
+    for driver in ThreadMaker.DRIVERS:
+        sceneNodes = set(cmds.ls())
+
+        # Build a tread mesh deformed by a wire
+        curve = cmds.circle(name="BenchmarkTreadCurve", radius=radius, nr=(1,0,0), sections=8)[0]
+        cmds.delete(curve, constructionHistory=True)
+        piece = ThreadMaker.makeProxyGeo()
+
+        if treadLayout.isAvailable():
+            mesh = treadLayout.buildTreadMesh(treadLayout.getMeshData(piece), curve, amount, name="BenchmarkTreadMesh")
+        else:
+            mesh = ThreadMaker.snapshotTread(piece, curve, amount, name="BenchmarkTreadMesh")
+
+        wireNode = cmds.wire(mesh, w=curve, n="benchmarkWire")[0]
+        ThreadMaker.data.treadBaseWire = cmds.listConnections("{}.baseWire[0]".format(wireNode), source=True, destination=False)[0]
+        ThreadMaker.data.mainController = cmds.circle(name="BenchmarkTreadController", normal=(0,1,0))[0]
+
+        driverNodes = set(cmds.ls())
+
+        if driver == "nodes":
+            ThreadMaker.rotationNodes()
+        else:
+            ThreadMaker.rotationExpression()
+
+        row = {"driver": driver, "pieces": amount}
+        row["nodes"] = len(set(cmds.ls()) - driverNodes)
+        row["ms/frame"] = timePlayback(ThreadMaker.data.mainController, frames)
+
+        rigUtils.deleteNewNodes(sceneNodes)
+        rows.append(row)
+
+    ThreadMaker.data.treadBaseWire, ThreadMaker.data.mainController = treadData
+
+    printTable("Tread drivers", ["driver", "pieces", "nodes", "ms/frame"], rows)
+
+    return rows
+
+def exportedSize(nodes):
+    """Exports nodes to a temporary Maya binary file and returns its size in kilobytes
+
+    Parameters
+    ----------
+    nodes : list
+        The nodes to export
+    """
+
+    fileHandle, path = tempfile.mkstemp(suffix=".mb")
+    os.close(fileHandle)
+
+    # Exporting works on the selection
+    cmds.select(nodes, replace=True)
+    cmds.file(path, force=True, exportSelected=True, type="mayaBinary")
+    size = os.path.getsize(path) / 1024.0
+    os.remove(path)
+
+    return size
+
+@rigUtils.preserveSelection
+def benchmarkTreadModes(sizes=(50, 200, 500), radius=20):
+    """Compares the build modes of ThreadMaker by build time, nodes and file size
+
+    The merged mesh saves every piece, the instanced pieces only save the source piece,
+    so its file size should barely grow with the amount of pieces.
+
+    Parameters
+    ----------
+    sizes : tuple
+        The number of tread pieces to build on each run
+    radius : float
+        The radius of the tread curve
+    """
+
+    # The pieces are saved in the tread data of ThreadMaker, keep the user's data to restore it
+    treadData = (ThreadMaker.data.treadPieces, ThreadMaker.data.pieceOffsets)
+
+    rows = []
+
+    for amount in sizes:
+        for mode in ThreadMaker.BUILD_MODES:
+            sceneNodes = set(cmds.ls())
+
+            curve = cmds.circle(name="BenchmarkTreadCurve", radius=radius, nr=(1,0,0), sections=8)[0]
+            cmds.delete(curve, constructionHistory=True)
+            piece = ThreadMaker.makeProxyGeo()
+            buildNodes = set(cmds.ls())
+
+            if mode != "merged":
+                seconds, tread = timeCall(ThreadMaker.rigidTread, piece, curve, amount, name="BenchmarkTread",
+                                          instanced=mode == "instanced")
+            elif treadLayout.isAvailable():
+                seconds, tread = timeCall(treadLayout.buildTreadMesh, treadLayout.getMeshData(piece), curve, amount,
+                                          name="BenchmarkTread")
+            else:
+                seconds, tread = timeCall(ThreadMaker.snapshotTread, piece, curve, amount, name="BenchmarkTread")
+
+            row = {"mode": mode, "pieces": amount, "build (s)": seconds}
+            row["nodes"] = len(set(cmds.ls()) - buildNodes)
+            row["file (KB)"] = exportedSize([tread])
+
+            rigUtils.deleteNewNodes(sceneNodes)
+            rows.append(row)
+
+    ThreadMaker.data.treadPieces, ThreadMaker.data.pieceOffsets = treadData
+
+    printTable("Tread build modes", ["mode", "pieces", "build (s)", "nodes", "file (KB)"], rows)
+
+    return rows
+
+def heapMemory():
+    """Returns the size of Maya's memory heap in megabytes"""
+
+    return cmds.memory(heapMemory=True, megaByte=True, asFloat=True)
+
+@rigUtils.preserveSelection
+def benchmarkTreadMemory(sizes=(500, 2000), batchSize=100, smoothDivisions=2, radius=100):
+    """Compares the peak memory of building a merged tread at once and in batches
+
+    The memory is sampled after every step of the build, where the pieces of a
+    step (all of them, or one batch) still exist, and compared to the memory before it.
+
+    Parameters
+    ----------
+    sizes : tuple
+        The number of tread pieces to build on each run
+    batchSize : int
+        The number of pieces merged at a time in the streamed modes
+    smoothDivisions : int
+        The piece is smoothed this many times to make it dense like a scanned piece
+    radius : float
+        The radius of the tread curve
+    """
+
+    rows = []
+
+    for amount in sizes:
+        # Building at once is the same as a single batch with all the pieces
+        modes = [("snapshot", amount), ("snapshot streamed", batchSize)]
+        if treadLayout.isAvailable():
+            modes = [("layout", amount), ("layout streamed", batchSize)] + modes
+
+        for mode, size in modes:
+            sceneNodes = set(cmds.ls())
+
+            curve = cmds.circle(name="BenchmarkTreadCurve", radius=radius, nr=(1,0,0), sections=8)[0]
+            cmds.delete(curve, constructionHistory=True)
+            piece = ThreadMaker.makeProxyGeo()
+            if smoothDivisions:
+                cmds.polySmooth(piece, divisions=smoothDivisions, constructionHistory=False)
+
+            if mode.startswith("layout"):
+                steps = treadLayout.streamTreadMesh(treadLayout.getMeshData(piece), curve, amount, size,
+                                                    name="BenchmarkTread")
+            else:
+                steps = ThreadMaker.snapshotTreadSteps(piece, curve, amount, name="BenchmarkTread", batchSize=size)
+
+            startMemory = heapMemory()
+            peakMemory = startMemory
+            startTime = timeit.default_timer()
+
+            for step in steps:
+                peakMemory = max(peakMemory, heapMemory())
+
+            row = {"mode": mode, "pieces": amount, "build (s)": timeit.default_timer() - startTime}
+            row["peak (MB)"] = peakMemory - startMemory
+            row["final (MB)"] = heapMemory() - startMemory
+
+            rigUtils.deleteNewNodes(sceneNodes)
+            rows.append(row)
+
+    printTable("Tread build memory", ["mode", "pieces", "build (s)", "peak (MB)", "final (MB)"], rows)
+
+    return rows
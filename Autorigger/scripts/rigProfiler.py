@@ -0,0 +1,235 @@
+"""Per-command profiler of the rigging steps.
+
+When a rigging step is slow it is hard to tell which Maya commands take the time
+(i.e. pointCurveConstraint, curve, wire or the selection changes). This script
+swaps the cmds module of the rigging scripts for a proxy that times every call,
+and records for every command and rig step:
+    * How many times it was called
+    * The total time and the time per call
+    * The slowest call
+
+The rig step is the innermost rigUtils.transaction running, the name of the
+entry point the user clicked (i.e. finalizeTread, makeJnt).
+
+Profiling is opt-in. While it is off the scripts use the real cmds module, so
+it costs nothing.
+
+Example:
+    rigProfiler.enable()
+    ThreadMaker.finalizeTread()
+    rigProfiler.disable()
+    print(rigProfiler.formatReport())
+    rigProfiler.exportJson("C:/temp/finalizeTread.json")
+
+Scripts reloaded while profiling import the real cmds again, call enable() again
+after reloading them.
+"""
+
+from maya import cmds
+import json
+import sys
+import timeit
+import rigUtils
+reload(rigUtils)
+
+# The scripts whose cmds calls are timed
+PROFILED_MODULES = ["ThreadMaker", "ArmMaker", "wheelRigger", "finalizeRig", "dataNodeManager",
+                    "rigUtils", "controllerShapes", "nameAllocator", "treadLayout", "treadCache",
+                    "beltPath", "rollerDetection", "chunkedTask", "arcLength"]
+
+# The step of the calls made outside of a rigging step
+NO_STEP = "(no step)"
+
+class ProfiledCmds(object):
+    """Stands in for maya.cmds, timing every command called through it
+
+    The wrapper of a command is made the first time it is used and kept as an
+    attribute, so the next calls don't go through __getattr__.
+
+    Attributes
+    ----------
+    stats : dict
+        [calls, total seconds, slowest call seconds] for every (step, command)
+    """
+
+    def __init__(self):
+        self.stats = {}
+
+    def __getattr__(self, name):
+        command = getattr(cmds, name)
+
+        if not callable(command):
+            return command
+
+        stats = self.stats
+
+        def timedCommand(*args, **kwargs):
+            start = timeit.default_timer()
+            try:
+                return command(*args, **kwargs)
+            finally:
+                seconds = timeit.default_timer() - start
+                key = (rigUtils.currentStep() or NO_STEP, name)
+                record = stats.get(key)
+                if record is None:
+                    stats[key] = [1, seconds, seconds]
+                else:
+                    record[0] += 1
+                    record[1] += seconds
+                    record[2] = max(record[2], seconds)
+
+        timedCommand.__name__ = name
+        setattr(self, name, timedCommand)
+
+        return timedCommand
+
+# The proxy kept between enable and disable, so reloading this script doesn't lose the stats
+try:
+    profiledCmds
+except NameError:
+    profiledCmds = ProfiledCmds()
+
+def isEnabled():
+    """Returns True if the profiled scripts are using the proxy"""
+
+    return any(getattr(sys.modules.get(name), "cmds", None) is profiledCmds for name in PROFILED_MODULES)
+
+def enable():
+    """Makes the profiled scripts call Maya through the proxy"""
+
+    for name in PROFILED_MODULES:
+        module = sys.modules.get(name)
+        if module is not None and hasattr(module, "cmds"):
+            module.cmds = profiledCmds
+
+def disable():
+    """Gives the real cmds module back to the profiled scripts, the stats are kept"""
+
+    for name in PROFILED_MODULES:
+        module = sys.modules.get(name)
+        if module is not None and getattr(module, "cmds", None) is profiledCmds:
+            module.cmds = cmds
+
+def clear():
+    """Forgets the stats recorded"""
+
+    profiledCmds.stats.clear()
+
+def getReport():
+    """Returns the stats of every command and step, the slowest first
+
+    Returns
+    -------
+    list
+        A dict for every (step, command) with the keys step, command, calls,
+        totalSeconds, perCallSeconds and maxSeconds
+    """
+
+    rows = [{"step": step, "command": command, "calls": calls, "totalSeconds": total,
+             "perCallSeconds": total / calls, "maxSeconds": slowest}
+            for (step, command), (calls, total, slowest) in profiledCmds.stats.items()]
+
+    return sorted(rows, key=lambda row: row["totalSeconds"], reverse=True)
+
+def getStepTotals():
+    """Returns the time spent on Maya commands by every step, the slowest first
+
+    Returns
+    -------
+    list
+        (step, calls, seconds) tuples
+    """
+
+    totals = {}
+    for row in getReport():
+        calls, seconds = totals.get(row["step"], (0, 0.0))
+        totals[row["step"]] = (calls + row["calls"], seconds + row["totalSeconds"])
+
+    return sorted(((step, calls, seconds) for step, (calls, seconds) in totals.items()),
+                  key=lambda total: total[2], reverse=True)
+
+def formatReport(limit=50):
+    """Returns the report as a text table
+
+    Parameters
+    ----------
+    limit : int
+        The number of commands shown, the slowest ones
+    """
+
+    lines = ["{:<20}{:>8}{:>12}".format("Step", "calls", "seconds")]
+    for step, calls, seconds in getStepTotals():
+        lines.append("{:<20}{:>8}{:>12.4f}".format(step[:19], calls, seconds))
+
+    lines.append("")
+    lines.append("{:<20}{:<24}{:>8}{:>12}{:>12}{:>12}".format("Step", "Command", "calls", "total s",
+                                                              "per call ms", "max ms"))
+    for row in getReport()[:limit]:
+        lines.append("{:<20}{:<24}{:>8}{:>12.4f}{:>12.3f}{:>12.3f}".format(
+            row["step"][:19], row["command"][:23], row["calls"], row["totalSeconds"],
+            row["perCallSeconds"] * 1000.0, row["maxSeconds"] * 1000.0))
+
+    return "\n".join(lines)
+
+def exportJson(path):
+    """Writes the report to a JSON file
+
+    Parameters
+    ----------
+    path : str
+        The file to write
+    """
+
+    report = {"steps": [{"step": step, "calls": calls, "totalSeconds": seconds}
+                        for step, calls, seconds in getStepTotals()],
+              "commands": getReport()}
+
+    with open(path, "w") as jsonFile:
+        json.dump(report, jsonFile, indent=4)
+
+def populateWindow():
+    """This function creates the profiler controls and the report, returns the layout"""
+
+    mainLayout = cmds.columnLayout(adjustableColumn=True)
+
+    cmds.frameLayout(label="Command profiler")
+    cmds.text(align="left", label="Time the Maya commands called by every rigging step. Turn it off when you are done.")
+
+    cmds.rowLayout(numberOfColumns=4, columnWidth4=(125,125,125,125))
+    cmds.checkBox("profilerEnabled", label="Profile commands", value=isEnabled(),
+                  onCommand=lambda *args: enable(), offCommand=lambda *args: disable(),
+                  annotation="Time every Maya command called by the rigging tools")
+    cmds.button(label="Refresh", width=120, command=refreshReport,
+                annotation="Show the commands recorded so far, the slowest first")
+    cmds.button(label="Clear", width=120, command=clearReport,
+                annotation="Forget the commands recorded")
+    cmds.button(label="Export JSON", width=120, command=exportReport,
+                annotation="Save the report to a JSON file")
+    cmds.setParent("..")
+
+    cmds.scrollField("profilerReport", editable=False, wordWrap=False, font="fixedWidthFont", height=300,
+                     text=formatReport())
+    cmds.setParent("..")
+
+    cmds.setParent("..")
+
+    return mainLayout
+
+def refreshReport(*args):
+    """This function shows the current report in the window"""
+
+    if cmds.scrollField("profilerReport", exists=True):
+        cmds.scrollField("profilerReport", edit=True, text=formatReport())
+
+def clearReport(*args):
+    """This function forgets the stats and empties the report"""
+
+    clear()
+    refreshReport()
+
+def exportReport(*args):
+    """This function asks for a file and writes the report to it"""
+
+    path = cmds.fileDialog2(fileFilter="JSON (*.json)", dialogStyle=2, fileMode=0, caption="Export profile")
+    if path:
+        exportJson(path[0])
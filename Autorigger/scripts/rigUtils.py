@@ -0,0 +1,470 @@
+"""Selection-free rigging helpers.
+
+Many Maya menu commands (MatchTranslation, FreezeTransformations, CenterPivot,
+DeleteHistory...) only work on the selected objects. Changing the selection
+fires callbacks and refreshes the UI, which gets slow when it happens for
+every controller of a rig.
+
+This script has the same operations using commands that receive the objects
+explicitly. Every function takes a single node or a list of nodes, so bulk
+operations are done in one call.
+
+It also has existingNodes, which filters a list of nodes without cmds.ls
+returning the whole scene when the list is empty, preserveSelection, a
+decorator that restores the user's selection after a rigging step, as commands
+that create objects select them, and transaction, a decorator that makes a
+rigging step a single undo and rolls it back if it fails. The steps of a
+transaction share one index of the names in the scene, returned by sharedNames().
+Edits made through the API are given to recordApiEdit, so the undo queue and
+the rollback of a transaction undo them too.
+"""
+
+from maya import cmds
+from maya.api import OpenMaya
+import functools
+import os
+import nameAllocator
+reload(nameAllocator)
+
+def asList(nodes):
+    """Returns the nodes as a list, so functions accept a single name or many names
+
+    Parameters
+    ----------
+    nodes : str or list
+        A node name or a list of node names
+    """
+
+    if isinstance(nodes, (list, tuple)):
+        return list(nodes)
+
+    return [nodes]
+
+def existingNodes(nodes, **flags):
+    """Returns the nodes that still exist in the scene
+
+    cmds.ls with an empty list returns every node in the scene, so an empty list returns nothing instead.
+
+    Parameters
+    ----------
+    nodes : str or list
+        A node name or a list of node names
+    flags : dict
+        Other flags for cmds.ls (i.e. long=True)
+    """
+
+    nodes = [node for node in asList(nodes) if node]
+    if not nodes:
+        return []
+
+    return cmds.ls(nodes, **flags)
+
+def restoreSelection(selection):
+    """Selects the nodes of a previous selection that still exist, or clears the selection
+
+    Parameters
+    ----------
+    selection : list
+        The long names of the selected nodes
+    """
+
+    # Objects in the selection might have been deleted since
+    selection = existingNodes(selection, long=True)
+    if selection:
+        cmds.select(selection, replace=True)
+    else:
+        cmds.select(clear=True)
+
+def preserveSelection(function):
+    """Decorator that restores the selection after the function runs, even if it fails
+
+    Parameters
+    ----------
+    function : function
+        The rigging step to decorate
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        selection = cmds.ls(selection=True, long=True)
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            restoreSelection(selection)
+
+    return wrapper
+
+def getPivot(node):
+    """Returns the world position of the rotate pivot of a node
+
+    Parameters
+    ----------
+    node : str
+        The name of the node
+    """
+
+    return cmds.xform(node, query=True, worldSpace=True, rotatePivot=True)
+
+def getPivots(nodes):
+    """Returns the world position of the rotate pivot of many nodes with one query
+
+    Parameters
+    ----------
+    nodes : list
+        The names of the nodes
+
+    Returns
+    -------
+    list
+        A (x, y, z) tuple for every node
+    """
+
+    nodes = asList(nodes)
+    if not nodes:
+        return []
+
+    # xform returns the values of every node one after the other
+    values = cmds.xform(nodes, query=True, worldSpace=True, rotatePivot=True)
+
+    return [tuple(values[index:index + 3]) for index in range(0, len(values), 3)]
+
+def moveTo(nodes, position):
+    """Moves the nodes so their rotate pivot is on a world position
+
+    Parameters
+    ----------
+    nodes : str or list
+        The nodes to move
+    position : tuple
+        The (x, y, z) world position
+    """
+
+    cmds.move(position[0], position[1], position[2], asList(nodes), absolute=True, worldSpace=True,
+              rotatePivotRelative=True)
+
+def matchTranslation(nodes, target):
+    """Same as MatchTranslation, moves the nodes to the pivot of the target
+
+    Parameters
+    ----------
+    nodes : str or list
+        The nodes to move
+    target : str
+        The node to move to
+    """
+
+    moveTo(nodes, getPivot(target))
+
+def matchTransform(nodes, target):
+    """Same as MatchTransform, matches translation, rotation and scale of the target
+
+    Parameters
+    ----------
+    nodes : str or list
+        The nodes to change
+    target : str
+        The node to match
+    """
+
+    for node in asList(nodes):
+        cmds.matchTransform(node, target)
+
+def freezeTransformations(nodes):
+    """Same as FreezeTransformations, makes the current transformations the zero position
+
+    Parameters
+    ----------
+    nodes : str or list
+        The nodes to freeze
+    """
+
+    cmds.makeIdentity(asList(nodes), apply=True, translate=True, rotate=True, scale=True)
+
+def centerPivot(nodes):
+    """Same as CenterPivot, moves the pivots to the center of the bounding box
+
+    Parameters
+    ----------
+    nodes : str or list
+        The nodes to change
+    """
+
+    cmds.xform(asList(nodes), centerPivots=True)
+
+def deleteHistory(nodes):
+    """Same as DeleteHistory, deletes the construction history of the nodes
+
+    Parameters
+    ----------
+    nodes : str or list
+        The nodes to clean
+    """
+
+    cmds.delete(asList(nodes), constructionHistory=True)
+
+def deleteNewNodes(previousNodes):
+    """Deletes the nodes that are not in a list of names taken before
+
+    Parameters
+    ----------
+    previousNodes : set
+        The names of the nodes that were in the scene
+    """
+
+    for node in set(cmds.ls()) - previousNodes:
+        # Deleting a node might have deleted others of the list (i.e. shapes of a transform)
+        if cmds.objExists(node):
+            cmds.delete(node)
+
+# The plugin with the command that puts the edits made through the API in the undo queue
+API_EDIT_PLUGIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rigApiEdit.py")
+
+# The (undo, redo) functions recordApiEdit gives to the command of the plugin, it takes them right away
+pendingApiEdits = []
+
+# The plugin is loaded with the tools, without it the edits are only undone by a rollback
+try:
+    cmds.loadPlugin(API_EDIT_PLUGIN, quiet=True)
+    apiEditPlugin = True
+except RuntimeError:
+    apiEditPlugin = False
+
+def recordApiEdit(undo, redo):
+    """Puts an edit that was made through the API in the undo queue and in the transaction that is running
+
+    The API doesn't record its edits, so undoing a step would leave them behind.
+    The rigApiEdit command of the plugin runs undo and redo when the step is undone
+    and redone. The open transaction keeps undo too, for a rollback the undo queue
+    can't do (fast mode, or the plugin couldn't be loaded).
+
+    Parameters
+    ----------
+    undo : function
+        Takes the scene back to before the edit, None if undoing the commands made after it is enough
+    redo : function
+        Makes the edit again after it was undone
+    """
+
+    queued = apiEditPlugin and bool(cmds.undoInfo(query=True, state=True))
+
+    if queued:
+        pendingApiEdits.append((undo, redo))
+        cmds.rigApiEdit()
+
+    if Transaction.current is not None and undo is not None:
+        Transaction.current.apiEdits.append((undo, queued, Transaction.current.chunks))
+
+class Transaction(object):
+    """A rigging step recorded as a single undo, that can be rolled back
+
+    In fast mode the undo queue is not recorded at all while the step runs, which
+    makes the commands of very large builds faster. The step can't be undone then,
+    but a failed step is still rolled back by undoing its API edits and deleting
+    the nodes it made.
+
+    Transactions started while another one is open are part of the outer one.
+    A transaction can begin and end many times (i.e. once per chunk of a
+    chunkedTask.ChunkedTask), every time is a chunk and rollback removes all of them.
+    While runningTask is set, only its own transaction can begin outside of another one.
+
+    Attributes
+    ----------
+    name : str
+        The name of the undo chunk
+    fast : bool
+        True if the undo queue is suspended instead of recording a chunk
+    chunks : int
+        The number of times it began as the outer transaction
+    createdNodes : list
+        The UUIDs of the nodes made while it is the outer transaction
+    apiEdits : list
+        (undo, queued, chunk) for every edit given to recordApiEdit, queued is True if it is in the undo queue
+
+    Methods
+    -------
+    begin()
+        Starts recording the step
+    end()
+        Stops recording the step
+    rollback()
+        Stops recording the step and removes what it did
+    """
+
+    # Suspend the undo queue in the transactions that start from now on
+    fastMode = False
+
+    # The names of the transactions open, from the outer one, only the outer one records
+    openSteps = []
+
+    # The NameAllocator of the outer transaction, made the first time a step asks for a name
+    names = None
+
+    # The outer transaction open, recordApiEdit gives it the edits
+    current = None
+
+    # The transaction of the chunked task that is running, the other steps wait for it
+    runningTask = None
+
+    def __init__(self, name):
+        self.name = name
+        self.fast = Transaction.fastMode
+        self.outer = False
+        self.isOpen = False
+        self.undoState = True
+        self.chunks = 0
+        self.createdNodes = []
+        self.apiEdits = []
+        self.callbackId = None
+
+    def begin(self):
+        """Starts recording the step
+
+        Raises
+        ------
+        RuntimeError
+            If a chunked task is running and this is not its transaction
+        """
+
+        if not Transaction.openSteps and Transaction.runningTask not in (None, self):
+            raise RuntimeError("{} is running, wait for it to finish or cancel it".format(Transaction.runningTask.name))
+
+        Transaction.openSteps.append(self.name)
+        self.outer = len(Transaction.openSteps) == 1
+        self.isOpen = True
+
+        if not self.outer:
+            return
+
+        # Only the nodes made from now on are recorded, the scene is not listed
+        Transaction.current = self
+        self.chunks += 1
+        self.callbackId = OpenMaya.MDGMessage.addNodeAddedCallback(self.onNodeAdded, "dependNode")
+
+        if self.fast:
+            self.undoState = cmds.undoInfo(query=True, stateWithoutFlush=True)
+            cmds.undoInfo(stateWithoutFlush=False)
+        else:
+            cmds.undoInfo(openChunk=True, chunkName=self.name)
+
+    def end(self):
+        """Stops recording the step"""
+
+        Transaction.openSteps.pop()
+        self.isOpen = False
+
+        if not self.outer:
+            return
+
+        # The next step indexes the scene again
+        Transaction.names = None
+        Transaction.current = None
+        OpenMaya.MMessage.removeCallback(self.callbackId)
+
+        if self.fast:
+            cmds.undoInfo(stateWithoutFlush=self.undoState)
+        else:
+            cmds.undoInfo(closeChunk=True)
+
+    def onNodeAdded(self, node, clientData):
+        """Callback for a node made while the transaction is open"""
+
+        self.createdNodes.append(OpenMaya.MFnDependencyNode(node).uuid().asString())
+
+    def rollback(self):
+        """Stops recording the step if it is open and removes everything it did
+
+        Its chunks are undone from the last one while they are the last thing in the
+        undo queue, which also restores the attributes they changed. Then (fast mode,
+        the undo queue is off, or something else was recorded after a chunk) the API
+        edits of the chunks left are undone, from the last one, and the nodes it made
+        that are left are deleted.
+        """
+
+        if self.isOpen:
+            self.end()
+
+        if not self.outer:
+            return
+
+        undoneChunks = 0
+        if not self.fast and cmds.undoInfo(query=True, state=True):
+            while undoneChunks < self.chunks and cmds.undoInfo(query=True, undoName=True) == self.name:
+                cmds.undo()
+                undoneChunks += 1
+
+        # The edits in the undo queue of the chunks undone are already undone
+        for undo, queued, chunk in reversed(self.apiEdits):
+            if queued and chunk > self.chunks - undoneChunks:
+                continue
+
+            # The step might have deleted what the edit made
+            try:
+                undo()
+            except RuntimeError:
+                pass
+
+        # Deleting a node might have deleted others of the list (i.e. shapes of a transform)
+        for node in existingNodes(self.createdNodes, long=True):
+            if cmds.objExists(node):
+                cmds.delete(node)
+
+def transaction(function):
+    """Decorator that makes a rigging step a single undo, and removes what it did if it fails
+
+    Parameters
+    ----------
+    function : function
+        The rigging step to decorate
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        step = Transaction(function.__name__)
+        step.begin()
+
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            step.rollback()
+            raise
+
+        step.end()
+
+        return result
+
+    return wrapper
+
+def currentStep():
+    """Returns the name of the innermost transaction open, or None outside of a rigging step"""
+
+    return Transaction.openSteps[-1] if Transaction.openSteps else None
+
+def sharedNames():
+    """Returns the NameAllocator shared by the rigging step that is running
+
+    The scene is indexed the first time the step asks for a name, then every
+    helper of the step reserves its names from the same index until the outer
+    transaction ends. Outside of a rigging step a new index is made every time.
+    """
+
+    if not Transaction.openSteps:
+        return nameAllocator.NameAllocator()
+
+    if Transaction.names is None:
+        Transaction.names = nameAllocator.NameAllocator()
+
+    return Transaction.names
+
+def fastModeMenu():
+    """Adds an Options menu to the current window to turn the fast mode of the transactions on and off
+
+    The window must be created with menuBar=True.
+    """
+
+    def setFastMode(value):
+        Transaction.fastMode = value
+
+    cmds.menu(label="Options")
+    cmds.menuItem(label="Fast mode (no undo)", checkBox=Transaction.fastMode, command=setFastMode,
+                  annotation="Don't record the undo queue while building. Much faster on big rigs, but the build can't be undone")
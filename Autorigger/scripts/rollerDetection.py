@@ -0,0 +1,248 @@
+"""Roller detection on an undercarriage.
+
+This script finds the wheels and rollers inside the selected meshes, so the
+tread can be wrapped around them without placing a locator on every one:
+    * The vertices and faces of every mesh are read in bulk
+    * The vertices are split into connected pieces (a road wheel, a link, a bolt...)
+    * A circle is fitted to the outer vertices of every piece, seen from the side (YZ plane)
+    * Pieces that are not round, too small or inside a bigger roller are discarded
+
+The circles are fitted with the algebraic least squares fit of Kasa. It
+is a linear problem, so the fit of every piece is solved at the same time as a
+stack of 3x3 systems, and there is no loop over the pieces or the vertices.
+
+Like the rest of the tool, the wheels must turn around the X axis.
+
+Example:
+    centers, radii = rollerDetection.detectRollers(cmds.ls(selection=True))
+
+This module needs NumPy.
+"""
+
+from maya import cmds
+from maya.api import OpenMaya
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Pieces with less vertices than this are ignored
+MIN_VERTICES = 8
+
+# Only the vertices at this fraction of the furthest one from the center of the piece are fitted
+RIM_FRACTION = 0.9
+
+# The biggest mean distance from the vertices to the circle, as a fraction of the radius
+MAX_RESIDUAL = 0.05
+
+# Rollers smaller than this fraction of the biggest roller (i.e. bolts) are ignored
+MIN_RADIUS_FRACTION = 0.2
+
+def isAvailable():
+    """Returns True when NumPy can be used to detect the rollers"""
+
+    return numpy is not None
+
+def getMeshArrays(meshes):
+    """Reads the vertices and the edges of many meshes into arrays
+
+    Parameters
+    ----------
+    meshes : list
+        The names of the meshes
+
+    Returns
+    -------
+    tuple
+        points: (n,3) array with the world position of all the vertices
+        edges: (m,2) array with the vertices of every edge of every face, numbered across all the meshes
+    """
+
+    points = []
+    edges = []
+    offset = 0
+
+    for mesh in meshes:
+        # One query for all the vertices of the mesh
+        meshPoints = numpy.array(cmds.xform("{}.vtx[*]".format(mesh), query=True, worldSpace=True,
+                                            translation=True)).reshape(-1, 3)
+
+        # The faces are read from the shape, the transform might have intermediate shapes too
+        selectionList = OpenMaya.MSelectionList()
+        selectionList.add(cmds.listRelatives(mesh, shapes=True, type="mesh", noIntermediate=True, path=True)[0])
+        counts, connects = OpenMaya.MFnMesh(selectionList.getDagPath(0)).getVertices()
+        counts = numpy.array(counts, dtype=int)
+        connects = numpy.array(connects, dtype=int)
+
+        # Every vertex of a face is joined to the next one, the last one to the first
+        faceStarts = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        faceCorners = numpy.arange(len(connects)) - faceStarts
+        nextCorners = faceStarts + (faceCorners + 1) % numpy.repeat(counts, counts)
+
+        edges.append(numpy.stack((connects, connects[nextCorners]), axis=1) + offset)
+        points.append(meshPoints)
+        offset += len(meshPoints)
+
+    return numpy.concatenate(points), numpy.concatenate(edges)
+
+def connectedPieces(vertexCount, edges):
+    """Numbers the connected pieces of the meshes
+
+    Every vertex starts with its own number and takes the smallest number of its
+    neighbours, then every number jumps to the number it points to until nothing
+    changes. It is done for all the edges at once.
+
+    Parameters
+    ----------
+    vertexCount : int
+        The number of vertices
+    edges : numpy.ndarray
+        (m,2) array with the vertices of every edge
+
+    Returns
+    -------
+    numpy.ndarray
+        The piece of every vertex, numbered from 0
+    """
+
+    labels = numpy.arange(vertexCount)
+    first, second = edges[:, 0], edges[:, 1]
+
+    while True:
+        # Join the pieces of both ends of every edge under the smallest number
+        smallest = numpy.minimum(labels[first], labels[second])
+        joined = labels.copy()
+        numpy.minimum.at(joined, labels[first], smallest)
+        numpy.minimum.at(joined, labels[second], smallest)
+
+        # Point every vertex straight to the number of its piece
+        while True:
+            jumped = joined[joined]
+            if numpy.array_equal(jumped, joined):
+                break
+            joined = jumped
+
+        if numpy.array_equal(joined, labels):
+            break
+        labels = joined
+
+    return numpy.unique(labels, return_inverse=True)[1]
+
+def fitCircles(points, pieces, pieceCount):
+    """Fits a circle to the points of every piece on the YZ plane
+
+    Kasa's fit finds D, E and F that make y^2 + z^2 + D*y + E*z + F as close to 0 as
+    possible. The sums of the normal equations are accumulated per piece with bincount.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        (n,3) array with the points to fit
+    pieces : numpy.ndarray
+        The piece of every point
+    pieceCount : int
+        The number of pieces
+
+    Returns
+    -------
+    tuple
+        centers: (k,2) array with the (y, z) center of every circle
+        radii: (k,) array with the radius
+        residuals: (k,) array with the mean distance from the points to the circle, divided by the radius
+    """
+
+    def perPiece(values):
+        return numpy.bincount(pieces, weights=values, minlength=pieceCount)
+
+    # Center the points of each piece so the sums stay small
+    counts = numpy.maximum(perPiece(numpy.ones(len(points))), 1)
+    means = numpy.stack((perPiece(points[:, 1]), perPiece(points[:, 2])), axis=1) / counts[:, None]
+    y = points[:, 1] - means[pieces, 0]
+    z = points[:, 2] - means[pieces, 1]
+    w = y*y + z*z
+
+    # Normal equations of [y z 1] * [D E F] = -w, one 3x3 system per piece
+    sumY, sumZ = perPiece(y), perPiece(z)
+    matrices = numpy.stack((numpy.stack((perPiece(y*y), perPiece(y*z), sumY), axis=1),
+                            numpy.stack((perPiece(y*z), perPiece(z*z), sumZ), axis=1),
+                            numpy.stack((sumY, sumZ, counts), axis=1)), axis=1)
+    vectors = -numpy.stack((perPiece(w*y), perPiece(w*z), perPiece(w)), axis=1)
+
+    # Pieces whose points are on a line have no circle, give them an identity so the solve works
+    singular = numpy.abs(numpy.linalg.det(matrices)) < 1e-12
+    matrices[singular] = numpy.eye(3)
+    solution = numpy.linalg.solve(matrices, vectors[:, :, None])[:, :, 0]
+
+    localCenters = -solution[:, :2] / 2.0
+    radii = numpy.sqrt(numpy.maximum((localCenters**2).sum(axis=1) - solution[:, 2], 0.0))
+
+    distances = numpy.linalg.norm(numpy.stack((y, z), axis=1) - localCenters[pieces], axis=1)
+    residuals = perPiece(numpy.abs(distances - radii[pieces])) / counts / numpy.where(radii > 0, radii, 1.0)
+    residuals[singular | (radii == 0)] = numpy.inf
+
+    return localCenters + means, radii, residuals
+
+def detectRollers(meshes, maxResidual=MAX_RESIDUAL, minRadiusFraction=MIN_RADIUS_FRACTION):
+    """Finds the center and radius of the round pieces of the meshes
+
+    Parameters
+    ----------
+    meshes : list
+        The names of the transforms of the meshes of the undercarriage
+    maxResidual : float
+        The biggest mean distance to the circle, as a fraction of the radius, of a round piece
+    minRadiusFraction : float
+        Rollers smaller than this fraction of the biggest roller are ignored
+
+    Returns
+    -------
+    tuple
+        centers: (k,3) array with the world position of the rollers, sorted along Z
+        radii: (k,) array with their radius
+    """
+
+    # cmds.ls with an empty list returns every node in the scene
+    meshes = [node for node in (cmds.ls(meshes, transforms=True) if meshes else [])
+              if cmds.listRelatives(node, shapes=True, type="mesh", noIntermediate=True)]
+
+    if not meshes:
+        return numpy.zeros((0, 3)), numpy.zeros(0)
+
+    points, edges = getMeshArrays(meshes)
+    pieces = connectedPieces(len(points), edges)
+    pieceCount = pieces.max() + 1
+
+    # The center of each piece and how far its furthest vertex is, seen from the side
+    counts = numpy.bincount(pieces, minlength=pieceCount)
+    means = numpy.stack([numpy.bincount(pieces, weights=points[:, axis], minlength=pieceCount)
+                         for axis in range(3)], axis=1) / counts[:, None]
+    sideDistances = numpy.linalg.norm(points[:, 1:] - means[pieces, 1:], axis=1)
+    furthest = numpy.zeros(pieceCount)
+    numpy.maximum.at(furthest, pieces, sideDistances)
+
+    # Fit only the rim, the hub and the spokes are inside the circle
+    rim = sideDistances >= RIM_FRACTION * furthest[pieces]
+    centers, radii, residuals = fitCircles(points[rim], pieces[rim], pieceCount)
+
+    isRound = (counts >= MIN_VERTICES) & (residuals <= maxResidual)
+    if not isRound.any():
+        return numpy.zeros((0, 3)), numpy.zeros(0)
+
+    isRound &= radii >= minRadiusFraction * radii[isRound].max()
+    centers = numpy.column_stack((means[:, 0], centers))[isRound]
+    radii = radii[isRound]
+
+    # A tire and its rim are separate pieces around the same center, keep the biggest one
+    order = numpy.argsort(-radii)
+    centers, radii = centers[order], radii[order]
+    gaps = numpy.linalg.norm(centers[:, None, 1:] - centers[None, :, 1:], axis=2)
+    inside = (gaps + radii[None, :] <= radii[:, None] * 1.05) & ~numpy.eye(len(radii), dtype=bool)
+
+    # A roller is dropped if it is inside a bigger one, the biggest ones come first
+    dropped = numpy.triu(inside, 1).any(axis=0)
+    centers, radii = centers[~dropped], radii[~dropped]
+
+    order = numpy.argsort(centers[:, 2])
+
+    return centers[order], radii[order]
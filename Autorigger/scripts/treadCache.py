@@ -0,0 +1,471 @@
+"""Periodic deformation cache for tread meshes.
+
+A tread looks the same every time it scrolls exactly one piece length, so
+its deformation only has to be computed for one period. This script samples
+the wire deformed tread mesh at a number of positions (the resolution) inside
+that period and saves them as in-between targets of a blendShape. During
+playback the blendShape weight is the position inside the period, computed
+from the distance the tread has scrolled, and the wire deformer is turned off.
+
+The cache is only valid for the shape of the curve when it was baked. Moving
+any of the curve controllers or editing the mesh turns it off, then the wire
+deformer is used again until the cache is baked again.
+
+The watched nodes are connected to the controller, so the callbacks are
+registered again when the scene is opened or imported.
+
+Example:
+    cacheNodes = treadCache.bake("TreadMesh", "inputWire", "TreadCurveBaseWire", "TreadMainController",
+                                 pieceSpacing=18, resolution=16)
+    treadCache.watch("TreadMainController", ["curvePointCtrl1", "curvePointCtrl2"])
+"""
+
+from maya import cmds
+from maya.api import OpenMaya
+import functools
+import rigUtils
+reload(rigUtils)
+
+# The attribute on the main controller that turns the cache on and off
+CACHE_ATTRIBUTE = "periodicCache"
+
+# The message attribute on the main controller connected to the nodes that turn off the cache
+WATCHED_ATTRIBUTE = "periodicCacheWatched"
+
+# The callbacks that turn off the caches {controller: [callbackIds]} and the ones that
+# watch the caches of the scenes that are opened or imported
+# They are created only the first time the module is loaded,
+# so reload() doesn't lose track of the callbacks that are already registered
+try:
+    cacheCallbacks
+except NameError:
+    cacheCallbacks = {}
+    sceneCallbacks = []
+
+def getShape(nodeName):
+    """Returns the MDagPath of the visible shape of a mesh
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the transform of the mesh
+    """
+
+    shape = cmds.listRelatives(nodeName, shapes=True, noIntermediate=True, path=True)[0]
+
+    selectionList = OpenMaya.MSelectionList()
+    selectionList.add(shape)
+
+    return selectionList.getDagPath(0)
+
+def disconnectSource(plug):
+    """Disconnects the input of a plug so its value can be set
+
+    Parameters
+    ----------
+    plug : str
+        The name of the plug (i.e. node.attribute)
+
+    Returns
+    -------
+    tuple
+        The plug that was connected and the plug before its unit conversion, None if there wasn't a connection
+    """
+
+    sources = cmds.listConnections(plug, source=True, destination=False, plugs=True, skipConversionNodes=False)
+
+    if not sources:
+        return None
+
+    # Maya deletes its unit conversion nodes when they are disconnected, so keep the plug before them too
+    originalSources = cmds.listConnections(plug, source=True, destination=False, plugs=True, skipConversionNodes=True)
+
+    cmds.disconnectAttr(sources[0], plug)
+
+    return sources[0], originalSources[0]
+
+def reconnectSource(source, plug):
+    """Connects again a plug disconnected with disconnectSource
+
+    Parameters
+    ----------
+    source : tuple
+        The result of disconnectSource
+    plug : str
+        The name of the plug
+    """
+
+    if not source:
+        return
+
+    directSource, originalSource = source
+
+    if cmds.objExists(directSource):
+        cmds.connectAttr(directSource, plug)
+    else:
+        cmds.connectAttr(originalSource, plug)
+
+def readPoints(meshPath):
+    """Evaluates a mesh and returns its points in object space
+
+    Parameters
+    ----------
+    meshPath : MDagPath
+        The path of the shape of the mesh
+    """
+
+    # Make sure the deformers run with the current values
+    cmds.dgeval("{}.outMesh".format(meshPath.fullPathName()))
+
+    return OpenMaya.MFnMesh(meshPath).getPoints(OpenMaya.MSpace.kObject)
+
+def samplePeriod(mesh, wireNode, baseWire, pieceSpacing, resolution):
+    """Returns the points of the mesh at resolution+1 positions of one period, and without deformation
+
+    The base wire is rotated from 0 to pieceSpacing degrees, which scrolls the tread one piece.
+
+    Parameters
+    ----------
+    mesh : str
+        The name of the tread mesh
+    wireNode : str
+        The name of the wire deformer of the mesh
+    baseWire : str
+        The name of the base wire of the deformer
+    pieceSpacing : float
+        The degrees the base wire rotates to scroll one piece
+    resolution : int
+        The number of samples in the period
+
+    Returns
+    -------
+    tuple
+        The undeformed points and a list with the points of every sample
+    """
+
+    meshPath = getShape(mesh)
+    rotatePlug = "{}.rotateX".format(baseWire)
+    envelopePlug = "{}.envelope".format(wireNode)
+    nodeStatePlug = "{}.nodeState".format(wireNode)
+
+    # The rotation, the envelope and the state of the wire might be driven by the rig
+    connections = [(disconnectSource(plug), plug) for plug in (rotatePlug, envelopePlug, nodeStatePlug)]
+    values = [cmds.getAttr(plug) for plug in (rotatePlug, envelopePlug, nodeStatePlug)]
+
+    try:
+        # Points without the wire deformation
+        cmds.setAttr(envelopePlug, 0)
+        basePoints = readPoints(meshPath)
+
+        cmds.setAttr(envelopePlug, 1)
+        cmds.setAttr(nodeStatePlug, 0)
+
+        samples = []
+        for index in range(resolution + 1):
+            # The same rotation the rig gives to the base wire: -translateZ*treadSpeed
+            cmds.setAttr(rotatePlug, -pieceSpacing * index / float(resolution))
+            samples.append(readPoints(meshPath))
+    finally:
+        # Leave the rig as it was
+        for (source, plug), value in zip(connections, values):
+            cmds.setAttr(plug, value)
+            reconnectSource(source, plug)
+
+    return basePoints, samples
+
+def getTargetPlug(blendShape, itemIndex, attributeName):
+    """Returns a plug of an in-between of the first target of a blendShape
+
+    Parameters
+    ----------
+    blendShape : str
+        The name of the blendShape node
+    itemIndex : int
+        The index of the in-between, 5000 + weight * 1000
+    attributeName : str
+        inputPointsTarget or inputComponentsTarget
+    """
+
+    selectionList = OpenMaya.MSelectionList()
+    selectionList.add(blendShape)
+    nodeFn = OpenMaya.MFnDependencyNode(selectionList.getDependNode(0))
+
+    plug = nodeFn.findPlug("inputTarget", False).elementByLogicalIndex(0)
+    plug = plug.child(nodeFn.attribute("inputTargetGroup")).elementByLogicalIndex(0)
+    plug = plug.child(nodeFn.attribute("inputTargetItem")).elementByLogicalIndex(itemIndex)
+
+    return plug.child(nodeFn.attribute(attributeName))
+
+def setTargets(blendShape, basePoints, samples, resolution):
+    """Saves the samples as in-betweens of the first target of a blendShape
+
+    Parameters
+    ----------
+    blendShape : str
+        The name of the blendShape node
+    basePoints : MPointArray
+        The points of the mesh without deformation
+    samples : list
+        The points of the mesh at every sample of the period
+    resolution : int
+        The number of samples in the period
+    """
+
+    # Every in-between changes all the vertices
+    componentFn = OpenMaya.MFnSingleIndexedComponent()
+    components = componentFn.create(OpenMaya.MFn.kMeshVertComponent)
+    componentFn.setCompleteData(len(basePoints))
+
+    for index, points in enumerate(samples):
+        itemIndex = 5000 + int(round(1000.0 * (index + 1) / (resolution + 1)))
+
+        # The targets save the offset of each vertex from the undeformed mesh
+        offsets = OpenMaya.MPointArray([OpenMaya.MPoint(point - basePoint) for point, basePoint in zip(points, basePoints)])
+        getTargetPlug(blendShape, itemIndex, "inputPointsTarget").setMObject(OpenMaya.MFnPointArrayData().create(offsets))
+
+        componentData = OpenMaya.MFnComponentListData()
+        componentList = componentData.create()
+        componentData.add(components)
+        getTargetPlug(blendShape, itemIndex, "inputComponentsTarget").setMObject(componentList)
+
+def bake(mesh, wireNode, baseWire, controller, pieceSpacing, resolution=16, name="TreadPeriodicCache"):
+    """Bakes the deformation of one period of the tread and drives the mesh with it
+
+    The sample k is saved as an in-between at weight (k+1)/(resolution+1), so the weight goes
+    from 1/(resolution+1) to 1 along the period and never reaches the undeformed mesh at 0.
+
+    Parameters
+    ----------
+    mesh : str
+        The name of the tread mesh
+    wireNode : str
+        The name of the wire deformer of the mesh
+    baseWire : str
+        The name of the base wire of the deformer
+    controller : str
+        The main controller, with the translateZ and treadSpeed that scroll the tread
+    pieceSpacing : float
+        The degrees the base wire rotates to scroll one piece
+    resolution : int
+        The number of samples in the period
+    name : str
+        The name for the blendShape node
+
+    Returns
+    -------
+    list
+        The names of the nodes created for the cache
+    """
+
+    basePoints, samples = samplePeriod(mesh, wireNode, baseWire, pieceSpacing, resolution)
+
+    # An empty blendShape, before the wire so it works on the undeformed points
+    blendShape = cmds.blendShape(mesh, name=name, frontOfChain=True)[0]
+
+    # Undoing the blendShape takes the targets with it, redoing it needs them again
+    setTargets(blendShape, basePoints, samples, resolution)
+    rigUtils.recordApiEdit(None, functools.partial(setTargets, blendShape, basePoints, samples, resolution))
+
+    # Switch to turn the cache on and off
+    if not cmds.attributeQuery(CACHE_ATTRIBUTE, node=controller, exists=True):
+        cmds.addAttr(controller, longName=CACHE_ATTRIBUTE, attributeType="bool", defaultValue=True, keyable=False)
+        cmds.setAttr("{}.{}".format(controller, CACHE_ATTRIBUTE), channelBox=True)
+    cmds.setAttr("{}.{}".format(controller, CACHE_ATTRIBUTE), True)
+    switchPlug = "{}.{}".format(controller, CACHE_ATTRIBUTE)
+
+    # position in the period = translateZ * treadSpeed / pieceSpacing
+    speedNode = cmds.createNode("multDoubleLinear", name="{}Speed".format(name), skipSelect=True)
+    cmds.connectAttr("{}.translateZ".format(controller), "{}.input1".format(speedNode))
+    cmds.connectAttr("{}.treadSpeed".format(controller), "{}.input2".format(speedNode))
+
+    periodNode = cmds.createNode("multDoubleLinear", name="{}Period".format(name), skipSelect=True)
+    cmds.setAttr("{}.input2".format(periodNode), 1.0 / pieceSpacing)
+    cmds.connectAttr("{}.output".format(speedNode), "{}.input1".format(periodNode))
+
+    # A linear curve that repeats itself turns the position into the weight of the in-betweens
+    weightCurve = cmds.createNode("animCurveUU", name="{}Weight".format(name), skipSelect=True)
+    cmds.setKeyframe(weightCurve, float=0, value=1.0 / (resolution + 1), inTangentType="linear", outTangentType="linear")
+    cmds.setKeyframe(weightCurve, float=1, value=1, inTangentType="linear", outTangentType="linear")
+    cmds.setInfinity(weightCurve, preInfinite="cycle", postInfinite="cycle")
+    cmds.connectAttr("{}.output".format(periodNode), "{}.input".format(weightCurve))
+    cmds.connectAttr("{}.output".format(weightCurve), "{}.weight[0]".format(blendShape))
+
+    # The cache turns on the blendShape and turns off the wire
+    cmds.connectAttr(switchPlug, "{}.envelope".format(blendShape))
+    reverseNode = cmds.createNode("reverse", name="{}Switch".format(name), skipSelect=True)
+    cmds.connectAttr(switchPlug, "{}.inputX".format(reverseNode))
+    cmds.connectAttr("{}.outputX".format(reverseNode), "{}.envelope".format(wireNode))
+
+    # The wire moves the mesh when the controller moves, the cache moves the mesh itself instead
+    # translate = (controller's translate - translate when baked) * cache
+    restTranslate = cmds.getAttr("{}.translate".format(controller))[0]
+    offsetNode = cmds.createNode("plusMinusAverage", name="{}Offset".format(name), skipSelect=True)
+    cmds.setAttr("{}.operation".format(offsetNode), 2)
+    cmds.connectAttr("{}.translate".format(controller), "{}.input3D[0]".format(offsetNode))
+    cmds.setAttr("{}.input3D[1]".format(offsetNode), restTranslate[0], restTranslate[1], restTranslate[2], type="double3")
+
+    translateNode = cmds.createNode("multiplyDivide", name="{}Translate".format(name), skipSelect=True)
+    cmds.connectAttr("{}.output3D".format(offsetNode), "{}.input1".format(translateNode))
+    for axis in "XYZ":
+        cmds.connectAttr(switchPlug, "{}.input2{}".format(translateNode, axis))
+    cmds.connectAttr("{}.output".format(translateNode), "{}.translate".format(mesh), force=True)
+
+    return [blendShape, speedNode, periodNode, weightCurve, reverseNode, offsetNode, translateNode]
+
+def remove(cacheNodes, mesh, wireNode, controller):
+    """Deletes a cache and gives the control back to the wire deformer
+
+    Parameters
+    ----------
+    cacheNodes : list
+        The names of the nodes returned by bake()
+    mesh : str
+        The name of the tread mesh
+    wireNode : str
+        The name of the wire deformer of the mesh
+    controller : str
+        The main controller, its callbacks are removed
+    """
+
+    unwatch(controller)
+
+    if cmds.objExists(controller) and cmds.attributeQuery(WATCHED_ATTRIBUTE, node=controller, exists=True):
+        cmds.deleteAttr(controller, attribute=WATCHED_ATTRIBUTE)
+
+    # cmds.ls with an empty list returns every node in the scene
+    nodes = cmds.ls(cacheNodes) if cacheNodes else []
+    if nodes:
+        cmds.delete(nodes)
+
+    # The cache might have moved the mesh and turned off the wire, leave them as they were before baking
+    if cmds.objExists(mesh):
+        cmds.setAttr("{}.translate".format(mesh), 0, 0, 0)
+    if cmds.objExists(wireNode):
+        cmds.setAttr("{}.envelope".format(wireNode), 1)
+
+def watch(controller, nodes):
+    """Registers callbacks that turn off the cache when the curve controllers or the mesh change
+
+    The nodes are connected to the controller, so watchSavedCaches() finds them after the scene is saved.
+
+    Parameters
+    ----------
+    controller : str
+        The main controller with the cache attribute
+    nodes : list
+        The curve controllers and the shapes of the meshes to watch
+    """
+
+    unwatch(controller)
+
+    # cmds.ls with an empty list returns every node in the scene
+    nodes = cmds.ls(nodes) if nodes else []
+
+    # The connections are made before the callbacks, so they don't turn off the cache
+    if cmds.attributeQuery(WATCHED_ATTRIBUTE, node=controller, exists=True):
+        cmds.deleteAttr(controller, attribute=WATCHED_ATTRIBUTE)
+    cmds.addAttr(controller, longName=WATCHED_ATTRIBUTE, attributeType="message", multi=True)
+
+    for index, node in enumerate(nodes):
+        cmds.connectAttr("{}.message".format(node), "{}.{}[{}]".format(controller, WATCHED_ATTRIBUTE, index))
+
+    callbackIds = []
+
+    for node in nodes:
+        selectionList = OpenMaya.MSelectionList()
+        selectionList.add(node)
+        callbackIds.append(OpenMaya.MNodeMessage.addAttributeChangedCallback(selectionList.getDependNode(0),
+                                                                            onWatchedNodeChanged, controller))
+
+    cacheCallbacks[controller] = callbackIds
+
+def watchedNodes(controller):
+    """Returns the nodes connected to a controller by watch()
+
+    Parameters
+    ----------
+    controller : str
+        The main controller with the cache attribute
+    """
+
+    if not cmds.attributeQuery(WATCHED_ATTRIBUTE, node=controller, exists=True):
+        return []
+
+    return cmds.listConnections("{}.{}".format(controller, WATCHED_ATTRIBUTE), source=True, destination=False) or []
+
+def watchSavedCaches():
+    """Registers again the callbacks of every cache of the scene that is turned on"""
+
+    for controller in cmds.ls("*.{}".format(WATCHED_ATTRIBUTE), objectsOnly=True, recursive=True):
+        if controller in cacheCallbacks or not cmds.attributeQuery(CACHE_ATTRIBUTE, node=controller, exists=True):
+            continue
+
+        # A cache that was turned off doesn't need its callbacks until it is baked again
+        if cmds.getAttr("{}.{}".format(controller, CACHE_ATTRIBUTE)):
+            watch(controller, watchedNodes(controller))
+
+def watchScene():
+    """Registers the callbacks that watch the caches of the scenes that are opened or imported"""
+
+    if sceneCallbacks:
+        return
+
+    for message in (OpenMaya.MSceneMessage.kAfterOpen, OpenMaya.MSceneMessage.kAfterImport,
+                    OpenMaya.MSceneMessage.kAfterCreateReference):
+        sceneCallbacks.append(OpenMaya.MSceneMessage.addCallback(message, onSceneOpened,
+                                                                 message == OpenMaya.MSceneMessage.kAfterOpen))
+
+def onSceneOpened(newScene):
+    """Callback for an opened file, an import or a reference"""
+
+    # The nodes of the previous scene are gone with their callbacks
+    if newScene:
+        for controller in list(cacheCallbacks):
+            unwatch(controller)
+
+    watchSavedCaches()
+
+def unwatch(controller):
+    """Removes the callbacks of a cache
+
+    Parameters
+    ----------
+    controller : str
+        The main controller with the cache attribute
+    """
+
+    for callbackId in cacheCallbacks.pop(controller, []):
+        OpenMaya.MMessage.removeCallback(callbackId)
+
+def onWatchedNodeChanged(message, plug, otherPlug, controller):
+    """Callback for an attribute that was set, connected or disconnected on a watched node"""
+
+    changes = (OpenMaya.MNodeMessage.kAttributeSet | OpenMaya.MNodeMessage.kConnectionMade |
+               OpenMaya.MNodeMessage.kConnectionBroken)
+
+    if not message & changes:
+        return
+
+    # The scene can't be edited inside of the callback, it is done when Maya is idle
+    unwatch(controller)
+    cmds.evalDeferred(functools.partial(invalidate, controller))
+
+def invalidate(controller):
+    """Turns off the cache of a controller, the wire deformer is used again
+
+    Parameters
+    ----------
+    controller : str
+        The main controller with the cache attribute
+    """
+
+    unwatch(controller)
+
+    if cmds.objExists(controller) and cmds.attributeQuery(CACHE_ATTRIBUTE, node=controller, exists=True):
+        cmds.setAttr("{}.{}".format(controller, CACHE_ATTRIBUTE), False)
+        cmds.warning("The periodic cache of {} was turned off, bake it again to use it".format(controller))
+
+# The caches of the scene that is open when the tool is loaded and of the ones opened after it
+if not sceneCallbacks:
+    watchScene()
+    watchSavedCaches()
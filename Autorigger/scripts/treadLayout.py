@@ -0,0 +1,640 @@
+"""Tread piece layout engine.
+
+This script computes the position and orientation of every tread piece
+along the tread curve directly from the curve's parameters, instead of
+animating the piece on a motion path and taking snapshots of it.
+
+The placement matches the one made by the motion path in ThreadMaker:
+    * Pieces are spread by arc length (fractionMode) from the start of the curve,
+      on a closed curve they are evenly spaced all around it
+    * The front axis (Z) of the piece follows the curve's tangent
+    * The up axis (Y) of the piece points as close as possible to world up (0,1,0)
+
+Once every transform is known, the merged tread mesh is built in a single
+creation step out of the piece's geometry. The timeline and the scene's
+animation are never modified.
+
+This module needs NumPy. When it is not available, isAvailable() returns False
+and ThreadMaker keeps using the snapshot process.
+"""
+
+from maya import cmds
+from maya.api import OpenMaya
+import functools
+import rigUtils
+reload(rigUtils)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The number of samples taken on every span of the curve to measure its length
+SAMPLES_PER_SPAN = 64
+
+def isAvailable():
+    """Returns True when NumPy can be used to compute the layout"""
+
+    return numpy is not None
+
+def getShapePath(nodeName):
+    """Returns the MDagPath of the shape of a node given its name
+
+    Parameters
+    ----------
+    nodeName : str
+        The name of the transform or shape in the scene
+    """
+
+    selectionList = OpenMaya.MSelectionList()
+    selectionList.add(nodeName)
+    dagPath = selectionList.getDagPath(0)
+
+    # Function sets need the shape, not the transform
+    if dagPath.apiType() == OpenMaya.MFn.kTransform:
+        dagPath.extendToShape()
+
+    return dagPath
+
+def getCurveData(curve):
+    """Reads the parameters that define a nurbs curve
+
+    Parameters
+    ----------
+    curve : str
+        The name of the curve (transform or shape)
+
+    Returns
+    -------
+    dict
+        cvs: (n,3) array with the world position of the cvs
+        knots: the complete knot vector (Maya leaves out the first and last knots, here they are added)
+        degree: the degree of the curve
+        domain: tuple with the first and last parameter of the curve
+        periodic: True if the curve is periodic
+    """
+
+    curveFn = OpenMaya.MFnNurbsCurve(getShapePath(curve))
+
+    cvs = numpy.array([(point.x, point.y, point.z) for point in curveFn.cvPositions(OpenMaya.MSpace.kWorld)])
+
+    # Maya stores numCVs + degree - 1 knots, we repeat the end ones
+    # to get the numCVs + degree + 1 knots that the evaluation formula uses
+    knots = numpy.array(curveFn.knots())
+    knots = numpy.concatenate(([knots[0]], knots, [knots[-1]]))
+
+    return {"cvs": cvs,
+            "knots": knots,
+            "degree": curveFn.degree,
+            "domain": curveFn.knotDomain,
+            "periodic": curveFn.form == OpenMaya.MFnNurbsCurve.kPeriodic}
+
+def evaluateCurve(cvs, knots, degree, params):
+    """Evaluates a B-spline at many parameters at once using de Boor's algorithm
+
+    Parameters
+    ----------
+    cvs : numpy.ndarray
+        (n,3) array with the control points
+    knots : numpy.ndarray
+        The complete knot vector (n + degree + 1 values)
+    degree : int
+        The degree of the curve
+    params : numpy.ndarray
+        The parameters to evaluate
+
+    Returns
+    -------
+    numpy.ndarray
+        (len(params),3) array with the points on the curve
+    """
+
+    params = numpy.asarray(params, dtype=float)
+
+    # Find the knot span of each parameter, the last parameter belongs to the last span
+    spans = numpy.searchsorted(knots, params, side="right") - 1
+    spans = numpy.clip(spans, degree, len(cvs) - 1)
+
+    # Gather the degree+1 control points that affect each parameter
+    # points has shape (len(params), degree+1, 3)
+    offsets = numpy.arange(-degree, 1)
+    points = cvs[spans[:, None] + offsets].copy()
+
+    # Blend the control points degree times
+    for level in range(1, degree + 1):
+        for j in range(degree, level - 1, -1):
+            index = spans - degree + j
+            left = knots[index]
+            right = knots[index + degree - level + 1]
+            denominator = numpy.where(right - left == 0, 1.0, right - left)
+            alpha = ((params - left) / denominator)[:, None]
+            points[:, j] = (1.0 - alpha) * points[:, j - 1] + alpha * points[:, j]
+
+    return points[:, degree]
+
+def evaluateTangent(cvs, knots, degree, params):
+    """Evaluates the first derivative of a B-spline at many parameters at once
+
+    The derivative of a B-spline is another B-spline with one degree less,
+    so we build its control points and evaluate it with evaluateCurve.
+
+    Parameters
+    ----------
+    cvs : numpy.ndarray
+        (n,3) array with the control points
+    knots : numpy.ndarray
+        The complete knot vector (n + degree + 1 values)
+    degree : int
+        The degree of the curve
+    params : numpy.ndarray
+        The parameters to evaluate
+    """
+
+    spacing = knots[degree + 1:len(cvs) + degree] - knots[1:len(cvs)]
+    spacing = numpy.where(spacing == 0, 1.0, spacing)
+    derivativeCvs = degree * (cvs[1:] - cvs[:-1]) / spacing[:, None]
+
+    return evaluateCurve(derivativeCvs, knots[1:-1], degree - 1, params)
+
+def parametersAtFractions(curveData, fractions):
+    """Finds the curve parameters at fractions of the total curve length
+
+    This is what the motion path does when using fractionMode.
+
+    Parameters
+    ----------
+    curveData : dict
+        The curve information returned by getCurveData
+    fractions : numpy.ndarray
+        Values from 0 to 1 representing a fraction of the curve length
+
+    Returns
+    -------
+    numpy.ndarray
+        The parameters of the curve at those fractions
+    """
+
+    start, end = curveData["domain"]
+    spans = len(curveData["cvs"]) - curveData["degree"]
+
+    # Sample the curve densely and accumulate the length of each segment
+    samples = numpy.linspace(start, end, spans * SAMPLES_PER_SPAN + 1)
+    points = evaluateCurve(curveData["cvs"], curveData["knots"], curveData["degree"], samples)
+    segmentLengths = numpy.linalg.norm(points[1:] - points[:-1], axis=1)
+    cumulativeLength = numpy.concatenate(([0.0], numpy.cumsum(segmentLengths)))
+
+    # Interpolate the parameter that corresponds to each length
+    distances = numpy.asarray(fractions) * cumulativeLength[-1]
+    params = numpy.interp(distances, cumulativeLength, samples)
+
+    return refineParameters(curveData, distances, params, samples, cumulativeLength)
+
+def refineParameters(curveData, distances, params, sampleParams, cumulativeLength):
+    """Corrects the parameters interpolated from a table of lengths
+
+    The curve doesn't move at the same speed along a segment of the table, so the
+    parameter interpolated linearly inside it is a little off where the CVs are
+    spaced unevenly. A Newton step moves each parameter by the length it is missing
+    divided by the speed of the curve there.
+
+    Parameters
+    ----------
+    curveData : dict
+        The curve information returned by getCurveData
+    distances : numpy.ndarray
+        The distances from the start of the curve
+    params : numpy.ndarray
+        The parameters interpolated at those distances
+    sampleParams : numpy.ndarray
+        The parameters of the samples of the table
+    cumulativeLength : numpy.ndarray
+        The length of the curve from its start to each sample
+
+    Returns
+    -------
+    numpy.ndarray
+        The corrected parameters
+    """
+
+    cvs, knots, degree = curveData["cvs"], curveData["knots"], curveData["degree"]
+
+    # The length up to a parameter is the one of its segment plus the chord from the start of the segment
+    segments = numpy.clip(numpy.searchsorted(cumulativeLength, distances, side="right") - 1, 0, len(sampleParams) - 2)
+    chords = evaluateCurve(cvs, knots, degree, params) - evaluateCurve(cvs, knots, degree, sampleParams[segments])
+    lengths = cumulativeLength[segments] + numpy.linalg.norm(chords, axis=1)
+
+    speeds = numpy.linalg.norm(evaluateTangent(cvs, knots, degree, params), axis=1)
+    steps = numpy.where(speeds > 0, (distances - lengths) / numpy.where(speeds > 0, speeds, 1.0), 0.0)
+
+    return numpy.clip(params + steps, sampleParams[0], sampleParams[-1])
+
+def pieceFractions(amount, closed=True):
+    """Returns the fraction of the curve length where each piece goes
+
+    On a closed curve the start and the end are the same point, so the pieces
+    go at index/amount and the gap between the last and the first piece is the
+    same as between any other two. On an open curve the fractions go from 0
+    to 1, both included.
+
+    Parameters
+    ----------
+    amount : int
+        The number of pieces
+    closed : bool
+        True if the curve is closed
+    """
+
+    if amount == 1:
+        return numpy.zeros(1)
+
+    if closed:
+        return numpy.arange(amount) / float(amount)
+
+    return numpy.linspace(0.0, 1.0, amount)
+
+def computeFrames(curveData, params, worldUp=(0, 1, 0)):
+    """Computes the position and the orientation of the pieces on the curve
+
+    Parameters
+    ----------
+    curveData : dict
+        The curve information returned by getCurveData
+    params : numpy.ndarray
+        The parameters of the curve where the pieces are
+    worldUp : tuple
+        The vector that the up axis (Y) of the pieces should follow
+
+    Returns
+    -------
+    tuple
+        positions: (n,3) array with the position of each piece
+        rotations: (n,3,3) array with the rotation matrix of each piece,
+        its rows are the X, Y and Z axis of the piece in world space
+    """
+
+    positions = evaluateCurve(curveData["cvs"], curveData["knots"], curveData["degree"], params)
+    tangents = evaluateTangent(curveData["cvs"], curveData["knots"], curveData["degree"], params)
+
+    # Front axis follows the curve
+    front = tangents / numpy.linalg.norm(tangents, axis=1)[:, None]
+
+    # Up axis is the world up without the component that goes along the front axis
+    worldUp = numpy.asarray(worldUp, dtype=float)
+    up = worldUp - (front.dot(worldUp))[:, None] * front
+    upLength = numpy.linalg.norm(up, axis=1)
+
+    # When the curve goes along world up, there is no up axis. Like the
+    # motion path, we keep the one of the previous piece instead
+    degenerate = upLength < 1e-8
+    upLength[degenerate] = 1.0
+    up /= upLength[:, None]
+    for index in numpy.nonzero(degenerate)[0]:
+        up[index] = up[index - 1] if index else numpy.cross(front[index], (1.0, 0.0, 0.0))
+
+    side = numpy.cross(up, front)
+
+    return positions, numpy.stack((side, up, front), axis=1)
+
+def computeLayout(curve, amount, table=None):
+    """Computes the position and orientation of every tread piece on a curve
+
+    Parameters
+    ----------
+    curve : str
+        The name of the tread curve
+    amount : int
+        The number of pieces
+    table : arcLength.ArcLengthTable
+        An up to date arc-length table of the curve, so it is not measured again
+
+    Returns
+    -------
+    tuple
+        positions and rotations as returned by computeFrames
+    """
+
+    if table is not None:
+        curveData = table.curveData
+        params = table.parameterAtFraction(pieceFractions(int(amount), table.closed))
+    else:
+        curveData = getCurveData(curve)
+        params = parametersAtFractions(curveData, pieceFractions(int(amount), curveData["periodic"]))
+
+    return computeFrames(curveData, params)
+
+def getMeshData(mesh):
+    """Reads the geometry of a mesh to copy it
+
+    Parameters
+    ----------
+    mesh : str
+        The name of the mesh
+
+    Returns
+    -------
+    dict
+        points: (n,3) array with the object space position of the vertices
+        scale: the scale of the object, which is kept when placing it on the path
+        counts, connects: the number of vertices per face and the vertices of each face
+        u, v, uvCounts, uvIds: the UVs of the mesh
+    """
+
+    meshFn = OpenMaya.MFnMesh(getShapePath(mesh))
+
+    points = numpy.array([(point.x, point.y, point.z) for point in meshFn.getPoints(OpenMaya.MSpace.kObject)])
+    counts, connects = meshFn.getVertices()
+    u, v = meshFn.getUVs()
+    uvCounts, uvIds = meshFn.getAssignedUVs()
+
+    return {"points": points,
+            "scale": numpy.array(cmds.getAttr("{}.scale".format(mesh))[0]),
+            "counts": numpy.array(counts, dtype=int),
+            "connects": numpy.array(connects, dtype=int),
+            "u": list(u),
+            "v": list(v),
+            "uvCounts": numpy.array(uvCounts, dtype=int),
+            "uvIds": numpy.array(uvIds, dtype=int)}
+
+def transformPieces(meshData, positions, rotations):
+    """Places a copy of the piece's vertices on each transform
+
+    Parameters
+    ----------
+    meshData : dict
+        The piece information returned by getMeshData
+    positions : numpy.ndarray
+        (n,3) array with the position of each piece
+    rotations : numpy.ndarray
+        (n,3,3) array with the rotation of each piece
+
+    Returns
+    -------
+    numpy.ndarray
+        (n * vertices, 3) array with the world position of all the vertices
+    """
+
+    scaledPoints = meshData["points"] * meshData["scale"]
+
+    # Maya uses row vectors, so a point is transformed as point * matrix
+    points = numpy.einsum("vi,nij->nvj", scaledPoints, rotations) + positions[:, None, :]
+
+    return points.reshape(-1, 3)
+
+def tileTopology(meshData, amount, firstPiece=0):
+    """Repeats the faces of the piece for every copy of it
+
+    Parameters
+    ----------
+    meshData : dict
+        The piece information returned by getMeshData
+    amount : int
+        The number of pieces
+    firstPiece : int
+        The index of the first piece, used to add pieces to an existing mesh
+
+    Returns
+    -------
+    tuple
+        counts, connects, uvCounts and uvIds for the merged mesh
+    """
+
+    vertexOffsets = numpy.arange(firstPiece, firstPiece + amount) * len(meshData["points"])
+
+    counts = numpy.tile(meshData["counts"], amount)
+    connects = (meshData["connects"][None, :] + vertexOffsets[:, None]).reshape(-1)
+
+    # Every copy of the piece shares the same UV values, so their ids are just repeated
+    uvCounts = numpy.tile(meshData["uvCounts"], amount)
+    uvIds = numpy.tile(meshData["uvIds"], amount)
+
+    return counts, connects, uvCounts, uvIds
+
+def createMesh(points, meshData, amount, name):
+    """Creates a mesh out of the given points and the piece's faces in a single step
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        (n,3) array with the position of every vertex
+    meshData : dict
+        The piece information returned by getMeshData
+    amount : int
+        The number of pieces
+    name : str
+        The name for the new mesh
+
+    Returns
+    -------
+    str
+        The name of the new mesh's transform
+    """
+
+    counts, connects, uvCounts, uvIds = tileTopology(meshData, amount)
+
+    meshFn = OpenMaya.MFnMesh()
+    transform = meshFn.create(OpenMaya.MPointArray(points.tolist()), counts.tolist(), connects.tolist(),
+                              meshData["u"], meshData["v"])
+
+    # Only assign UVs if the piece had them
+    if len(uvIds):
+        meshFn.assignUVs(uvCounts.tolist(), uvIds.tolist())
+
+    # The API doesn't record the new mesh, undoing the step deletes it and redoing it brings it back
+    deleter = OpenMaya.MDagModifier()
+    deleter.deleteNode(transform)
+    rigUtils.recordApiEdit(deleter.doIt, deleter.undoIt)
+
+    meshName = cmds.rename(OpenMaya.MFnDagNode(transform).fullPathName(), name)
+
+    # Meshes created through the API don't have a shader, give it the default one
+    cmds.sets(meshName, edit=True, forceElement="initialShadingGroup")
+
+    return meshName
+
+def buildTreadMesh(meshData, curve, amount, name="TreadMesh", table=None):
+    """Builds the merged tread mesh out of a piece placed along a curve
+
+    Parameters
+    ----------
+    meshData : dict
+        The piece information returned by getMeshData
+    curve : str
+        The name of the tread curve
+    amount : int
+        The number of pieces
+    name : str
+        The name for the new mesh
+    table : arcLength.ArcLengthTable
+        An up to date arc-length table of the curve
+
+    Returns
+    -------
+    str
+        The name of the merged tread mesh
+    """
+
+    amount = int(amount)
+
+    positions, rotations = computeLayout(curve, amount, table)
+
+    return createMesh(transformPieces(meshData, positions, rotations), meshData, amount, name)
+
+def streamTreadMesh(meshData, curve, amount, batchSize, name="TreadMesh", table=None):
+    """Builds the merged tread mesh in batches, merging every batch into the mesh right away
+
+    Only the vertices of one batch are kept in memory at a time, so the peak memory
+    depends on the batch size and the finished mesh, not on the amount of pieces.
+    The pieces keep their order, so the mesh can be resized like one made by buildTreadMesh.
+
+    Parameters
+    ----------
+    meshData : dict
+        The piece information returned by getMeshData
+    curve : str
+        The name of the tread curve
+    amount : int
+        The number of pieces
+    batchSize : int
+        The number of pieces built before merging them into the mesh
+    name : str
+        The name for the new mesh
+    table : arcLength.ArcLengthTable
+        An up to date arc-length table of the curve
+
+    Yields
+    ------
+    tuple
+        The name of the mesh so far and the number of pieces in it,
+        the last one is the finished mesh
+    """
+
+    amount = int(amount)
+    batchSize = max(1, int(batchSize))
+
+    # The transforms of all the pieces are small, only the vertices are made in batches
+    positions, rotations = computeLayout(curve, amount, table)
+    mesh = None
+
+    for first in range(0, amount, batchSize):
+        last = min(first + batchSize, amount)
+        points = transformPieces(meshData, positions[first:last], rotations[first:last])
+        batch = createMesh(points, meshData, last - first, "{}Batch".format(name))
+
+        if mesh is None:
+            mesh = batch
+        else:
+            merged = cmds.polyUnite(mesh, batch, name="{}Merged".format(name), constructionHistory=False)[0]
+
+            # Without history polyUnite leaves the empty transforms behind
+            leftovers = cmds.ls(mesh, batch)
+            if leftovers:
+                cmds.delete(leftovers)
+            mesh = merged
+
+        if last == amount:
+            mesh = cmds.rename(mesh, name)
+
+        yield mesh, last
+
+def readGeometry(meshFn):
+    """Returns the points, the faces and the UVs of a mesh, to give them back with writeGeometry
+
+    Parameters
+    ----------
+    meshFn : MFnMesh
+        The function set of the mesh
+    """
+
+    counts, connects = meshFn.getVertices()
+    u, v = meshFn.getUVs()
+    uvCounts, uvIds = meshFn.getAssignedUVs()
+
+    return meshFn.getPoints(), counts, connects, u, v, uvCounts, uvIds
+
+def writeGeometry(meshFn, geometry):
+    """Replaces the geometry of a mesh without creating a new node, so its name and shader are kept
+
+    Parameters
+    ----------
+    meshFn : MFnMesh
+        The function set of the mesh
+    geometry : tuple
+        The points, the faces and the UVs returned by readGeometry
+    """
+
+    points, counts, connects, u, v, uvCounts, uvIds = geometry
+
+    meshFn.createInPlace(points, counts, connects)
+
+    if len(uvIds):
+        meshFn.setUVs(u, v)
+        meshFn.assignUVs(uvCounts, uvIds)
+
+def resizeTreadMesh(mesh, meshData, curve, amount, table=None):
+    """Changes the number of pieces of an existing tread mesh
+
+    The faces of the pieces that are kept are not rebuilt, only the pieces
+    that are added or removed change the topology. Every piece that is kept
+    is moved to its new place along the curve.
+
+    Parameters
+    ----------
+    mesh : str
+        The name of the merged tread mesh
+    meshData : dict
+        The information of the piece that was used to build the mesh
+    curve : str
+        The name of the tread curve
+    amount : int
+        The new number of pieces
+    table : arcLength.ArcLengthTable
+        An up to date arc-length table of the curve
+
+    Returns
+    -------
+    str
+        The name of the tread mesh
+    """
+
+    amount = int(amount)
+    meshFn = OpenMaya.MFnMesh(getShapePath(mesh))
+    currentAmount = meshFn.numVertices // len(meshData["points"])
+
+    # Re-space every piece for the new amount
+    positions, rotations = computeLayout(curve, amount, table)
+    points = OpenMaya.MPointArray(transformPieces(meshData, positions, rotations).tolist())
+
+    # With the same amount of pieces, only the vertices move
+    if amount == currentAmount:
+        previousPoints = meshFn.getPoints()
+        meshFn.setPoints(points)
+        rigUtils.recordApiEdit(functools.partial(meshFn.setPoints, previousPoints),
+                               functools.partial(meshFn.setPoints, points))
+        return mesh
+
+    previousGeometry = readGeometry(meshFn)
+
+    counts, connects = meshFn.getVertices()
+    uvCounts, uvIds = meshFn.getAssignedUVs()
+
+    # Removing pieces, keep the faces of the first ones
+    if amount < currentAmount:
+        counts = list(counts)[:amount * len(meshData["counts"])]
+        connects = list(connects)[:amount * len(meshData["connects"])]
+        uvCounts = list(uvCounts)[:amount * len(meshData["uvCounts"])]
+        uvIds = list(uvIds)[:amount * len(meshData["uvIds"])]
+
+    # Adding pieces, append the faces of the new ones only
+    else:
+        newTopology = tileTopology(meshData, amount - currentAmount, firstPiece=currentAmount)
+        counts = list(counts) + newTopology[0].tolist()
+        connects = list(connects) + newTopology[1].tolist()
+        uvCounts = list(uvCounts) + newTopology[2].tolist()
+        uvIds = list(uvIds) + newTopology[3].tolist()
+
+    geometry = (points, counts, connects, meshData["u"], meshData["v"], uvCounts, uvIds)
+    writeGeometry(meshFn, geometry)
+    rigUtils.recordApiEdit(functools.partial(writeGeometry, meshFn, previousGeometry),
+                           functools.partial(writeGeometry, meshFn, geometry))
+
+    return mesh
@@ -6,8 +6,11 @@ act as a wheel.
 """
 
 from maya import cmds
+import math
 import dataNodeManager
 reload(dataNodeManager)
+import rigUtils
+reload(rigUtils)
 
 class WheelData(dataNodeManager.NodeData):
     """A class to save information for this rigging process.
@@ -22,10 +25,10 @@ class WheelData(dataNodeManager.NodeData):
         The name of the main nurbs curve that controls the rig
     mainControllerGroup : str
         The name of the group where the mainController is
-    controllerAttributeName : str
-        The name of the type of rig that is saved (i.e. wheelControllers, treadControllers, armControllers)
-    controllerGroupAttributeName : str
-        The name of the type of rig GROUP that is saved (i.e. wheelControllerGroups, treadControllerGroups, armControllerGroups)
+    componentType : str
+        The type of rig that is saved (i.e. wheel, tread, arm)
+    componentAttributes : list
+        The names of the attributes specific to this type of rig that are saved with it
 
     Methods
     -------
@@ -37,11 +40,16 @@ class WheelData(dataNodeManager.NodeData):
         self.wheelGroup = ""
         self.mainController = ""
         self.mainControllerGroup = ""
-        self.controllerAttributeName = "wheelControllers"
-        self.controllerGroupAttributeName = "wheelControllerGroups"
+        self.componentType = "wheel"
+        self.componentAttributes = ["wheelGroup"]
     
 data = WheelData()
 
+# The ways to make the wheels rotate, in the same order as the Driver menu
+# nodes: one multDoubleLinear node shared by every wheel
+# expression: one expression node per wheel
+DRIVERS = ["nodes", "expression"]
+
 def makeWindow():
     """This function creates and displays a window"""
 
@@ -71,6 +79,13 @@ def populateWindow():
     # A float slider that will keep the desired speed for the rotation
     makeWindow.RotSpeed = cmds.floatSliderGrp(label="Wheel Speed", field=True, value=1)
 
+    # A menu to choose how the rotation is computed
+    makeWindow.Driver = cmds.optionMenuGrp(label="Driver",
+                                           annotation="Utility nodes are faster and support parallel evaluation",
+                                           statusBarMessage="Utility nodes are faster and support parallel evaluation")
+    cmds.menuItem(label="Utility nodes")
+    cmds.menuItem(label="Expressions")
+
     # Setting the columns to 3 so the buttons can be centered
     # - separator - button - separator
     cmds.rowLayout(numberOfColumns=3, columnWidth3=(150,200,150))
@@ -90,26 +105,53 @@ def populateWindow():
     # Return a reference to layout to use it later
     return mainLayout
 
+@rigUtils.transaction
 def wheelSelection(*args):
     """This functiion groups the wheels and adds a locator to control their rotation"""
 
     # Get the list of selected objects
     wheelSet = cmds.ls(selection=True)
+
+    # Get the speed from the slider
+    rotationSpeed = cmds.floatSliderGrp(makeWindow.RotSpeed, q=True, v=True)
+
+    # Get the driver from the menu, its items start at 1
+    driver = DRIVERS[cmds.optionMenuGrp(makeWindow.Driver, q=True, select=True)-1]
+
+    rigWheels(wheelSet, rotationSpeed, driver)
+
+    data.writeToNode()
+
+@rigUtils.transaction
+@rigUtils.preserveSelection
+def rigWheels(wheelSet, rotationSpeed=1.0, driver="nodes"):
+    """This function groups the wheels and makes them rotate when the controller moves
+
+    Parameters
+    ----------
+    wheelSet : list
+        The names of the wheels
+    rotationSpeed : float
+        The degrees the wheels rotate for every unit the controller moves
+    driver : str
+        The way the rotation is computed, one of DRIVERS
+    """
+
+    if driver not in DRIVERS:
+        raise ValueError("Unknown wheel driver '{}', choose one of {}".format(driver, DRIVERS))
     
-    # Group the selected objects
-    data.wheelGroup = cmds.group(name="WheelsGroup")
+    # Group the wheels
+    data.wheelGroup = cmds.group(wheelSet, name="WheelsGroup")
     # Create locator controller
-    locatorName = checkDuplicatedName("WheelsController")
+    locatorName = rigUtils.sharedNames().reserve("WheelsController")
     data.mainController = cmds.spaceLocator(name=locatorName)[0]
 
-    cmds.scale(4.0,4.0,4.0)
+    cmds.scale(4.0,4.0,4.0, data.mainController)
 
-    data.mainControllerGroup = cmds.group(name="WheelsControllerGroup")
+    data.mainControllerGroup = cmds.group(data.mainController, name="WheelsControllerGroup")
     
-    # Align locator to group
-    cmds.select(data.wheelGroup, add=True)
-    cmds.align(xAxis="mid", yAxis="max", zAxis="mid", alignToLead=True)
-    cmds.select(data.mainController)
+    # Align locator group to the wheels group, the last object is the one that doesn't move
+    cmds.align(data.mainControllerGroup, data.wheelGroup, xAxis="mid", yAxis="max", zAxis="mid", alignToLead=True)
 
     # *************************** Connection editor way *********************************
     # It is not ideal because there is no way to control the rotation speed
@@ -118,78 +160,49 @@ def wheelSelection(*args):
         cmds.connectAttr("WheelsCtrl.tz", "{}.ry".format(wheel))
         '''
     
-    # Get the speed from the slider
-    rotationSpeed = cmds.floatSliderGrp(makeWindow.RotSpeed, q=True, v=True)
+    if driver == "nodes":
+        connectWheelNodes(wheelSet, rotationSpeed)
+        return
 
     # Add expression to control wheels
     for wheel in wheelSet:
         myExpression = cmds.expression(name="WheelSetRotation", string="{}.rotateX = {}.translateZ*{}".format(wheel, data.mainController, rotationSpeed))
         cmds.parentConstraint(data.mainController, wheel, maintainOffset=True, skipRotate="x")
 
-    data.writeToNode()
+def connectWheelNodes(wheelSet, rotationSpeed):
+    """This function makes the wheels rotate using utility nodes instead of expressions
+
+    The controller gets a wheelSpeed attribute. A single multDoubleLinear node multiplies
+    it by the controller's translateZ and a single unitConversion node turns the result
+    from degrees to radians, then it is connected to every wheel. Connecting the
+    multDoubleLinear directly would make Maya add a hidden conversion node for each wheel.
 
-def checkDuplicatedName(name):
-    """This function checks if a name is duplicated in the scene, if it does, it generates a new one
-    
     Parameters
     ----------
-    name : str
-        The name to verify in the scene
+    wheelSet : list
+        The names of the wheels
+    rotationSpeed : float
+        The default value of the wheelSpeed attribute
     """
 
-    # The amount of times that we have found the name
-    tries = 0
+    # The speed can be changed (or animated) after rigging
+    cmds.addAttr(data.mainController, longName="wheelSpeed", attributeType="double", defaultValue=rotationSpeed, keyable=True)
 
-    # While there is an object with the same name
-    while(cmds.objExists(name)):
-        # Increment the number of tries
-        tries +=1
-        # Generate new name
-        name = renameDuplicatedObject(name, tries)
-    
-    # Return the name
-    return name
+    # rotateX = translateZ * wheelSpeed
+    speedNode = cmds.createNode("multDoubleLinear", name="WheelSetRotation", skipSelect=True)
+    cmds.connectAttr("{}.translateZ".format(data.mainController), "{}.input1".format(speedNode))
+    cmds.connectAttr("{}.wheelSpeed".format(data.mainController), "{}.input2".format(speedNode))
 
-def renameDuplicatedObject(name, index=0):
-    """This function takes a name and adds an index to it
-    
-    Parameters
-    ----------
-    name : str
-        The name to append an index
-    index : int
-        The desired number to append to the name
-    """
+    # Rotations are saved in radians, one conversion is shared by every wheel
+    conversionNode = cmds.createNode("unitConversion", name="WheelSetRotationConversion", skipSelect=True)
+    cmds.setAttr("{}.conversionFactor".format(conversionNode), math.pi/180.0)
+    cmds.connectAttr("{}.output".format(speedNode), "{}.input".format(conversionNode))
+
+    for wheel in wheelSet:
+        cmds.connectAttr("{}.output".format(conversionNode), "{}.rotateX".format(wheel))
 
-    # If the object exists on the scene
-    if cmds.objExists(name):
-
-        # Create a new name based on previous
-        newName = name
-
-        # Variable to save the number of digits the number should have
-        lastDigits = 0
-
-        # If we are not on index 0
-        if index > 1:
-            # The number of digits is based on the number of digits that the index has
-            lastDigits = len(str(index))
-
-            # Delete that number of digits from the name
-            # Using [fromIndex:toIndex] allows us to create a substring out of the string
-            # the parameters specify from where to where we want to sample that substring
-            # as we are using negative index, we are leaving the last characters on the string
-            # behind, as [-1] is the last index on a string
-            newName = newName[:-lastDigits]
-        
-        # Append index to name
-        newName += str(index)
-        # Return the new name
-        return newName
-
-    # If the object does not exist on the scene, simply return the original name
-    else:
-        return name
+    # One constraint on the group moves every wheel, the wheels only rotate inside of it
+    cmds.parentConstraint(data.mainController, data.wheelGroup, maintainOffset=True, skipRotate="x")
 
 # __name__ is a variable that all python modules have when executed
 # When a python module is executed directly (pasting it on script editor,